@@ -0,0 +1,63 @@
+import atexit
+import os
+import threading
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+CHROME_DRIVER_PATH = os.environ.get("CHROME_DRIVER_PATH", "./ChromeWebDriver")
+
+
+def new_headless_chrome():
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--window-size=1024,768")
+    # without a driver at CHROME_DRIVER_PATH Selenium Manager finds one
+    if os.path.exists(CHROME_DRIVER_PATH):
+        return webdriver.Chrome(service=Service(executable_path=CHROME_DRIVER_PATH), options=options)
+    return webdriver.Chrome(options=options)
+
+
+class BrowserPool:
+    """Headless browser sessions shared by the tests of one process.
+
+    Starting Chrome costs far more than a test, so released sessions are
+    wiped (cookies, current page) and handed to the next test. At most
+    ``size`` idle sessions are kept.
+    """
+
+    def __init__(self, size=1, factory=new_headless_chrome):
+        self.size = size
+        self.factory = factory
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self.factory()
+
+    def release(self, browser):
+        try:
+            browser.delete_all_cookies()
+            browser.get("about:blank")
+        except Exception:
+            browser.quit()
+            return
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(browser)
+                return
+        browser.quit()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for browser in idle:
+            browser.quit()
+
+
+browsers = BrowserPool(size=int(os.environ.get("FUNCTIONAL_TESTS_BROWSERS", "1")))
+atexit.register(browsers.close)
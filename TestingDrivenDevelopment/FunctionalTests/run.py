@@ -0,0 +1,86 @@
+"""Runs the functional tests in parallel shards.
+
+Every shard is a separate process with its own in-memory test database,
+live server and browser pool, e.g. from the TestingDrivenDevelopment
+directory:
+
+    python FunctionalTests/run.py --shards 4
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "superlists")]
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "superlists.test_settings")
+
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import iter_test_cases  # noqa: E402
+
+
+class ShardedDiscoverRunner(DiscoverRunner):
+    """Runs every ``shards``-th functional test, starting at ``shard``, in test id order."""
+
+    def __init__(self, shard=0, shards=1, **kwargs):
+        super().__init__(pattern="*Tests.py", top_level=str(ROOT), **kwargs)
+        self.shard = shard
+        self.shards = shards
+
+    def build_suite(self, *args, **kwargs):
+        tests = sorted(iter_test_cases(super().build_suite(*args, **kwargs)), key=lambda test: test.id())
+        return self.test_suite(tests[self.shard::self.shards])
+
+
+def run_shard(shard, shards, labels, verbosity):
+    import django
+    django.setup()
+    runner = ShardedDiscoverRunner(shard, shards, verbosity=verbosity)
+    return runner.run_tests(labels or ["FunctionalTests"])
+
+
+def run_shards(shards, labels, verbosity):
+    """Start every shard as a child process and report its wall time."""
+    wall_times = {}
+    exit_codes = {}
+
+    def run(shard):
+        start = time.perf_counter()
+        command = [
+            sys.executable, __file__, "--shard", str(shard), "--shards", str(shards),
+            "--verbosity", str(verbosity), *labels,
+        ]
+        exit_codes[shard] = subprocess.run(command, cwd=ROOT).returncode
+        wall_times[shard] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=run, args=(shard,)) for shard in range(shards)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for shard in range(shards):
+        status = "ok" if exit_codes[shard] == 0 else "FAILED"
+        print(f"shard {shard + 1}/{shards}: {wall_times[shard]:.1f}s {status}")
+    print(f"all shards: {time.perf_counter() - start:.1f}s")
+    return max(exit_codes.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("labels", nargs="*", help="test labels, all functional tests by default")
+    parser.add_argument("--shards", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--shard", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--verbosity", type=int, default=1)
+    args = parser.parse_args()
+    if args.shard is not None:
+        return 1 if run_shard(args.shard, args.shards, args.labels, args.verbosity) else 0
+    return run_shards(max(args.shards, 1), args.labels, args.verbosity)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
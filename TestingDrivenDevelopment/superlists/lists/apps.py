@@ -1,6 +1,26 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class ListsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'lists'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .sqlite import configure_connection
+        from .search import create_unmigrated_fts_index
+        from .sharding import reserve_migrated_item_ids
+        connection_created.connect(configure_connection, dispatch_uid="lists_configure_sqlite")
+        post_migrate.connect(create_unmigrated_fts_index, sender=self, dispatch_uid="lists_unmigrated_fts_index")
+        post_migrate.connect(reserve_migrated_item_ids, sender=self, dispatch_uid="lists_reserve_item_ids")
+        self.precompile_templates()
+
+    @staticmethod
+    def precompile_templates():
+        # parsed once into the cached loader instead of on the first request
+        from django.conf import settings
+        from django.template.loader import get_template
+        for template_name in getattr(settings, "LISTS_PRECOMPILED_TEMPLATES", []):
+            get_template(template_name)
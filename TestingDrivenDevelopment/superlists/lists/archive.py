@@ -0,0 +1,161 @@
+import json
+import time
+import zlib
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, connections, router, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .instrumentation import registry
+from .models import Item, List, ListArchive
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 90
+DEFAULT_BATCH_SIZE = 100
+COMPRESSION_LEVEL = 9
+READ_RECORD_INTERVAL = timedelta(days=1)
+
+
+def archive_after():
+    return timedelta(days=getattr(settings, "LISTS_ARCHIVE_AFTER_DAYS", DEFAULT_ARCHIVE_AFTER_DAYS))
+
+
+def cold_lists(cutoff):
+    """Lists with items that were neither written, read nor rehydrated since ``cutoff``."""
+    return List.objects.filter(archived=False, item_count__gt=0, updated_at__lt=cutoff).filter(
+        Q(rehydrated_at__isnull=True) | Q(rehydrated_at__lt=cutoff),
+        Q(last_read_at__isnull=True) | Q(last_read_at__lt=cutoff),
+    )
+
+
+def read_recorded(last_read_at):
+    return last_read_at is not None and last_read_at >= timezone.now() - READ_RECORD_INTERVAL
+
+
+def record_read(list_id, last_read_at):
+    """Move ``last_read_at`` of the list to now, unless it was within the last day.
+
+    ``last_read_at`` is the value the caller already read, so most reads
+    write nothing; the UPDATE rechecks it, and concurrent first reads of
+    the day write once.
+    """
+    if read_recorded(last_read_at):
+        return
+    now = timezone.now()
+    since = now - READ_RECORD_INTERVAL
+    using = router.db_for_write(List, list_id=list_id)
+    List.objects.using(using).filter(Q(last_read_at__isnull=True) | Q(last_read_at__lt=since), id=list_id).update(
+        last_read_at=now
+    )
+
+
+async def arecord_read(list_id, last_read_at):
+    # checked here too, so most reads skip the hop to a thread
+    if not read_recorded(last_read_at):
+        await sync_to_async(record_read)(list_id, last_read_at)
+
+
+def pack_items(rows):
+    """``[(id, text), ...]`` as zlib-compressed JSON."""
+    return zlib.compress(json.dumps(rows, separators=(",", ":")).encode(), COMPRESSION_LEVEL)
+
+
+def unpack_items(data):
+    return json.loads(zlib.decompress(data))
+
+
+def delete_items(using, list_id):
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        # a raw delete, the Item delete signals would take the items off the list's counters
+        cursor.execute(
+            f"DELETE FROM {quote_name(Item._meta.db_table)} WHERE {quote_name('list_id')} = %s", [list_id]
+        )
+
+
+def archive_lists(cutoff, batch_size=DEFAULT_BATCH_SIZE, using=None):
+    """Move the items of every list cold since ``cutoff`` into one ``ListArchive`` row per list.
+
+    The ``List`` rows stay as stubs keeping their counters and ``updated_at``.
+    Lists are archived ``batch_size`` per transaction and ``(lists, items,
+    packed bytes)`` is yielded per batch. Every list is marked by an UPDATE
+    rechecking it is still cold, so one written since the batch was picked
+    is left alone.
+    """
+    using = using or router.db_for_write(List)
+    candidates = cold_lists(cutoff).using(using)
+    last_id = 0
+    while True:
+        ids = list(candidates.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return
+        last_id = ids[-1]
+        lists = items = packed = 0
+        with transaction.atomic(using=using):
+            for list_id in ids:
+                if not candidates.filter(id=list_id).update(archived=True):
+                    continue
+                rows = list(
+                    Item.objects.using(using).filter(list_id=list_id).order_by("id").values_list("id", "text")
+                )
+                data = pack_items(rows)
+                ListArchive.objects.using(using).create(list_id=list_id, items=data)
+                delete_items(using, list_id)
+                lists += 1
+                items += len(rows)
+                packed += len(data)
+        yield lists, items, packed
+
+
+def rehydrate_list(list_id, using=None):
+    """Put the items of an archived list back, return False when it was not archived.
+
+    Items get their old ids back, so the list's counters, page cursors and
+    cached tables stay valid and ``updated_at`` is left alone.
+    """
+    using = using or router.db_for_write(List, list_id=list_id)
+    start = time.perf_counter()
+    with transaction.atomic(using=using):
+        # the UPDATE takes the write lock, a concurrent rehydration of the list waits and then finds nothing to do
+        rehydrated = List.objects.using(using).filter(id=list_id, archived=True).update(
+            archived=False, rehydrated_at=timezone.now()
+        )
+        if not rehydrated:
+            return False
+        archive = ListArchive.objects.using(using).get(list_id=list_id)
+        Item.objects.using(using).bulk_create(
+            [Item(id=item_id, list_id=list_id, text=text) for item_id, text in unpack_items(archive.items)]
+        )
+        ListArchive.objects.using(using).filter(list_id=list_id).delete()
+    registry.observe("lists_rehydration_seconds", using, time.perf_counter() - start)
+    return True
+
+
+async def arehydrate_list(list_id, using=None):
+    return await sync_to_async(rehydrate_list)(list_id, using)
+
+
+def table_size(model, using):
+    """``(rows, bytes)`` of the table of ``model`` with its indexes.
+
+    Bytes come from SQLite's ``dbstat`` table and are None where it is not
+    compiled in or on other databases.
+    """
+    rows = model.objects.using(using).count()
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return rows, None
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name = %s "
+                "OR name IN (SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s)",
+                [table, table],
+            )
+            return rows, cursor.fetchone()[0] or 0
+    except DatabaseError:
+        return rows, None
@@ -0,0 +1,156 @@
+import asyncio
+import json
+
+from django.conf import settings
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, redirect
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.safestring import mark_safe
+
+from . import writebehind
+from .archive import arecord_read, arehydrate_list
+from .cache import aget_or_render_table
+from .conditional import aget_list_state, aget_list_updated_at, make_etag
+from .models import Item, List
+from .pagination import aget_item_page, page_cache_key
+from .pubsub import get_pubsub, server_sent_events
+from .routers import stream_within, use_primary
+from .streaming import astream_items_json, astream_items_ndjson, astream_list_page
+
+DEFAULT_KEEPALIVE_SECONDS = 15
+
+# Async counterparts of lists.views, routed instead of them when
+# settings.LISTS_ASYNC_VIEWS is on, so an ASGI server runs them on its event
+# loop rather than in a worker thread per request, and streamed bodies are
+# read with aiterator() rather than drained into memory first. list_events is
+# async only.
+
+
+async def home_page(request):
+    return render(request, "home.html")
+
+
+async def new_list(request):
+    to_do_list = await List.objects.acreate()
+    await Item.objects.acreate(text=request.POST["new_item"], list=to_do_list)
+    return redirect(f"/lists/{to_do_list.id}/")
+
+
+async def view_list(request, list_id):
+    to_do_list = List(id=list_id)
+    return await _conditional(request, to_do_list, lambda: _list_page(request, to_do_list))
+
+
+async def list_items_json(request, list_id):
+    return await _stream_items(request, list_id, astream_items_json, "application/json")
+
+
+async def list_items_ndjson(request, list_id):
+    return await _stream_items(request, list_id, astream_items_ndjson, "application/x-ndjson")
+
+
+async def _stream_items(request, list_id, serialize, content_type):
+    async def respond():
+        since_id = request.GET.get("since_id")
+        if since_id is not None and not since_id.isdigit():
+            return JsonResponse({"error": "since_id must be an integer"}, status=400)
+        since_id = int(since_id) if since_id is not None else None
+        return StreamingHttpResponse(serialize(list_id, since_id), content_type=content_type)
+
+    return await _conditional(request, List(id=list_id), respond)
+
+
+async def _conditional(request, to_do_list, respond):
+    """Answer with 304 when the client's copy of ``to_do_list`` is current, with ``await respond()`` otherwise.
+
+    condition() only wraps sync views in this Django version. The items of
+    an archived list are put back before ``respond`` reads them, and the
+    read is recorded as ``lists.conditional.records_reads`` does.
+    """
+    state = await aget_list_state(request, to_do_list.id)
+    if state is None:
+        raise Http404("No List matches the given query.")
+    to_do_list.updated_at, archived, last_read_at = state
+    etag = make_etag(to_do_list.id, to_do_list.updated_at)
+    last_modified = int(to_do_list.updated_at.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        if not archived:
+            response = await respond()
+        else:
+            await arehydrate_list(to_do_list.id)
+            # replicas may not have the items back yet
+            with use_primary():
+                response = stream_within(await respond(), use_primary)
+    if request.method in ("GET", "HEAD"):
+        response.headers.setdefault("ETag", etag)
+        response.headers.setdefault("Last-Modified", http_date(last_modified))
+    if response.status_code in (200, 304):
+        await arecord_read(to_do_list.id, last_read_at)
+    return response
+
+
+async def _list_page(request, to_do_list):
+    if request.GET.get("stream"):
+        return StreamingHttpResponse(astream_list_page(request, to_do_list))
+    context = {
+        "table": await arender_list_table(to_do_list, request.GET),
+        "to_do_list": to_do_list,
+        "server_sent_events": server_sent_events(),
+    }
+    return render(request, "list.html", context)
+
+
+async def arender_list_table(to_do_list, params):
+    async def render_table():
+        page = await aget_item_page(to_do_list, params)
+        return render_to_string("list_table.html", {"page": page})
+
+    return mark_safe(await aget_or_render_table(to_do_list, page_cache_key(params), render_table))
+
+
+async def add_item(request, list_id):
+    try:
+        await writebehind.aadd_item(list_id, request.POST["new_item"])
+    except List.DoesNotExist:
+        raise Http404("No List matches the given query.")
+    return redirect(f"/lists/{list_id}/")
+
+
+async def list_events(request, list_id):
+    """Push items added to the list after ``after`` as server-sent events.
+
+    Needs an ASGI server: under WSGI the endless stream would hold a worker
+    for good, so it is only routed with LISTS_ASYNC_VIEWS on.
+    """
+    if await aget_list_updated_at(request, list_id) is None:
+        raise Http404("No List matches the given query.")
+    after = request.headers.get("Last-Event-ID") or request.GET.get("after") or "0"
+    if not after.isdigit():
+        return HttpResponseBadRequest("after must be an integer")
+    response = StreamingHttpResponse(_item_events(list_id, int(after)), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+async def _item_events(list_id, after):
+    keepalive = getattr(settings, "LISTS_EVENTS_KEEPALIVE_SECONDS", DEFAULT_KEEPALIVE_SECONDS)
+    # subscribe before catching up, so nothing committed in between is missed
+    async with get_pubsub().subscribe(list_id, after) as subscription:
+        missed = Item.objects.filter(list_id=list_id, id__gt=after).values_list("id", "text")
+        async for item_id, text in missed:
+            subscription.last_id = item_id
+            yield _item_event(item_id, text)
+        while True:
+            try:
+                item_id, text = await asyncio.wait_for(subscription.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield _item_event(item_id, text)
+
+
+def _item_event(item_id, text):
+    return f"id: {item_id}\nevent: item\ndata: {json.dumps({'id': item_id, 'text': text})}\n\n"
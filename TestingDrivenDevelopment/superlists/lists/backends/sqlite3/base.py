@@ -0,0 +1,21 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite whose transactions take the write lock as they begin.
+
+    A deferred ``BEGIN`` takes a read lock first, and SQLite answers the
+    upgrade to a write lock with SQLITE_BUSY straight away when another
+    connection wrote meanwhile, without calling the busy handler, so the
+    ``timeout`` option never applies. ``BEGIN IMMEDIATE`` waits for the
+    write lock up front like a single statement does.
+    """
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute("BEGIN IMMEDIATE")
+
+    def _set_autocommit(self, autocommit):
+        # sqlite3 issues "BEGIN IMMEDIATE" itself before writes outside atomic()
+        level = None if autocommit else "IMMEDIATE"
+        with self.wrap_database_errors:
+            self.connection.isolation_level = level
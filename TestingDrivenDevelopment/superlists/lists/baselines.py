@@ -0,0 +1,91 @@
+import json
+import os
+
+from django.core.management.base import CommandError
+
+DEFAULT_THRESHOLD = 0.25
+LOWER_IS_BETTER = ("_ms", "_seconds", "_mib", "_kib", "_us", "queries", "failures")
+HIGHER_IS_BETTER = ("per_second", "speedup")
+
+
+def direction(metric):
+    """1 when a larger value of ``metric`` is better, -1 when a smaller one is, 0 for plain counts."""
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        raise CommandError(f"no baseline at {path}, create it with --save-baseline")
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_baseline(path, runs):
+    """Merge ``runs`` (``{run: {metric: value}}``) into the baseline at ``path``, creating it if needed."""
+    baseline = load_baseline(path) if os.path.exists(path) else {}
+    baseline.update(runs)
+    with open(path, "w") as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+def find_regressions(runs, baseline, threshold=DEFAULT_THRESHOLD):
+    """Yield ``(run, metric, baseline value, value)`` for metrics more than ``threshold`` worse than the baseline.
+
+    Runs or metrics the baseline does not know are skipped, so adding a
+    benchmark does not fail until a baseline for it is saved.
+    """
+    for run, metrics in runs.items():
+        for metric, value in metrics.items():
+            expected = baseline.get(run, {}).get(metric)
+            sign = direction(metric)
+            if expected is None or not sign or value is None:
+                continue
+            # a zero baseline (e.g. no failures) tolerates no regression at all
+            if sign > 0 and value < expected * (1 - threshold) or sign < 0 and value > expected * (1 + threshold):
+                yield run, metric, expected, value
+
+
+class BaselineCommandMixin:
+    """``--baseline`` / ``--save-baseline`` / ``--threshold`` for commands reporting runs of metrics."""
+
+    def add_baseline_arguments(self, parser):
+        parser.add_argument("--baseline", help="JSON file of earlier results to compare against")
+        parser.add_argument("--save-baseline", action="store_true", help="store these results in --baseline")
+        parser.add_argument(
+            "--threshold", type=float, default=DEFAULT_THRESHOLD,
+            help="fail when a metric is worse than the baseline by more than this fraction",
+        )
+
+    def validate_baseline_options(self, options):
+        if options["save_baseline"] and not options["baseline"]:
+            raise CommandError("--save-baseline needs --baseline")
+        # before the runs rather than after them
+        if options["baseline"] and not options["save_baseline"]:
+            load_baseline(options["baseline"])
+
+    def write_run(self, run, metrics):
+        self.stdout.write(f"{run}: {' '.join(f'{key}={format_value(value)}' for key, value in metrics.items())}")
+
+    def check_baseline(self, runs, options):
+        path, threshold = options["baseline"], options["threshold"]
+        if not path:
+            return
+        if options["save_baseline"]:
+            save_baseline(path, runs)
+            self.stdout.write(f"saved {len(runs)} runs to {path}")
+            return
+        regressions = list(find_regressions(runs, load_baseline(path), threshold))
+        for run, metric, expected, value in regressions:
+            self.stderr.write(f"{run}: {metric} regressed from {format_value(expected)} to {format_value(value)}")
+        if regressions:
+            raise CommandError(f"{len(regressions)} metrics regressed by more than {threshold:.0%}")
+        self.stdout.write(f"no regressions beyond {threshold:.0%} against {path}")
+
+
+def format_value(value):
+    return f"{value:.4f}" if isinstance(value, float) else str(value)
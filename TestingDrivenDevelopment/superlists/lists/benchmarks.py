@@ -0,0 +1,725 @@
+import asyncio
+import functools
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import tracemalloc
+import unittest.mock
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections
+from django.template import Context, Engine
+from django.template.loader import render_to_string
+from django.test import Client, RequestFactory, override_settings
+from django.utils import timezone
+
+from .archive import archive_after, archive_lists, table_size
+from .bulk import create_items
+from .datasets import DISTRIBUTIONS, list_sizes, sample_items, seed_lists
+from .models import Item, List
+from .loadtest import percentile
+from .pagination import ItemPage
+from .pubsub import LocalPubSub
+from .search import search_items
+from .sharding import list_ids
+from .sqlite import apply_pragmas
+from .writebehind import ItemWriter
+from .streaming import stream_list_page, stream_items_json, stream_items_ndjson
+from .transfer import export_file, import_file
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def seed_list(size, batch_size=5000):
+    to_do_list = List.objects.create()
+    for _ in create_items(to_do_list, sample_items(size), batch_size):
+        pass
+    return to_do_list
+
+
+def profiled(func, *args, **kwargs):
+    """Consume the chunks ``func`` returns and report time to first chunk, total time and peak memory."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    first_chunk_seconds = None
+    for _ in func(*args, **kwargs):
+        if first_chunk_seconds is None:
+            first_chunk_seconds = time.perf_counter() - start
+    total_seconds = time.perf_counter() - start
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first_chunk_seconds, total_seconds, peak_bytes
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+@benchmark("bulk_insert")
+def bulk_insert(size):
+    """Compare adding ``size`` items one POST at a time against one bulk POST."""
+    client = Client()
+    items = sample_items(size)
+
+    def one_item_per_post():
+        to_do_list = List.objects.create()
+        for item in items:
+            client.post(f"/lists/{to_do_list.id}/add_item", data={"new_item": item})
+
+    def bulk_post():
+        client.post("/lists/new/bulk", data=json.dumps(items), content_type="application/json")
+
+    single_seconds, _ = timed(one_item_per_post)
+    bulk_seconds, _ = timed(bulk_post)
+    return {
+        "items": size,
+        "single_post_seconds": single_seconds,
+        "bulk_post_seconds": bulk_seconds,
+        "speedup": single_seconds / bulk_seconds,
+    }
+
+
+@benchmark("streaming_page")
+def streaming_page(size):
+    """Compare rendering a whole list in memory against streaming it."""
+    to_do_list = seed_list(size)
+    request = RequestFactory().get(f"/lists/{to_do_list.id}/?stream=1")
+
+    def buffered():
+        items = list(Item.objects.filter(list=to_do_list).order_by("id"))
+        page = ItemPage(items, 1, has_previous=False, has_next=False, size=len(items))
+        table = render_to_string("list_table.html", {"page": page})
+        yield render_to_string("list.html", {"table": table, "to_do_list": to_do_list}, request)
+
+    buffered_ttfb, buffered_total, buffered_peak = profiled(buffered)
+    streamed_ttfb, streamed_total, streamed_peak = profiled(stream_list_page, request, to_do_list)
+    return {
+        "items": size,
+        "buffered_ttfb_seconds": buffered_ttfb,
+        "buffered_total_seconds": buffered_total,
+        "buffered_peak_mib": buffered_peak / 2 ** 20,
+        "streamed_ttfb_seconds": streamed_ttfb,
+        "streamed_total_seconds": streamed_total,
+        "streamed_peak_mib": streamed_peak / 2 ** 20,
+    }
+
+
+def _schema_sql():
+    with connection.schema_editor(collect_sql=True) as editor:
+        editor.create_model(List)
+        editor.create_model(Item)
+    return editor.collected_sql
+
+
+def _insert_list_sql():
+    """An INSERT of one list with every column at its default, so it follows fields added to List."""
+    quote_name = connection.ops.quote_name
+    fields = [field for field in List._meta.concrete_fields if not field.primary_key]
+    columns = ", ".join(quote_name(field.column) for field in fields)
+    placeholders = ", ".join("?" for _ in fields)
+    values = [field.get_db_prep_save(field.get_default(), connection) for field in fields]
+    return f"INSERT INTO {quote_name(List._meta.db_table)} ({columns}) VALUES ({placeholders})", values
+
+
+def _run_sqlite_workload(path, pragmas, persistent, writers, readers, operations):
+    """Run concurrent add_item style writers and view_list style readers on ``path``."""
+    latencies = []
+    errors = []
+
+    def connect():
+        sqlite_connection = sqlite3.connect(path, timeout=20 if persistent else 5, isolation_level=None)
+        apply_pragmas(sqlite_connection, pragmas)
+        return sqlite_connection
+
+    def worker(statement, params):
+        sqlite_connection = connect() if persistent else None
+        for _ in range(operations):
+            start = time.perf_counter()
+            current = sqlite_connection or connect()
+            try:
+                current.execute("BEGIN")
+                current.execute(statement, params).fetchall()
+                current.execute("COMMIT")
+            except sqlite3.OperationalError as error:
+                current.execute("ROLLBACK")
+                errors.append(error)
+            finally:
+                if not persistent:
+                    current.close()
+            latencies.append(time.perf_counter() - start)
+
+    insert = "INSERT INTO lists_item (text, list_id) SELECT ?, id FROM lists_list WHERE id = ?"
+    select = "SELECT id, text FROM lists_item WHERE list_id = ? ORDER BY id LIMIT 101"
+    threads = [threading.Thread(target=worker, args=(insert, ("Item", 1))) for _ in range(writers)]
+    threads += [threading.Thread(target=worker, args=(select, (1,))) for _ in range(readers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, percentile(latencies, 0.99), len(errors)
+
+
+@benchmark("sqlite_profile")
+def sqlite_profile(size):
+    """Compare the default SQLite setup with the production profile under concurrent reads and writes."""
+    results = {"operations": size}
+    profiles = {
+        "default": ({}, False),
+        "production": (settings.LISTS_SQLITE_PRODUCTION_PRAGMAS, True),
+    }
+    for name, (pragmas, persistent) in profiles.items():
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "profile.sqlite3")
+            setup = sqlite3.connect(path, isolation_level=None)
+            for statement in _schema_sql():
+                setup.execute(statement)
+            setup.execute(*_insert_list_sql())
+            setup.close()
+            throughput, p99, errors = _run_sqlite_workload(
+                path, pragmas, persistent, writers=4, readers=4, operations=max(size // 8, 1)
+            )
+        results[f"{name}_ops_per_second"] = throughput
+        results[f"{name}_p99_ms"] = p99 * 1000
+        results[f"{name}_errors"] = errors
+    return results
+
+
+def _add_concurrently(add, list_id, clients, items_per_client):
+    """Call ``add`` from ``clients`` threads, returning the seconds taken and
+    how many calls succeeded and failed."""
+    added = [0] * clients
+    failed = [0] * clients
+
+    def client(index):
+        try:
+            for number in range(items_per_client):
+                try:
+                    add(list_id, f"Item number {number}")
+                except Exception:
+                    failed[index] += 1
+                    continue
+                added[index] += 1
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, sum(added), sum(failed)
+
+
+@benchmark("write_behind")
+def write_behind(size):
+    """Compare a commit per add_item with group commits through ItemWriter.
+
+    Only items that were added count towards throughput, failed calls are
+    reported as ``*_failures``.
+    """
+    results = {"items": size}
+    for clients in (1, 8, 32):
+        items_per_client = max(size // clients, 1)
+
+        to_do_list = List.objects.create()
+        seconds, added, failed = _add_concurrently(Item.objects.add_to_list, to_do_list.id, clients, items_per_client)
+        results[f"direct_{clients}_items_per_second"] = added / seconds
+        results[f"direct_{clients}_failures"] = failed
+
+        writer = ItemWriter()
+        to_do_list = List.objects.create()
+        seconds, added, failed = _add_concurrently(writer.add, to_do_list.id, clients, items_per_client)
+        writer.stop()
+        results[f"queued_{clients}_items_per_second"] = added / seconds
+        results[f"queued_{clients}_commits_per_second"] = writer.commits / seconds
+        results[f"queued_{clients}_failures"] = failed
+    return results
+
+
+@benchmark("items_api")
+def items_api(size):
+    """Compare reading a whole list through the JSON / NDJSON API and the streamed HTML page."""
+    to_do_list = seed_list(size)
+    request = RequestFactory().get(f"/lists/{to_do_list.id}/?stream=1")
+    readers = {
+        "json": lambda: stream_items_json(to_do_list.id),
+        "ndjson": lambda: stream_items_ndjson(to_do_list.id),
+        "html": lambda: stream_list_page(request, to_do_list),
+    }
+    results = {"items": size}
+    for name, read in readers.items():
+        _, total_seconds, peak_bytes = profiled(read)
+        results[f"{name}_seconds"] = total_seconds
+        results[f"{name}_peak_mib"] = peak_bytes / 2 ** 20
+    return results
+
+
+@benchmark("events_fanout")
+def events_fanout(size):
+    """Time from publishing an item until each of ``size`` subscribers has received it."""
+    async def fan_out():
+        broker = LocalPubSub()
+        subscriptions = [broker.subscribe(1, after=0) for _ in range(size)]
+        for subscription in subscriptions:
+            await subscription.__aenter__()
+        latencies = []
+
+        async def receive(subscription, start):
+            await subscription.get()
+            latencies.append(time.perf_counter() - start)
+
+        for item_id in range(1, 11):
+            start = time.perf_counter()
+            broker.publish(1, [(item_id, f"Item number {item_id}")])
+            await asyncio.gather(*(receive(subscription, start) for subscription in subscriptions))
+        for subscription in subscriptions:
+            await subscription.__aexit__(None, None, None)
+        return latencies
+
+    latencies = asyncio.run(fan_out())
+    return {
+        "subscribers": size,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+@benchmark("search")
+def search(size):
+    """Compare FTS5 search with a text__icontains scan over ``size`` items."""
+    seed_list(size)
+    queries = ["number 1", "number 4242", "missing"]
+
+    def run_queries():
+        for query in queries:
+            search_items(query)
+
+    fts_seconds, _ = timed(run_queries)
+    with unittest.mock.patch("lists.search.has_fts_index", return_value=False):
+        icontains_seconds, _ = timed(run_queries)
+    return {
+        "items": size,
+        "fts_ms_per_query": fts_seconds / len(queries) * 1000,
+        "icontains_ms_per_query": icontains_seconds / len(queries) * 1000,
+    }
+
+
+LOOP_ROWS_TEMPLATE = """{% for number, item in page.numbered_items %}
+        <tr><td>{{ number }}. {{ item.text }}</td></tr>
+{% endfor %}"""
+
+
+@benchmark("template_render")
+def template_render(size):
+    """Compare the ``{% for %}`` row loop with ``{% item_rows %}`` and loading templates with and without caching."""
+    items = [Item(id=number, text=text) for number, text in enumerate(sample_items(size), start=1)]
+    page = ItemPage(items, 1, has_previous=False, has_next=False, size=size)
+    engine = Engine.get_default()
+    loop_template = engine.from_string(LOOP_ROWS_TEMPLATE)
+    tag_template = engine.from_string("{% load lists_tags %}{% item_rows page %}")
+    loop_seconds, _ = timed(loop_template.render, Context({"page": page}))
+    tag_seconds, _ = timed(tag_template.render, Context({"page": page}))
+
+    loads = 100
+    loaders = {
+        "uncached": ["django.template.loaders.filesystem.Loader"],
+        "cached": [("django.template.loaders.cached.Loader", ["django.template.loaders.filesystem.Loader"])],
+    }
+    load_seconds = {}
+    for name, engine_loaders in loaders.items():
+        loading_engine = Engine(dirs=engine.dirs, loaders=engine_loaders, libraries=engine.libraries)
+        load_seconds[name], _ = timed(lambda: [loading_engine.get_template("list.html") for _ in range(loads)])
+    return {
+        "items": size,
+        "for_loop_ms": loop_seconds * 1000,
+        "item_rows_tag_ms": tag_seconds * 1000,
+        "speedup": loop_seconds / tag_seconds,
+        "uncached_load_us": load_seconds["uncached"] / loads * 1e6,
+        "cached_load_us": load_seconds["cached"] / loads * 1e6,
+    }
+
+
+@benchmark("transfer")
+def transfer(size):
+    """Export ``size`` items spread over lists of 100 and import them again, per dump format."""
+    for _ in seed_lists(list_sizes(size)):
+        pass
+    results = {"items": size}
+    formats = ("ndjson", "ndjson.gz", "csv.gz")
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {name: os.path.join(directory, f"lists.{name}") for name in formats}
+        # every dump is written before any is loaded, so all of them hold the same rows
+        for name, path in paths.items():
+            lists, items, seconds = export_file(path)
+            results[f"{name}_export_rows_per_second"] = (lists + items) / seconds
+            results[f"{name}_mib"] = os.path.getsize(path) / 2 ** 20
+        for name, path in paths.items():
+            lists, items, seconds = import_file(path)
+            results[f"{name}_import_rows_per_second"] = (lists + items) / seconds
+    return results
+
+
+ASSET_URL = re.compile(r'(?:href|src)="(/static/[^"]+)"')
+
+
+def _page_load(client, path, accept_encoding, cached):
+    """Bytes a browser downloads for ``path`` and its assets, skipping those in ``cached``."""
+    page = client.get(path)
+    transferred = len(page.content)
+    for url in ASSET_URL.findall(page.content.decode()):
+        if url in cached:
+            continue
+        response = client.get(url, headers={"Accept-Encoding": accept_encoding})
+        transferred += sum(len(chunk) for chunk in response.streaming_content)
+        if "immutable" in response.headers.get("Cache-Control", ""):
+            cached.add(url)
+    return transferred
+
+
+@benchmark("static_transfer")
+def static_transfer(size):
+    """Bytes moved by a cold and a warm load of a list page of ``size`` items, with and without the static pipeline."""
+    to_do_list = seed_list(size)
+    path = f"/lists/{to_do_list.id}/"
+    storages = {
+        "plain": "django.contrib.staticfiles.storage.StaticFilesStorage",
+        "pipeline": "lists.staticfiles.CompressedManifestStaticFilesStorage",
+    }
+    results = {"items": size}
+    for name, backend in storages.items():
+        # hashed names are only linked with DEBUG off
+        with tempfile.TemporaryDirectory() as root, override_settings(
+            DEBUG=False, STATIC_ROOT=root, STORAGES={**settings.STORAGES, "staticfiles": {"BACKEND": backend}}
+        ):
+            call_command("collectstatic", interactive=False, verbosity=0)
+            client, cached = Client(), set()
+            accept_encoding = "br, gzip" if name == "pipeline" else "identity"
+            results[f"{name}_cold_kib"] = _page_load(client, path, accept_encoding, cached) / 1024
+            results[f"{name}_warm_kib"] = _page_load(client, path, accept_encoding, cached) / 1024
+    return results
+
+
+@benchmark("compression")
+def compression(size):
+    """Bytes and CPU time per request for a streamed list page of ``size`` items, per output stage."""
+    to_do_list = seed_list(size)
+    path = f"/lists/{to_do_list.id}/?stream=1"
+    minified_templates = [{
+        **settings.TEMPLATES[0],
+        "APP_DIRS": False,
+        "OPTIONS": {
+            **settings.TEMPLATES[0]["OPTIONS"],
+            "loaders": [("lists.minify.MinifyingLoader", ["django.template.loaders.filesystem.Loader"])],
+        },
+    }]
+    variants = {
+        "plain": ({}, "identity"),
+        "minified": ({"LISTS_MINIFY_HTML": True, "TEMPLATES": minified_templates}, "identity"),
+        "gzip": ({"LISTS_COMPRESSION": True}, "gzip"),
+        "minified_gzip": ({"LISTS_COMPRESSION": True, "LISTS_MINIFY_HTML": True, "TEMPLATES": minified_templates}, "gzip"),
+    }
+    results = {"items": size}
+    requests = 5
+    for name, (overrides, accept_encoding) in variants.items():
+        with override_settings(**overrides):
+            client = Client()
+            start = time.process_time()
+            for _ in range(requests):
+                response = client.get(path, headers={"Accept-Encoding": accept_encoding})
+                transferred = sum(len(chunk) for chunk in response.streaming_content)
+            results[f"{name}_kib"] = transferred / 1024
+            results[f"{name}_cpu_ms"] = (time.process_time() - start) / requests * 1000
+    return results
+
+
+def route_requests(list_ids):
+    """One ``(method, path, data)`` factory per route of lists/urls.py, taking the request number.
+
+    Requests for a list go round the lists in ``list_ids``. ``list_events``
+    holds the request open waiting for items and ``metrics`` is off by
+    default, so both are left out.
+    """
+    def on_list(path):
+        return lambda number: ("get", path.format(list_ids[number % len(list_ids)]), None)
+
+    bulk = json.dumps(sample_items(100))
+    return {
+        "home_page": lambda number: ("get", "/", None),
+        "new_list": lambda number: ("post", "/lists/new", {"new_item": f"New item {number}"}),
+        "view_list": on_list("/lists/{}/"),
+        "view_list_stream": on_list("/lists/{}/?stream=1"),
+        "add_item": lambda number: (
+            "post", f"/lists/{list_ids[number % len(list_ids)]}/add_item", {"new_item": f"Added item {number}"}
+        ),
+        "list_items_json": on_list("/lists/{}/items.json"),
+        "list_items_ndjson": on_list("/lists/{}/items.ndjson"),
+        "search": lambda number: ("get", f"/search?q=number+{number}", None),
+        "new_list_bulk": lambda number: ("post", "/lists/new/bulk", bulk),
+        "add_items": lambda number: ("post", f"/lists/{list_ids[number % len(list_ids)]}/add_item/bulk", bulk),
+    }
+
+
+def _send(client, method, path, data):
+    if method == "get":
+        response = client.get(path)
+    elif isinstance(data, str):
+        response = client.post(path, data=data, content_type="application/json")
+    else:
+        response = client.post(path, data=data)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+def measure_route(client, request, requests):
+    """Latency percentiles, throughput and queries over ``requests`` sequential requests, then peak memory of one."""
+    _send(client, *request(0))
+    latencies = []
+    queries = 0
+
+    def count_query(execute, *args):
+        nonlocal queries
+        queries += 1
+        return execute(*args)
+
+    # CaptureQueriesContext would be emptied by request_started
+    with connection.execute_wrapper(count_query):
+        start = time.perf_counter()
+        for number in range(1, requests + 1):
+            request_start = time.perf_counter()
+            _send(client, *request(number))
+            latencies.append(time.perf_counter() - request_start)
+        elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    _send(client, *request(requests + 1))
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "requests_per_second": requests / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "queries": queries / requests,
+        "peak_mib": peak_bytes / 2 ** 20,
+    }
+
+
+def routes(distribution, size, requests=50):
+    """Drive every route through the test client over ``size`` items spread as ``distribution``."""
+    list_ids = list(seed_lists(list_sizes(size, distribution)))
+    # every list id would make new_list and add_item runs hit ever more lists, a sample keeps them comparable
+    sample = list_ids[:: max(1, len(list_ids) // 100)]
+    client = Client()
+    return {name: measure_route(client, request, requests) for name, request in route_requests(sample).items()}
+
+
+for _distribution in DISTRIBUTIONS:
+    benchmark(f"routes_{_distribution}")(functools.partial(routes, _distribution))
+
+
+def _read_while_writing(list_id, readers, reads_per_reader):
+    """``view_list`` from ``readers`` clients while another keeps calling ``add_item``."""
+    latencies = []
+    writes = 0
+    reading = threading.Event()
+
+    def reader():
+        client = Client()
+        try:
+            for _ in range(reads_per_reader):
+                start = time.perf_counter()
+                client.get(f"/lists/{list_id}/")
+                latencies.append(time.perf_counter() - start)
+        finally:
+            connections.close_all()
+
+    def writer():
+        nonlocal writes
+        client = Client()
+        try:
+            while reading.is_set():
+                client.post(f"/lists/{list_id}/add_item", {"new_item": f"Added item {writes}"})
+                writes += 1
+        finally:
+            connections.close_all()
+
+    reading.set()
+    writer_thread = threading.Thread(target=writer)
+    reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+    start = time.perf_counter()
+    writer_thread.start()
+    for thread in reader_threads:
+        thread.start()
+    for thread in reader_threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    reading.clear()
+    writer_thread.join()
+    return {
+        "reads_per_second": len(latencies) / elapsed,
+        "read_p99_ms": percentile(latencies, 0.99) * 1000,
+        "writes_per_second": writes / elapsed,
+    }
+
+
+@benchmark("replicas")
+def replicas(size, readers=4):
+    """Read throughput of ``view_list`` under a steady ``add_item`` load by number of replicas.
+
+    Replicas are SQLite copies of the benchmark database taken before the
+    run, so replication itself costs nothing here. Tables are not cached,
+    every read runs its queries.
+    """
+    to_do_list = seed_list(size)
+    caches = {**settings.CACHES, "uncached": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for count in (0, 1, 2, 4):
+            aliases = [f"benchmark_replica{number}" for number in range(count)]
+            for alias in aliases:
+                path = os.path.join(directory, f"{alias}.sqlite3")
+                with sqlite3.connect(connection.settings_dict["NAME"]) as source, sqlite3.connect(path) as copy:
+                    source.backup(copy)
+                connections.settings[alias] = {**connection.settings_dict, "NAME": path}
+            try:
+                with override_settings(CACHES=caches, LISTS_CACHE_ALIAS="uncached", LISTS_REPLICA_ALIASES=aliases):
+                    results[f"{count}_replicas"] = _read_while_writing(to_do_list.id, readers, max(size // 20, 10))
+            finally:
+                for alias in aliases:
+                    del connections.settings[alias]
+    return results
+
+
+@benchmark("shards")
+def shards(size, writers=8):
+    """``add_to_list`` throughput of ``writers`` threads spread over many lists, by number of shards.
+
+    Every shard is a SQLite file of its own, so writers to different shards
+    do not wait for each other's write lock.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for count in (1, 2, 4):
+            extra = [f"benchmark_shard{number}" for number in range(1, count)]
+            for alias in extra:
+                path = os.path.join(directory, f"{alias}_{count}.sqlite3")
+                connections.settings[alias] = {**connection.settings_dict, "NAME": path}
+            try:
+                with override_settings(LISTS_SHARDS=["default", *extra], LISTS_PREVIOUS_SHARDS=[]):
+                    for alias in extra:
+                        call_command("migrate", database=alias, verbosity=0)
+                    list_ids.reset()
+                    results[f"{count}_shards"] = _write_to_many_lists(writers, max(size // writers, 1))
+            finally:
+                for alias in extra:
+                    connections[alias].close()
+                    del connections[alias]
+                    del connections.settings[alias]
+            list_ids.reset()
+    return results
+
+
+def _write_to_many_lists(writers, items_per_writer):
+    latencies = []
+    errors = 0
+
+    def writer(lists):
+        nonlocal errors
+        try:
+            for number in range(items_per_writer):
+                start = time.perf_counter()
+                try:
+                    Item.objects.add_to_list(lists[number % len(lists)], f"Item number {number}")
+                except OperationalError:
+                    # "database is locked", from deferred transactions outside the production profile
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+        finally:
+            connections.close_all()
+
+    lists = [List.objects.create().id for _ in range(writers * 4)]
+    threads = [threading.Thread(target=writer, args=(lists[number::writers],)) for number in range(writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "items_per_second": len(latencies) / elapsed,
+        "add_p99_ms": percentile(latencies, 0.99) * 1000,
+        "add_failures": errors,
+    }
+
+
+@benchmark("archive")
+def archive(size, requests=200):
+    """Hot table size and page latency of recently used lists before and after archiving the rest.
+
+    Lists get ``long_tail`` sizes, every tenth stays hot and the others are
+    made cold and archived. The first view of a cold list afterwards pays
+    for its rehydration. Tables are not cached, every view runs its queries.
+    add_item writes to a throwaway list, so the hot lists and the table
+    keep their size between the two measurements.
+    """
+    list_ids = list(seed_lists(list_sizes(size, "long_tail")))
+    hot = list_ids[::10]
+    cold = sorted(set(list_ids) - set(hot))
+    List.objects.filter(id__in=cold).update(updated_at=timezone.now() - archive_after() - timedelta(days=1))
+    caches = {**settings.CACHES, "uncached": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+    hot_routes = route_requests(hot)
+    client = Client()
+
+    def hot_metrics():
+        item_rows, item_bytes = table_size(Item, connection.alias)
+        scratch = List.objects.create()
+        metrics = {
+            "item_rows": item_rows,
+            "item_table_mib": item_bytes / 2 ** 20 if item_bytes is not None else None,
+            "view_list_p99_ms": measure_route(client, hot_routes["view_list"], requests)["p99_ms"],
+            "add_item_p99_ms": measure_route(client, route_requests([scratch.id])["add_item"], requests)["p99_ms"],
+        }
+        scratch.delete()
+        return metrics
+
+    results = {}
+    with override_settings(CACHES=caches, LISTS_CACHE_ALIAS="uncached"):
+        results["hot_before"] = hot_metrics()
+        seconds, batches = timed(list, archive_lists(timezone.now() - archive_after()))
+        archived_items = sum(items for _, items, _ in batches)
+        results["archiving"] = {
+            "lists": sum(lists for lists, _, _ in batches),
+            "items_per_second": archived_items / max(seconds, 1e-9),
+            "packed_mib": sum(packed for _, _, packed in batches) / 2 ** 20,
+        }
+        results["hot_after"] = hot_metrics()
+        latencies = []
+        for list_id in cold[:requests]:
+            start = time.perf_counter()
+            client.get(f"/lists/{list_id}/")
+            latencies.append(time.perf_counter() - start)
+        results["first_view_of_archived"] = {
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+        }
+    return results
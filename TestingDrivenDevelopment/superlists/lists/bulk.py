@@ -0,0 +1,68 @@
+import json
+
+from django.conf import settings
+from django.db import router
+
+from .models import Item, List
+from .pubsub import publish_items
+
+DEFAULT_BATCH_SIZE = 500
+FORM_CONTENT_TYPES = ("application/x-www-form-urlencoded", "multipart/form-data")
+
+
+class BulkItemsError(ValueError):
+    pass
+
+
+def parse_items(request):
+    """Return the item texts sent in a bulk request body.
+
+    JSON bodies must be an array of strings, form posts carry newline separated
+    items in ``new_items`` and any other body is read as newline separated text.
+    Blank entries are dropped.
+    """
+    if request.content_type == "application/json":
+        try:
+            texts = json.loads(request.body)
+        except ValueError:
+            raise BulkItemsError("request body is not valid JSON")
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            raise BulkItemsError("expected a JSON array of strings")
+    elif request.content_type in FORM_CONTENT_TYPES:
+        texts = request.POST.get("new_items", "").splitlines()
+    else:
+        texts = request.body.decode(request.encoding or "utf-8").splitlines()
+
+    texts = [text for text in texts if text.strip()]
+    if not texts:
+        raise BulkItemsError("no items to add")
+    return texts
+
+
+def get_batch_size(request):
+    default = getattr(settings, "LISTS_BULK_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+    try:
+        batch_size = int(request.GET.get("batch_size", default))
+    except ValueError:
+        raise BulkItemsError("batch_size must be an integer")
+    if batch_size < 1:
+        raise BulkItemsError("batch_size must be positive")
+    return batch_size
+
+
+def create_items(to_do_list, texts, batch_size):
+    """Insert ``texts`` into ``to_do_list`` with one INSERT per batch.
+
+    Yields the number of items written by every batch, so callers can report
+    progress while the surrounding transaction is still open.
+    """
+    using = router.db_for_write(Item, list_id=to_do_list.id)
+    # bulk_create sends no post_save, so the list counters are updated here
+    batch = []
+    for start in range(0, len(texts), batch_size):
+        batch = [Item(text=text, list=to_do_list) for text in texts[start:start + batch_size]]
+        Item.objects.using(using).bulk_create(batch)
+        publish_items(to_do_list.id, batch, using)
+        yield len(batch)
+    if batch:
+        List.record_added_items(to_do_list.id, len(texts), batch[-1].id)
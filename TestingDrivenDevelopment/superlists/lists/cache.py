@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULT_CACHE_ALIAS = "lists"
+
+
+def get_cache():
+    return caches[getattr(settings, "LISTS_CACHE_ALIAS", DEFAULT_CACHE_ALIAS)]
+
+
+def table_key(to_do_list, page_key):
+    """The cache key of a rendered page of ``to_do_list``.
+
+    It holds the list's ``updated_at``, which every item write moves
+    forward and the view reads anyway, so a write elsewhere changes the key
+    any worker looks up next and per-process caches can't serve stale tables.
+    """
+    return f"list:{to_do_list.id}:table:{int(to_do_list.updated_at.timestamp() * 1_000_000)}:{page_key}"
+
+
+def rendered_key(list_id, page_key):
+    return f"list:{list_id}:rendered:{page_key}"
+
+
+def was_rendered(list_id, page_key):
+    """Whether a table of the page was cached before, whatever the list's ``updated_at`` then.
+
+    Known before the list is read, it tells a likely cache hit from a
+    certain miss.
+    """
+    return get_cache().get(rendered_key(list_id, page_key)) is not None
+
+
+def get_or_render_table(to_do_list, page_key, render):
+    """Return the cached item table of a list page, rendering it on a miss."""
+    cache = get_cache()
+    key = table_key(to_do_list, page_key)
+    table = cache.get(key)
+    if table is None:
+        table = render()
+        cache.set_many({key: table, rendered_key(to_do_list.id, page_key): True})
+    return table
+
+
+async def aget_or_render_table(to_do_list, page_key, arender):
+    cache = get_cache()
+    key = table_key(to_do_list, page_key)
+    table = await cache.aget(key)
+    if table is None:
+        table = await arender()
+        await cache.aset_many({key: table, rendered_key(to_do_list.id, page_key): True})
+    return table
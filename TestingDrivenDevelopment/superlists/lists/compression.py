@@ -0,0 +1,97 @@
+import secrets
+from gzip import GzipFile
+
+from django.utils.text import StreamingBuffer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "application/x-ndjson",
+    "image/svg+xml",
+)
+
+
+def accepted_encodings(request):
+    """Content codings ``Accept-Encoding`` allows, those with ``q=0`` left out."""
+    accepted = set()
+    for value in request.headers.get("Accept-Encoding", "").split(","):
+        encoding, *params = [part.strip() for part in value.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0
+        if encoding and quality > 0:
+            accepted.add(encoding)
+    return accepted
+
+
+class GzipStream:
+    """Incremental gzip, padded like Django's ``GZipMiddleware``.
+
+    A random-length file name in the gzip header hides the exact compressed
+    length of responses carrying secrets ("Heal The Breach").
+    """
+
+    encoding = "gzip"
+
+    def __init__(self, max_random_bytes=100):
+        self.buffer = StreamingBuffer()
+        filename = b"a" * (1 + secrets.randbelow(max_random_bytes)) if max_random_bytes else None
+        self.file = GzipFile(filename=filename, mode="wb", compresslevel=6, fileobj=self.buffer, mtime=0)
+
+    def compress(self, data, flush=True):
+        self.file.write(data)
+        if flush:
+            self.file.flush()
+        return self.buffer.read()
+
+    def finish(self):
+        self.file.close()
+        return self.buffer.read()
+
+
+class BrotliStream:
+    encoding = "br"
+
+    def __init__(self, quality=5):
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data, flush=True):
+        compressed = self.compressor.process(data)
+        return compressed + self.compressor.flush() if flush else compressed
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+def compress_content(content, stream):
+    return stream.compress(content, flush=False) + stream.finish()
+
+
+def compress_chunks(chunks, stream):
+    """Compress ``chunks`` as one stream, flushed after every chunk so none is held back."""
+    for chunk in chunks:
+        compressed = stream.compress(chunk)
+        if compressed:
+            yield compressed
+    yield stream.finish()
+
+
+async def acompress_chunks(chunks, stream):
+    async for chunk in chunks:
+        compressed = stream.compress(chunk)
+        if compressed:
+            yield compressed
+    yield stream.finish()
@@ -0,0 +1,105 @@
+import functools
+
+from django.utils.http import quote_etag
+
+from .archive import record_read
+from .cache import was_rendered
+from .models import Item, List
+from .pagination import CURSOR_PARAMS, get_page_size, page_cache_key
+
+
+def _state_query(list_id):
+    return List.objects.filter(id=list_id).values_list("updated_at", "archived", "last_read_at")
+
+
+def _state_with_first_page(list_id, page_size):
+    """The list's state and its first ``page_size + 1`` items, from one LEFT JOIN."""
+    rows = list(
+        List.objects.filter(id=list_id)
+        .values_list("updated_at", "archived", "last_read_at", "item__id", "item__text")
+        .order_by("item__id")[:page_size + 1]
+    )
+    if not rows:
+        return None, []
+    items = [Item(id=item_id, text=text, list_id=list_id) for *_, item_id, text in rows if item_id is not None]
+    return rows[0][:3], items
+
+
+def prefetch_first_page(view):
+    """Have the list lookup of ``view`` read the first page of items along with the list.
+
+    Only unconditional requests for the first page take the join: a
+    conditional one mostly ends in a 304, other pages seek by cursor and a
+    page whose table was cached before is likely served from the cache.
+    """
+    @functools.wraps(view)
+    def wrapper(request, list_id, *args, **kwargs):
+        conditional = "If-None-Match" in request.headers or "If-Modified-Since" in request.headers
+        if (
+            request.method in ("GET", "HEAD")
+            and not conditional
+            and not CURSOR_PARAMS & set(request.GET)
+            and not was_rendered(list_id, page_cache_key(request.GET))
+        ):
+            request._first_page_size = get_page_size(request.GET)
+        return view(request, list_id, *args, **kwargs)
+    return wrapper
+
+
+def records_reads(view):
+    """Record a read of the list whenever ``view`` answers with it, 304s included."""
+    @functools.wraps(view)
+    def wrapper(request, list_id, *args, **kwargs):
+        response = view(request, list_id, *args, **kwargs)
+        state = getattr(request, "_list_state", None)
+        if state is not None and response.status_code in (200, 304):
+            record_read(list_id, state[2])
+        return response
+    return wrapper
+
+
+def get_list_state(request, list_id):
+    """Return the list's ``(updated_at, archived, last_read_at)``, or None when there is no such list.
+
+    condition() asks for the ETag and Last-Modified separately and the view
+    needs the list too, so the answer is remembered on the request, with
+    the first page of items when ``prefetch_first_page`` asked for it.
+    """
+    if not hasattr(request, "_list_state"):
+        page_size = getattr(request, "_first_page_size", None)
+        if page_size is None:
+            request._list_state = _state_query(list_id).first()
+        else:
+            request._list_state, request._first_page_items = _state_with_first_page(list_id, page_size)
+    return request._list_state
+
+
+async def aget_list_state(request, list_id):
+    if not hasattr(request, "_list_state"):
+        request._list_state = await _state_query(list_id).afirst()
+    return request._list_state
+
+
+def get_list_updated_at(request, list_id):
+    state = get_list_state(request, list_id)
+    return state and state[0]
+
+
+async def aget_list_updated_at(request, list_id):
+    state = await aget_list_state(request, list_id)
+    return state and state[0]
+
+
+def make_etag(list_id, updated_at):
+    return quote_etag(f"{list_id}-{int(updated_at.timestamp() * 1_000_000)}")
+
+
+def list_etag(request, list_id):
+    updated_at = get_list_updated_at(request, list_id)
+    if updated_at is None:
+        return None
+    return make_etag(list_id, updated_at)
+
+
+def list_last_modified(request, list_id):
+    return get_list_updated_at(request, list_id)
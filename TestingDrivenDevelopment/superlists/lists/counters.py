@@ -0,0 +1,47 @@
+from django.db import router, transaction
+from django.db.models import Count, Max
+
+
+def sync_list_counters(list_model, item_model, batch_size=1000, repair=True, skip_archived=False):
+    """Compare ``item_count`` / ``last_item_id`` with the items of every list.
+
+    Lists are walked in id order ``batch_size`` at a time, with one grouped
+    aggregate per batch, so memory and transaction size stay bounded on very
+    large tables. Yields ``(checked, drifted)`` per batch and, with ``repair``,
+    rewrites drifted lists inside that batch's transaction. ``skip_archived``
+    leaves out archived lists, whose items are held in ``ListArchive``.
+    """
+    # counts are read from where they are written, not from a lagging replica
+    using = router.db_for_write(list_model)
+    candidates = list_model.objects.using(using)
+    if skip_archived:
+        candidates = candidates.filter(archived=False)
+    last_id = 0
+    while True:
+        with transaction.atomic(using=using):
+            lists = list(
+                candidates.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", "item_count", "last_item_id")[:batch_size]
+            )
+            if not lists:
+                return
+            first_id, last_id = lists[0][0], lists[-1][0]
+            actual = {
+                row["list_id"]: (row["count"], row["last_id"])
+                for row in item_model.objects.using(using).filter(list_id__gte=first_id, list_id__lte=last_id)
+                .order_by()
+                .values("list_id")
+                .annotate(count=Count("id"), last_id=Max("id"))
+            }
+            drifted = [
+                (list_id, *actual.get(list_id, (0, None)))
+                for list_id, item_count, last_item_id in lists
+                if (item_count, last_item_id) != actual.get(list_id, (0, None))
+            ]
+            if repair:
+                for list_id, item_count, last_item_id in drifted:
+                    list_model.objects.using(using).filter(id=list_id).update(
+                        item_count=item_count, last_item_id=last_item_id
+                    )
+        yield len(lists), drifted
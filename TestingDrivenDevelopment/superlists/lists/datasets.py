@@ -0,0 +1,53 @@
+import random
+
+from django.db import transaction
+
+from .bulk import create_items
+from .models import List
+
+DISTRIBUTIONS = ("uniform", "long_tail", "single")
+# texts are generated this many at a time, so a 10M item list never sits in memory
+TEXT_CHUNK_SIZE = 100_000
+
+
+def sample_items(size, start=1):
+    return [f"Item number {number}" for number in range(start, start + size)]
+
+
+def list_sizes(total_items, distribution="uniform", mean_size=100, seed=0):
+    """Yield list sizes adding up to ``total_items``.
+
+    ``uniform`` gives every list ``mean_size`` items, ``long_tail`` draws
+    Pareto sizes averaging ``mean_size`` (most lists small, a few huge) and
+    ``single`` puts everything in one list.
+    """
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"unknown distribution {distribution!r}, expected one of {', '.join(DISTRIBUTIONS)}")
+    if distribution == "single":
+        yield total_items
+        return
+    generator = random.Random(seed)
+    alpha = 1.16
+    # a Pareto variate with minimum 1 averages alpha / (alpha - 1)
+    scale = mean_size * (alpha - 1) / alpha
+    remaining = total_items
+    while remaining > 0:
+        if distribution == "uniform":
+            size = mean_size
+        else:
+            size = max(1, int(generator.paretovariate(alpha) * scale))
+        size = min(size, remaining)
+        remaining -= size
+        yield size
+
+
+def seed_lists(sizes, batch_size=5000):
+    """Create a list for every entry of ``sizes``, one transaction each, and yield the list ids."""
+    for size in sizes:
+        with transaction.atomic():
+            to_do_list = List.objects.create()
+            for start in range(0, size, TEXT_CHUNK_SIZE):
+                texts = sample_items(min(TEXT_CHUNK_SIZE, size - start), start=start + 1)
+                for _ in create_items(to_do_list, texts, batch_size):
+                    pass
+        yield to_do_list.id
@@ -0,0 +1,144 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.template.backends.django import DjangoTemplates
+
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+current_metrics = ContextVar("lists_request_metrics", default=None)
+
+
+class Histogram:
+    """Cumulative Prometheus histogram."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip([*self.buckets, "+Inf"], self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class MetricsRegistry:
+    metrics = {
+        "lists_request_duration_seconds": ("view", TIME_BUCKETS, "Wall time per request"),
+        "lists_db_queries": ("view", COUNT_BUCKETS, "Database queries per request"),
+        "lists_db_duration_seconds": ("view", TIME_BUCKETS, "Time spent in database queries per request"),
+        "lists_response_bytes": ("view", SIZE_BUCKETS, "Response body size, streamed responses excluded"),
+        "lists_template_render_seconds": ("template", TIME_BUCKETS, "Template render time"),
+        "lists_rehydration_seconds": ("database", TIME_BUCKETS, "Time to put the items of an archived list back"),
+    }
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, label, value):
+        with self._lock:
+            histogram = self._histograms.get((name, label))
+            if histogram is None:
+                histogram = self._histograms[(name, label)] = Histogram(self.metrics[name][1])
+            histogram.observe(value)
+
+    def get(self, name, label):
+        return self._histograms.get((name, label))
+
+    def render(self):
+        """Return every histogram in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, (label_name, _, description) in self.metrics.items():
+                lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+                for (histogram_name, label), histogram in sorted(self._histograms.items()):
+                    if histogram_name == name:
+                        lines += histogram.samples(name, f'{label_name}="{label}"')
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+registry = MetricsRegistry()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0
+        self.render_seconds = 0
+
+
+@contextmanager
+def recording_into(metrics):
+    """Count the queries and renders within the block towards ``metrics``."""
+    token = current_metrics.set(metrics)
+    try:
+        yield
+    finally:
+        current_metrics.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """``execute_wrapper`` timing every query of the request being measured."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.query_seconds += time.perf_counter() - start
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class InstrumentedTemplate:
+    def __init__(self, template):
+        self.template = template
+        self.origin = template.origin
+
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            seconds = time.perf_counter() - start
+            registry.observe("lists_template_render_seconds", self.origin.template_name, seconds)
+            metrics = current_metrics.get()
+            if metrics is not None:
+                metrics.render_seconds += seconds
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """Django template backend timing every top-level render.
+
+    ``list.html`` includes the time of the ``base.html`` it extends.
+    """
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return InstrumentedTemplate(super().get_template(template_name))
@@ -0,0 +1,208 @@
+import asyncio
+import importlib.util
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+METRIC_LINE = re.compile(r'^lists_db_queries_(sum|count)\{view="([^"]+)"\} (\S+)$')
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def manage(*args, env):
+    """Run a manage.py command in a child process and return its output."""
+    return subprocess.run(
+        [sys.executable, "manage.py", *args], cwd=settings.BASE_DIR, env=env,
+        check=True, capture_output=True, text=True,
+    ).stdout
+
+
+# URL name and path, filled in with a list id, of the GET routes in lists/urls.py
+GET_ROUTES = {
+    "home_page": ("home_page", "/"),
+    "view_list": ("view_list", "/lists/{}/"),
+    "view_list_stream": ("view_list", "/lists/{}/?stream=1"),
+    "list_items_json": ("list_items_json", "/lists/{}/items.json"),
+    "list_items_ndjson": ("list_items_ndjson", "/lists/{}/items.ndjson"),
+    "search": ("search", "/search?q=number+{}"),
+}
+
+
+class Server:
+    def __init__(self, address, process):
+        self.address = address
+        self.process = process
+
+    def peak_memory_mib(self):
+        """Peak resident memory of the server process, None where /proc is missing."""
+        try:
+            with open(f"/proc/{self.process.pid}/status") as status:
+                for line in status:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            return None
+
+
+@contextmanager
+def serve(interface, env, port):
+    """Serve the project as ``asgi`` or ``wsgi`` for the duration of the block.
+
+    ASGI runs under uvicorn. WSGI runs under gunicorn when installed and
+    otherwise under Django's threaded runserver; uvicorn's WSGI adapter is not
+    used because it rejects the Set-Cookie values Django's WSGI handler sends.
+    """
+    command = server_command(interface, port)
+    # runserver logs every request to stderr
+    output = subprocess.DEVNULL if "runserver" in command else None
+    process = subprocess.Popen(
+        command, cwd=settings.BASE_DIR, env={**os.environ, **env}, stdout=output, stderr=output
+    )
+    try:
+        _wait_for_port(port)
+        yield Server(f"127.0.0.1:{port}", process)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def server_command(interface, port):
+    if interface == "asgi":
+        return [
+            sys.executable, "-m", "uvicorn", "superlists.asgi:application",
+            "--port", str(port), "--log-level", "warning", "--backlog", "4096",
+        ]
+    if importlib.util.find_spec("gunicorn") is not None:
+        return [
+            sys.executable, "-m", "gunicorn", "superlists.wsgi:application",
+            "--bind", f"127.0.0.1:{port}", "--threads", "8", "--backlog", "4096", "--log-level", "warning",
+        ]
+    return [sys.executable, "manage.py", "runserver", f"127.0.0.1:{port}", "--noreload", "--nostatic"]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server did not start listening on port {port}")
+
+
+def run_load(address, paths, concurrency, requests_per_client):
+    """GET ``paths`` in turn from ``concurrency`` keep-alive clients.
+
+    Returns requests per second, latency percentiles and the number of
+    responses that were not 200.
+    """
+    host, port = address.split(":")
+    latencies = []
+    failures = []
+
+    async def client(number):
+        reader, writer = await asyncio.open_connection(host, int(port))
+        try:
+            for request_number in range(requests_per_client):
+                path = paths[(number + request_number) % len(paths)]
+                start = time.perf_counter()
+                writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+                await writer.drain()
+                status, keep_alive = await _read_response(reader)
+                latencies.append(time.perf_counter() - start)
+                if status != 200:
+                    failures.append(status)
+                if not keep_alive:
+                    writer.close()
+                    reader, writer = await asyncio.open_connection(host, int(port))
+        finally:
+            writer.close()
+
+    async def main():
+        await asyncio.gather(*(client(number) for number in range(concurrency)))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    elapsed = time.perf_counter() - start
+    return {
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "failures": len(failures),
+    }
+
+
+def fetch(address, path):
+    """GET ``path`` over a fresh connection and return the body."""
+    host, port = address.split(":")
+    with socket.create_connection((host, int(port))) as sock:
+        sock.sendall(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+        response = b"".join(iter(lambda: sock.recv(65536), b""))
+    head, _, body = response.partition(b"\r\n\r\n")
+    if b"chunked" in head.lower():
+        body = _unchunk(body)
+    return body.decode()
+
+
+def _unchunk(body):
+    chunks = []
+    while body:
+        size_line, _, body = body.partition(b"\r\n")
+        size = int(size_line, 16)
+        if size == 0:
+            break
+        chunks.append(body[:size])
+        body = body[size + 2:]
+    return b"".join(chunks)
+
+
+def query_totals(address):
+    """``{view: (queries, requests)}`` so far, read from the server's /metrics."""
+    totals = {}
+    for line in fetch(address, "/metrics").splitlines():
+        match = METRIC_LINE.match(line)
+        if match:
+            name, view, value = match.groups()
+            queries, requests = totals.get(view, (0, 0))
+            if name == "sum":
+                queries = float(value)
+            else:
+                requests = int(float(value))
+            totals[view] = (queries, requests)
+    return totals
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    status_line, *header_lines = head.decode("latin-1").split("\r\n")
+    headers = dict(line.lower().split(": ", 1) for line in header_lines if line)
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding") == "chunked":
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        # runserver ends streamed bodies by closing the connection
+        await reader.read()
+        return int(status_line.split(" ")[1]), False
+    return int(status_line.split(" ")[1]), headers.get("connection") != "close"
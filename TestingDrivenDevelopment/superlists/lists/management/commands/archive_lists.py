@@ -0,0 +1,59 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router
+from django.utils import timezone
+
+from lists.archive import DEFAULT_BATCH_SIZE, archive_after, archive_lists, cold_lists, table_size
+from lists.models import Item, List, ListArchive
+from lists.sharding import shard_aliases, use_shard
+
+
+class Command(BaseCommand):
+    help = "Moves the items of lists untouched for a while into one compressed row per list."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=float,
+            help="archive lists neither written nor read for this many days, LISTS_ARCHIVE_AFTER_DAYS by default",
+        )
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="lists archived per transaction")
+        parser.add_argument("--dry-run", action="store_true", help="count the lists to archive without archiving them")
+
+    def handle(self, *args, **options):
+        if options["days"] is not None and options["days"] < 0:
+            raise CommandError("--days must not be negative")
+        age = archive_after() if options["days"] is None else timedelta(days=options["days"])
+        cutoff = timezone.now() - age
+        # every shard in turn when lists are sharded
+        for alias in shard_aliases() or [None]:
+            with use_shard(alias):
+                using = router.db_for_write(List)
+                if options["dry_run"]:
+                    self.stdout.write(f"{using}: would archive {cold_lists(cutoff).using(using).count()} lists")
+                    continue
+                before = table_size(Item, using)
+                lists = items = packed = 0
+                start = time.perf_counter()
+                for batch_lists, batch_items, batch_packed in archive_lists(cutoff, options["batch_size"], using):
+                    lists += batch_lists
+                    items += batch_items
+                    packed += batch_packed
+                seconds = time.perf_counter() - start
+                self.stdout.write(
+                    f"{using}: archived {lists} lists, {items} items into {format_bytes(packed)} in {seconds:.2f}s"
+                )
+                after = table_size(Item, using)
+                self.stdout.write(f"{using}: {Item._meta.db_table} {format_size(before)} -> {format_size(after)}")
+                archive_size = table_size(ListArchive, using)
+                self.stdout.write(f"{using}: {ListArchive._meta.db_table} {format_size(archive_size)}")
+
+
+def format_size(size):
+    rows, size_bytes = size
+    return f"{rows} rows" if size_bytes is None else f"{rows} rows, {format_bytes(size_bytes)}"
+
+
+def format_bytes(size_bytes):
+    return f"{size_bytes / 1024 / 1024:.2f} MiB"
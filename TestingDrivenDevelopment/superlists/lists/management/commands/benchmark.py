@@ -0,0 +1,53 @@
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from lists.baselines import BaselineCommandMixin
+from lists.benchmarks import BENCHMARKS
+
+
+class Command(BaselineCommandMixin, BaseCommand):
+    help = "Runs lists app benchmarks against a throwaway test database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="benchmarks to run, all of them by default")
+        parser.add_argument("--size", type=int, nargs="+", default=[1000], help="numbers of items to work with")
+        self.add_baseline_arguments(parser)
+
+    def handle(self, *args, **options):
+        names = options["names"] or list(BENCHMARKS)
+        unknown = set(names) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+        self.validate_baseline_options(options)
+
+        setup_test_environment()
+        directory = tempfile.TemporaryDirectory()
+        # a file rather than the in-memory test database, so commits pay for fsync
+        # and other threads see the same data
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(directory.name, "benchmark.sqlite3")
+        old_name = connection.creation.create_test_db(verbosity=0)
+        runs = {}
+        try:
+            for name in names:
+                for size in options["size"]:
+                    for run, metrics in self.runs(name, size, BENCHMARKS[name](size)):
+                        self.write_run(run, metrics)
+                        runs[run] = metrics
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            directory.cleanup()
+        self.check_baseline(runs, options)
+
+    @staticmethod
+    def runs(name, size, results):
+        """Results keyed by run, a benchmark returning a dict per route gets a run per route."""
+        if all(isinstance(value, dict) for value in results.values()):
+            for part, metrics in results.items():
+                yield f"{name}[{size}] {part}", metrics
+        else:
+            yield f"{name}[{size}]", results
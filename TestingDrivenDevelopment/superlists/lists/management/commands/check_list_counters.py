@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from lists.counters import sync_list_counters
+from lists.models import Item, List
+from lists.sharding import shard_aliases, use_shard
+
+
+class Command(BaseCommand):
+    help = "Verifies List.item_count and List.last_item_id against the items and repairs drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="lists checked per transaction")
+        parser.add_argument("--dry-run", action="store_true", help="report drift without repairing it")
+
+    def handle(self, *args, **options):
+        checked = drifted = 0
+        # every shard in turn when lists are sharded
+        for alias in shard_aliases() or [None]:
+            with use_shard(alias):
+                batches = sync_list_counters(
+                    List, Item, options["batch_size"], repair=not options["dry_run"], skip_archived=True
+                )
+                for batch_checked, batch_drifted in batches:
+                    checked += batch_checked
+                    drifted += len(batch_drifted)
+                    for list_id, item_count, last_item_id in batch_drifted:
+                        self.stdout.write(f"list {list_id}: item_count={item_count} last_item_id={last_item_id}")
+        action = "found" if options["dry_run"] else "repaired"
+        self.stdout.write(f"checked {checked} lists, {action} {drifted} with drift")
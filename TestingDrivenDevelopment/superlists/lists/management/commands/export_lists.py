@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from lists.transfer import (
+    DEFAULT_BATCH_SIZE,
+    TransferError,
+    check_unsharded,
+    export_file,
+    list_id_ranges,
+    part_path,
+    rate,
+)
+
+
+class Command(BaseCommand):
+    help = "Streams every list and its items to NDJSON or CSV, compressed by .gz, .bz2 or .xz."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="dump to write, e.g. lists.ndjson.gz or lists.csv")
+        parser.add_argument("--parts", type=int, default=1, help="split the lists by id range into this many files")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="rows fetched per query")
+
+    def handle(self, *args, **options):
+        if options["parts"] < 1:
+            raise CommandError("--parts must be positive")
+        try:
+            check_unsharded()
+        except TransferError as error:
+            raise CommandError(error)
+        ranges = list_id_ranges(options["parts"])
+        total_lists = total_items = total_seconds = 0
+        for part, (first_id, end_id) in enumerate(ranges, start=1):
+            path = part_path(options["path"], part) if len(ranges) > 1 else options["path"]
+            try:
+                lists, items, seconds = export_file(path, first_id, end_id, options["batch_size"])
+            except TransferError as error:
+                raise CommandError(error)
+            self.stdout.write(f"{path}: {rate(lists, items, seconds)}")
+            total_lists += lists
+            total_items += items
+            total_seconds += seconds
+        if len(ranges) > 1:
+            self.stdout.write(f"exported {rate(total_lists, total_items, total_seconds)}")
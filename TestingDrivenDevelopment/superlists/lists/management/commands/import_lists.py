@@ -0,0 +1,45 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from lists.transfer import DEFAULT_BATCH_SIZE, TransferError, check_unsharded, import_file, open_dump, rate
+
+
+class Command(BaseCommand):
+    help = "Loads dumps written by export_lists, giving every list and item a new id."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="dumps to load, e.g. the parts of export_lists --parts")
+        parser.add_argument("--workers", type=int, default=1, help="processes loading dumps side by side")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="rows written per transaction")
+
+    def handle(self, *args, **options):
+        paths = options["paths"]
+        start = time.perf_counter()
+        try:
+            check_unsharded()
+            for path in paths:
+                open_dump(path, "r")[1].close()
+            results = self.import_files(paths, options["workers"], options["batch_size"])
+        except (TransferError, OSError) as error:
+            raise CommandError(error)
+
+        for path, (lists, items, seconds) in zip(paths, results):
+            self.stdout.write(f"{path}: {rate(lists, items, seconds)}")
+        if len(paths) > 1:
+            total_lists = sum(lists for lists, _, _ in results)
+            total_items = sum(items for _, items, _ in results)
+            self.stdout.write(f"imported {rate(total_lists, total_items, time.perf_counter() - start)}")
+
+    @staticmethod
+    def import_files(paths, workers, batch_size):
+        if workers < 2 or len(paths) < 2:
+            return [import_file(path, batch_size) for path in paths]
+        # forked workers must open connections of their own
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(workers, mp_context=context) as executor:
+            return list(executor.map(import_file, paths, [batch_size] * len(paths)))
@@ -0,0 +1,78 @@
+import importlib.util
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lists.baselines import BaselineCommandMixin
+from lists.datasets import DISTRIBUTIONS
+from lists.loadtest import GET_ROUTES, free_port, manage, query_totals, run_load, serve
+
+
+class Command(BaselineCommandMixin, BaseCommand):
+    help = "Load tests the list routes under uvicorn, as ASGI with sync or async views and as WSGI."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 1000])
+        parser.add_argument("--requests-per-client", type=int, default=20)
+        parser.add_argument("--items", type=int, default=100, help="items per list, the mean for long_tail")
+        parser.add_argument("--total-items", type=int, help="items to seed in all, one list of --items by default")
+        parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="uniform", help="list sizes to seed")
+        parser.add_argument("--modes", nargs="+", choices=["sync", "async"], default=["sync", "async"])
+        parser.add_argument(
+            "--interfaces", nargs="+", choices=["asgi", "wsgi"], default=["asgi"],
+            help="wsgi always runs the sync views",
+        )
+        parser.add_argument("--routes", nargs="+", choices=list(GET_ROUTES), default=["home_page", "view_list"])
+        self.add_baseline_arguments(parser)
+
+    def handle(self, *args, **options):
+        if importlib.util.find_spec("uvicorn") is None:
+            raise CommandError("uvicorn is needed to run the load test: pip install uvicorn")
+        self.validate_baseline_options(options)
+
+        runs = {}
+        with tempfile.TemporaryDirectory() as directory:
+            env = {**os.environ, "SUPERLISTS_DB_NAME": os.path.join(directory, "loadtest.sqlite3")}
+            manage("migrate", "--verbosity", "0", env=env)
+            list_ids = manage("seed_lists", *self.seed_arguments(options), env=env).split()
+            sample = list_ids[:: max(1, len(list_ids) // 100)]
+
+            for interface in options["interfaces"]:
+                modes = ["sync"] if interface == "wsgi" else options["modes"]
+                for mode in modes:
+                    server_env = {
+                        **env,
+                        "LISTS_ASYNC_VIEWS": "1" if mode == "async" else "0",
+                        # queries per request are read back from /metrics
+                        "LISTS_INSTRUMENTATION": "1",
+                    }
+                    with serve(interface, server_env, free_port()) as server:
+                        for concurrency in options["concurrency"]:
+                            for route in options["routes"]:
+                                run = f"{interface}/{mode} concurrency={concurrency} {route}"
+                                runs[run] = self.load_route(server, route, sample, concurrency, options)
+                                self.write_run(run, runs[run])
+        self.check_baseline(runs, options)
+
+    @staticmethod
+    def seed_arguments(options):
+        if options["total_items"] is None:
+            return ["--items", str(options["items"])]
+        return [
+            "--total-items", str(options["total_items"]),
+            "--distribution", options["distribution"],
+            "--items", str(options["items"]),
+        ]
+
+    @staticmethod
+    def load_route(server, route, list_ids, concurrency, options):
+        view, path = GET_ROUTES[route]
+        paths = [path.format(list_id) for list_id in list_ids]
+        before = query_totals(server.address).get(view, (0, 0))
+        results = run_load(server.address, paths, concurrency, options["requests_per_client"])
+        after = query_totals(server.address).get(view, (0, 0))
+        requests = after[1] - before[1]
+        results["queries"] = (after[0] - before[0]) / requests if requests else None
+        results["peak_mib"] = server.peak_memory_mib()
+        return results
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lists.models import List
+from lists.sharding import DEFAULT_MOVE_BATCH_SIZE, move_list, placement, previous_shard_aliases, shard_aliases
+
+
+class Command(BaseCommand):
+    help = "Moves every list that is not on the shard LISTS_SHARDS places it on, while the site keeps serving."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_MOVE_BATCH_SIZE, help="items copied per INSERT")
+        parser.add_argument("--dry-run", action="store_true", help="report the lists to move without moving them")
+
+    def handle(self, *args, **options):
+        aliases = shard_aliases()
+        if not aliases:
+            raise CommandError("lists are not sharded, set SUPERLISTS_DB_SHARDS")
+        moved_lists = moved_items = 0
+        start = time.perf_counter()
+        # the old layout first, a list is only ever moved towards its new shard
+        for source in dict.fromkeys([*previous_shard_aliases(), *aliases]):
+            for list_id in self.list_ids(source):
+                target = placement(list_id, aliases)
+                if target == source:
+                    continue
+                if options["dry_run"]:
+                    self.stdout.write(f"list {list_id}: {source} -> {target}")
+                    moved_lists += 1
+                    continue
+                items = move_list(list_id, source, target, options["batch_size"])
+                if items is not None:
+                    self.stdout.write(f"list {list_id}: {source} -> {target}, {items} items")
+                    moved_lists += 1
+                    moved_items += items
+        seconds = time.perf_counter() - start
+        action = "would move" if options["dry_run"] else "moved"
+        self.stdout.write(
+            f"{action} {moved_lists} lists, {moved_items} items in {seconds:.2f}s "
+            f"({moved_items / max(seconds, 1e-9):.0f} items/s)"
+        )
+
+    @staticmethod
+    def list_ids(using, chunk_size=1000):
+        """Ids of the lists on ``using``, read a chunk at a time as lists move away."""
+        last_id = 0
+        while True:
+            ids = list(
+                List.objects.using(using).filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:chunk_size]
+            )
+            if not ids:
+                return
+            yield from ids
+            last_id = ids[-1]
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from lists.datasets import DISTRIBUTIONS, list_sizes, seed_lists
+
+
+class Command(BaseCommand):
+    help = "Creates lists filled with synthetic items and prints their ids."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lists", type=int, default=1, help="number of lists to create")
+        parser.add_argument("--items", type=int, default=100, help="number of items in every list")
+        parser.add_argument(
+            "--total-items", type=int,
+            help="spread this many items over as many lists as --distribution needs, instead of --lists",
+        )
+        parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="uniform", help="list sizes for --total-items")
+        parser.add_argument("--seed", type=int, default=0, help="random seed for --distribution long_tail")
+        parser.add_argument("--batch-size", type=int, default=5000, help="items written per INSERT")
+
+    def handle(self, *args, **options):
+        if options["total_items"] is None:
+            sizes = [options["items"]] * options["lists"]
+        else:
+            sizes = list_sizes(options["total_items"], options["distribution"], options["items"], options["seed"])
+        for list_id in seed_lists(sizes, options["batch_size"]):
+            self.stdout.write(str(list_id))
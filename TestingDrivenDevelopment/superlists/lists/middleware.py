@@ -0,0 +1,280 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.urls import Resolver404, resolve
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .compression import (
+    COMPRESSIBLE_TYPES,
+    BrotliStream,
+    GzipStream,
+    accepted_encodings,
+    acompress_chunks,
+    brotli,
+    compress_chunks,
+    compress_content,
+)
+from .instrumentation import RequestMetrics, current_metrics, install_query_recorder, recording_into, registry
+from .routers import (
+    reading_from_primary,
+    replica_aliases,
+    stick_to_primary,
+    sticky_until,
+    stream_within,
+    use_primary,
+)
+from .sharding import shard_aliases, shard_for, use_shard
+
+
+class InstrumentationMiddleware:
+    """Times every request per resolved view and reports it in ``Server-Timing``.
+
+    A streamed body is produced after the view returned, so its queries and
+    renders are counted as each chunk is read and the histograms recorded
+    once the stream ends; ``Server-Timing`` only covers the view itself.
+    Removed from the stack at startup unless ``LISTS_INSTRUMENTATION`` is on,
+    so it costs nothing when disabled.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "LISTS_INSTRUMENTATION", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        connection_created.connect(install_query_recorder, dispatch_uid="lists_install_query_recorder")
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        install_query_recorder(connection)
+        metrics, token, start = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics, token, start = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    def start(self):
+        metrics = RequestMetrics()
+        return metrics, current_metrics.set(metrics), time.perf_counter()
+
+    def finish(self, request, response, metrics, start):
+        seconds = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.url_name if match and match.url_name else "unresolved"
+        if response.streaming:
+            stream_within(response, lambda: recording_into(metrics))
+            if response.is_async:
+                response.streaming_content = self.aobserved_chunks(response.streaming_content, view, metrics, start)
+            else:
+                response.streaming_content = self.observed_chunks(response.streaming_content, view, metrics, start)
+        else:
+            self.observe(view, metrics, seconds, len(response.content))
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={metrics.query_seconds * 1000:.2f};desc="{metrics.queries} queries"',
+            f"render;dur={metrics.render_seconds * 1000:.2f}",
+            f"total;dur={seconds * 1000:.2f}",
+        ])
+        return response
+
+    @staticmethod
+    def observe(view, metrics, seconds, size):
+        registry.observe("lists_request_duration_seconds", view, seconds)
+        registry.observe("lists_db_queries", view, metrics.queries)
+        registry.observe("lists_db_duration_seconds", view, metrics.query_seconds)
+        registry.observe("lists_response_bytes", view, size)
+
+    def observed_chunks(self, chunks, view, metrics, start):
+        size = 0
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+        finally:
+            # also when the client went away mid-stream
+            self.observe(view, metrics, time.perf_counter() - start, size)
+
+    async def aobserved_chunks(self, chunks, view, metrics, start):
+        size = 0
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+        finally:
+            self.observe(view, metrics, time.perf_counter() - start, size)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compresses text responses with brotli or gzip, streamed ones chunk by chunk.
+
+    Only enabled with ``LISTS_COMPRESSION``. Compressing a page that also
+    reflects request input next to a secret invites BREACH, so responses that
+    used the CSRF token are never sent as brotli but as gzip with a random
+    length header, on top of Django masking the token differently per
+    response. Responses without the token may use brotli.
+    """
+
+    min_length = 200
+
+    def __init__(self, get_response):
+        if not getattr(settings, "LISTS_COMPRESSION", False):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        content_type = response.get("Content-Type", "").split(";")[0].strip()
+        if content_type not in COMPRESSIBLE_TYPES or response.has_header("Content-Encoding"):
+            return response
+        if not response.streaming and len(response.content) < self.min_length:
+            return response
+
+        patch_vary_headers(response, ["Accept-Encoding"])
+        stream = self.choose_stream(request, response)
+        if stream is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_chunks(response.streaming_content, stream)
+            else:
+                response.streaming_content = compress_chunks(response.streaming_content, stream)
+            del response.headers["Content-Length"]
+        else:
+            compressed = compress_content(response.content, stream)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # a strong ETag would promise byte-identical identity and compressed bodies
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = stream.encoding
+        return response
+
+    @staticmethod
+    def choose_stream(request, response):
+        accepted = accepted_encodings(request)
+        # CsrfViewMiddleware sets the cookie on every response that used the token
+        carries_csrf_token = settings.CSRF_COOKIE_NAME in response.cookies
+        if "br" in accepted and brotli is not None and not carries_csrf_token:
+            return BrotliStream()
+        if "gzip" in accepted:
+            return GzipStream(max_random_bytes=100 if carries_csrf_token else 0)
+        return None
+
+
+class ReplicaStickinessMiddleware:
+    """Reads from the primary for a client that wrote within ``LISTS_REPLICA_STICKY_SECONDS``.
+
+    A successful unsafe request sets a cookie pinning the client to the
+    primary, so the redirect after ``new_list`` or ``add_item`` sees the new
+    item even while the replicas lag. Removed from the stack at startup
+    unless ``LISTS_REPLICA_ALIASES`` names replicas.
+    """
+
+    sync_capable = True
+    async_capable = True
+    safe_methods = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+    def __init__(self, get_response):
+        if not replica_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        pinned = self.pinned(request)
+        token = reading_from_primary.set(pinned)
+        try:
+            response = self.get_response(request)
+        finally:
+            reading_from_primary.reset(token)
+        return self.finish(request, response, pinned)
+
+    async def __acall__(self, request):
+        pinned = self.pinned(request)
+        token = reading_from_primary.set(pinned)
+        try:
+            response = await self.get_response(request)
+        finally:
+            reading_from_primary.reset(token)
+        return self.finish(request, response, pinned)
+
+    def pinned(self, request):
+        return request.method not in self.safe_methods or sticky_until(request) > time.time()
+
+    def finish(self, request, response, pinned):
+        if request.method not in self.safe_methods and response.status_code < 400:
+            stick_to_primary(response)
+        if pinned:
+            stream_within(response, use_primary)
+        return response
+
+
+class ShardMiddleware:
+    """Sends the queries of a ``/lists/<list_id>/...`` request to the shard holding that list.
+
+    Removed from the stack at startup unless ``LISTS_SHARDS`` is set.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not shard_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        alias = self.shard(request)
+        if alias is None:
+            return self.get_response(request)
+        with use_shard(alias):
+            response = self.get_response(request)
+        return self.finish(response, alias)
+
+    async def __acall__(self, request):
+        alias = self.shard(request)
+        if alias is None:
+            return await self.get_response(request)
+        with use_shard(alias):
+            response = await self.get_response(request)
+        return self.finish(response, alias)
+
+    @staticmethod
+    def shard(request):
+        try:
+            list_id = resolve(request.path_info).kwargs.get("list_id")
+        except Resolver404:
+            return None
+        return None if list_id is None else shard_for(list_id)
+
+    @staticmethod
+    def finish(response, alias):
+        return stream_within(response, lambda: use_shard(alias))
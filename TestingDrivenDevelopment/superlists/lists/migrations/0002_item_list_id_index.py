@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='item',
+            options={'ordering': ['id']},
+        ),
+        migrations.AlterField(
+            model_name='item',
+            name='list',
+            field=models.ForeignKey(db_index=False, default=None, on_delete=django.db.models.deletion.CASCADE, to='lists.list'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['list', 'id'], name='lists_item_list_id_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:27
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0002_item_list_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0003_list_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='last_item_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
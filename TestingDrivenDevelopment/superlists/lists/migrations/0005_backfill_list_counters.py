@@ -0,0 +1,44 @@
+from django.db import migrations
+from django.db.models import Count, Max
+
+BATCH_SIZE = 1000
+
+
+def backfill_list_counters(apps, schema_editor):
+    """Set ``item_count`` / ``last_item_id`` of the lists that have items.
+
+    Self-contained on the historical models rather than lists.counters, which
+    follows the current ones; lists without items keep the field defaults.
+    """
+    List = apps.get_model("lists", "List")
+    Item = apps.get_model("lists", "Item")
+    using = schema_editor.connection.alias
+    last_id = 0
+    while True:
+        ids = list(
+            List.objects.using(using).filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:BATCH_SIZE]
+        )
+        if not ids:
+            return
+        first_id, last_id = ids[0], ids[-1]
+        counters = (
+            Item.objects.using(using).filter(list_id__gte=first_id, list_id__lte=last_id)
+            .order_by()
+            .values("list_id")
+            .annotate(count=Count("id"), last_id=Max("id"))
+        )
+        for row in counters:
+            List.objects.using(using).filter(id=row["list_id"]).update(
+                item_count=row["count"], last_item_id=row["last_id"]
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0004_list_item_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_list_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from lists.search import create_fts_index, drop_fts_index
+
+
+def create_index(apps, schema_editor):
+    create_fts_index(schema_editor)
+
+
+def drop_index(apps, schema_editor):
+    drop_fts_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0005_backfill_list_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0006_item_fts_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListIdSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('next_id', models.BigIntegerField()),
+            ],
+        ),
+    ]
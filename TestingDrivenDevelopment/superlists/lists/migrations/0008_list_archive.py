@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0007_list_id_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListArchive',
+            fields=[
+                ('list', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='lists.list')),
+                ('items', models.BinaryField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='archived',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='rehydrated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
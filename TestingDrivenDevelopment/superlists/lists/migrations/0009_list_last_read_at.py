@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0008_list_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='last_read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
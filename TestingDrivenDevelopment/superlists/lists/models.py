@@ -1,11 +1,144 @@
-from django.db import models
+from asgiref.sync import sync_to_async
+from django.db import connections, models, router, transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from . import sharding
 
 
 # Create your models here.
 class List(models.Model):
-    pass
+    # moved forward on every item write, used as the page validator
+    updated_at = models.DateTimeField(default=timezone.now)
+    # kept in step with the list's items by the class methods below
+    item_count = models.PositiveIntegerField(default=0)
+    last_item_id = models.BigIntegerField(null=True, blank=True)
+    # a stub while its items are held in a ListArchive, see lists.archive
+    archived = models.BooleanField(default=False)
+    rehydrated_at = models.DateTimeField(null=True, blank=True)
+    # moved forward by page and feed reads, at most once a day, see lists.archive.record_read
+    last_read_at = models.DateTimeField(null=True, blank=True)
+
+    def save(self, *args, **kwargs):
+        if sharding.shard_aliases():
+            kwargs["using"] = self.db_for_write()
+        super().save(*args, **kwargs)
+
+    def db_for_write(self):
+        """The database this list is written to, giving a new list its id first when lists are sharded."""
+        if self.id is None and sharding.shard_aliases():
+            self.id = sharding.list_ids.allocate()
+        return router.db_for_write(List, instance=self)
+
+    @classmethod
+    def on_list(cls, list_id):
+        """``List.objects`` routed to the database holding ``list_id``."""
+        return cls.objects.db_manager(hints={"list_id": list_id})
+
+    @classmethod
+    def touch(cls, list_id):
+        cls.on_list(list_id).filter(id=list_id).update(updated_at=timezone.now())
+
+    @classmethod
+    def record_added_items(cls, list_id, count, last_item_id):
+        """Account for new items in one UPDATE that is safe against concurrent writers."""
+        cls.on_list(list_id).filter(id=list_id).update(
+            item_count=F("item_count") + count,
+            last_item_id=Greatest(Coalesce("last_item_id", 0), last_item_id),
+            updated_at=timezone.now(),
+        )
+
+    @classmethod
+    def record_removed_items(cls, list_id, count):
+        newest = Item.objects.filter(list_id=OuterRef("id")).order_by("-id").values("id")[:1]
+        cls.on_list(list_id).filter(id=list_id).update(
+            item_count=F("item_count") - count,
+            last_item_id=Subquery(newest),
+            updated_at=timezone.now(),
+        )
+
+
+class ListIdSequence(models.Model):
+    """The next list id to hand out when lists are sharded, see lists.sharding."""
+    next_id = models.BigIntegerField()
+
+
+class ListArchive(models.Model):
+    """The items of an archived list as one compressed blob, see lists.archive."""
+    list = models.OneToOneField(List, primary_key=True, on_delete=models.CASCADE)
+    items = models.BinaryField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+
+class ItemManager(models.Manager):
+    def add_to_list(self, list_id, text):
+        """Insert an item into an existing list without loading the list first.
+
+        The list's existence is checked by the INSERT ... SELECT itself, raises
+        ``List.DoesNotExist`` when no row was written. An archived list is
+        rehydrated before its new item goes in.
+        """
+        # Manager.db is the read database, this is a write
+        using = self._db or router.db_for_write(self.model, list_id=list_id, **self._hints)
+        try:
+            return self._add_to_list(using, list_id, text)
+        except List.DoesNotExist:
+            # mid-rebalance the list may have moved on while this waited for its old shard
+            if self._db or not sharding.previous_shard_aliases():
+                raise
+            moved_to = router.db_for_write(self.model, list_id=list_id, **self._hints)
+            if moved_to == using:
+                raise
+            return self._add_to_list(moved_to, list_id, text)
+
+    def _add_to_list(self, using, list_id, text):
+        from .archive import rehydrate_list
+        try:
+            return self._insert_into_list(using, list_id, text)
+        except List.DoesNotExist:
+            # the INSERT skips archived lists, so only a missing or archived list pays for the check
+            if not rehydrate_list(list_id, using):
+                raise
+        return self._insert_into_list(using, list_id, text)
+
+    def _insert_into_list(self, using, list_id, text):
+        connection = connections[using]
+        quote_name = connection.ops.quote_name
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {quote_name(self.model._meta.db_table)} ({quote_name('text')}, {quote_name('list_id')}) "
+                f"SELECT %s, {quote_name('id')} FROM {quote_name(List._meta.db_table)} "
+                f"WHERE {quote_name('id')} = %s AND {quote_name('archived')} = %s",
+                [text, list_id, False],
+            )
+            if cursor.rowcount == 0:
+                raise List.DoesNotExist(f"List matching id {list_id} does not exist.")
+            item = self.model(id=cursor.lastrowid, text=text, list_id=list_id)
+            item._state.adding = False
+            item._state.db = using
+            post_save.send(sender=self.model, instance=item, created=True, raw=False, using=using, update_fields=None)
+        return item
+
+    async def aadd_to_list(self, list_id, text):
+        return await sync_to_async(self.add_to_list)(list_id, text)
 
 
 class Item(models.Model):
     text = models.TextField(default="")
-    list = models.ForeignKey(List, default=None, on_delete=models.CASCADE)
+    # covered by the (list, id) index below
+    list = models.ForeignKey(List, default=None, on_delete=models.CASCADE, db_index=False)
+
+    objects = ItemManager()
+
+    def save(self, *args, **kwargs):
+        if sharding.shard_aliases():
+            kwargs["using"] = router.db_for_write(Item, instance=self)
+        super().save(*args, **kwargs)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["list", "id"], name="lists_item_list_id_idx"),
+        ]
@@ -0,0 +1,117 @@
+from django.conf import settings
+from django.core.exceptions import BadRequest
+
+from .models import Item
+
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_MAX_PAGE_SIZE = 1000
+# request parameters asking for a page other than the first, or a streamed one
+CURSOR_PARAMS = {"after", "before", "number", "stream"}
+
+
+class ItemPage:
+    """One keyset page of a list's items, numbered from ``start``."""
+
+    def __init__(self, items, start, has_previous, has_next, size):
+        self.items = items
+        self.size = size
+        self.start = start
+        self.has_previous = has_previous
+        self.has_next = has_next
+
+    @property
+    def numbered_items(self):
+        return [(number, item) for number, item in enumerate(self.items, start=self.start)]
+
+    @property
+    def end(self):
+        return self.start + len(self.items) - 1
+
+    @property
+    def first_id(self):
+        return self.items[0].id if self.items else None
+
+    @property
+    def last_id(self):
+        return self.items[-1].id if self.items else None
+
+    @property
+    def is_paginated(self):
+        return self.has_previous or self.has_next
+
+
+def get_page_size(params):
+    page_size = getattr(settings, "LISTS_PAGE_SIZE", DEFAULT_PAGE_SIZE)
+    max_page_size = getattr(settings, "LISTS_MAX_PAGE_SIZE", DEFAULT_MAX_PAGE_SIZE)
+    page_size = _int_param(params, "page_size", page_size)
+    return min(max(page_size, 1), max_page_size)
+
+
+def page_cache_key(params):
+    cursor = [params.get(name, "") for name in ("after", "before", "number")]
+    return ":".join([*cursor, str(get_page_size(params))])
+
+
+def get_item_page(to_do_list, params, page_size=None, rows=None):
+    """Seek to the page described by ``params`` without an OFFSET scan.
+
+    ``after`` / ``before`` hold the id of the item bordering the requested page
+    and ``number`` its position in the list, which keeps numbering continuous
+    across pages. Without ``number`` the position is counted once. ``rows``
+    are the page's items plus one when they were already read.
+    """
+    query = PageQuery(to_do_list, params, page_size)
+    number = query.number if query.number is not None else query.preceding.count() + query.border_offset
+    return query.build_page(list(query.rows) if rows is None else rows, number)
+
+
+async def aget_item_page(to_do_list, params, page_size=None):
+    query = PageQuery(to_do_list, params, page_size)
+    number = query.number if query.number is not None else await query.preceding.acount() + query.border_offset
+    return query.build_page([item async for item in query.rows], number)
+
+
+class PageQuery:
+    """The querysets behind one keyset page, shared by the sync and async paths."""
+
+    def __init__(self, to_do_list, params, page_size=None):
+        self.page_size = page_size or get_page_size(params)
+        items = Item.objects.filter(list=to_do_list)
+        after = _int_param(params, "after")
+        before = _int_param(params, "before")
+        self.number = _int_param(params, "number")
+        self.backwards = before is not None
+        # items up to the bordering one, counted only when the cursor has no number
+        self.preceding = None
+        self.border_offset = 0
+
+        if self.backwards:
+            self.preceding = items.filter(id__lt=before)
+            self.border_offset = 1
+            self.rows = items.filter(id__lt=before).order_by("-id")[:self.page_size + 1]
+        elif after is not None:
+            self.preceding = items.filter(id__lte=after)
+            self.rows = items.filter(id__gt=after).order_by("id")[:self.page_size + 1]
+        else:
+            self.number = 0
+            self.rows = items.order_by("id")[:self.page_size + 1]
+
+    def build_page(self, rows, number):
+        page_size = self.page_size
+        if self.backwards:
+            page = rows[:page_size][::-1]
+            return ItemPage(page, number - len(page), len(rows) > page_size, has_next=True, size=page_size)
+        start = number + 1
+        return ItemPage(
+            rows[:page_size], start, has_previous=start > 1, has_next=len(rows) > page_size, size=page_size
+        )
+
+
+def _int_param(params, name, default=None):
+    value = params.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer")
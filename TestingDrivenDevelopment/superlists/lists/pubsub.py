@@ -0,0 +1,138 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Item
+
+DEFAULT_BACKEND = "lists.pubsub.LocalPubSub"
+
+
+class LocalPubSub:
+    """Delivers new items to subscribers living in this process.
+
+    Subscribers are asyncio queues bound to their event loop, publishers may
+    run in any thread.
+    """
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, list_id, items):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(list_id, ()))
+        for subscription in subscriptions:
+            subscription.deliver(items)
+
+    def subscribe(self, list_id, after):
+        return LocalSubscription(self, list_id, after)
+
+    def _add(self, subscription):
+        with self._lock:
+            self._subscriptions[subscription.list_id].add(subscription)
+
+    def _remove(self, subscription):
+        with self._lock:
+            self._subscriptions[subscription.list_id].discard(subscription)
+            if not self._subscriptions[subscription.list_id]:
+                del self._subscriptions[subscription.list_id]
+
+
+class LocalSubscription:
+    def __init__(self, broker, list_id, after):
+        self.broker = broker
+        self.list_id = list_id
+        self.last_id = after
+        self._queue = None
+        self._loop = None
+        self._pending = []
+
+    async def __aenter__(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self.broker._add(self)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.broker._remove(self)
+
+    def deliver(self, items):
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, items)
+
+    async def get(self):
+        """Wait for the next ``(id, text)`` newer than everything seen so far."""
+        while True:
+            item_id, text = await self._next()
+            if item_id > self.last_id:
+                self.last_id = item_id
+                return item_id, text
+
+    async def _next(self):
+        if not self._pending:
+            self._pending = list(await self._queue.get())
+        return self._pending.pop(0)
+
+
+class PollingPubSub:
+    """Finds new items by polling the database, so it works across workers without a broker."""
+
+    interval = 0.5
+
+    def publish(self, list_id, items):
+        pass
+
+    def subscribe(self, list_id, after):
+        return PollingSubscription(list_id, after, self.interval)
+
+
+class PollingSubscription:
+    def __init__(self, list_id, after, interval):
+        self.list_id = list_id
+        self.last_id = after
+        self.interval = interval
+        self._pending = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def get(self):
+        while not self._pending:
+            newer = Item.objects.filter(list_id=self.list_id, id__gt=self.last_id).values_list("id", "text")
+            self._pending = [row async for row in newer[:100]]
+            if not self._pending:
+                await asyncio.sleep(self.interval)
+        item_id, text = self._pending.pop(0)
+        self.last_id = item_id
+        return item_id, text
+
+
+def server_sent_events():
+    """Whether /events pushes a stream, which only an ASGI server can hold open.
+
+    Under WSGI the page polls /events instead, see
+    ``lists.views.list_events``.
+    """
+    return getattr(settings, "LISTS_ASYNC_VIEWS", False)
+
+
+_pubsub = None
+
+
+def get_pubsub():
+    global _pubsub
+    if _pubsub is None:
+        _pubsub = import_string(getattr(settings, "LISTS_PUBSUB_BACKEND", DEFAULT_BACKEND))()
+    return _pubsub
+
+
+def publish_items(list_id, items, using=None):
+    """Announce ``items`` of ``list_id`` to live subscribers once the write to ``using`` commits."""
+    rows = [(item.id, item.text) for item in items]
+    transaction.on_commit(lambda: get_pubsub().publish(list_id, rows), using=using)
@@ -0,0 +1,117 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+DEFAULT_PRIMARY_ALIAS = "default"
+DEFAULT_STICKY_SECONDS = 5
+STICKY_COOKIE = "lists_primary_until"
+ROUTED_APPS = {"lists"}
+
+reading_from_primary = ContextVar("lists_reading_from_primary", default=False)
+
+
+def primary_alias():
+    return getattr(settings, "LISTS_PRIMARY_ALIAS", DEFAULT_PRIMARY_ALIAS)
+
+
+def replica_aliases():
+    return getattr(settings, "LISTS_REPLICA_ALIASES", [])
+
+
+@contextmanager
+def use_primary():
+    """Read lists and items from the primary within the block."""
+    token = reading_from_primary.set(True)
+    try:
+        yield
+    finally:
+        reading_from_primary.reset(token)
+
+
+def chunks_within(chunks, context):
+    """Iterate ``chunks`` from a streamed response inside ``context()``.
+
+    Streamed bodies are read after the middleware setting up the request
+    returned, so each chunk is produced inside a fresh context.
+    """
+    chunks = iter(chunks)
+    while True:
+        with context():
+            chunk = next(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+async def achunks_within(chunks, context):
+    chunks = aiter(chunks)
+    while True:
+        with context():
+            chunk = await anext(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def stream_within(response, context):
+    """Have the body of ``response``, when streamed, produced inside ``context()``."""
+    if response.streaming:
+        if response.is_async:
+            response.streaming_content = achunks_within(response.streaming_content, context)
+        else:
+            response.streaming_content = chunks_within(response.streaming_content, context)
+    return response
+
+
+class ReplicaRouter:
+    """Sends reads of lists and items to a random replica and writes to the primary.
+
+    Replicas come from ``LISTS_REPLICA_ALIASES`` and trail the primary, so
+    code that has to see its own writes reads inside ``use_primary()``;
+    ``ReplicaStickinessMiddleware`` does that for requests from clients that
+    wrote recently. Without replicas every read goes to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in ROUTED_APPS:
+            return None
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        replicas = replica_aliases()
+        if not replicas or reading_from_primary.get():
+            return primary_alias()
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in ROUTED_APPS:
+            return None
+        return primary_alias()
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {primary_alias(), *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # replicas get their schema from the primary along with the data
+        if db in replica_aliases():
+            return False
+        return None
+
+
+def sticky_until(request):
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0))
+    except ValueError:
+        return 0
+
+
+def stick_to_primary(response):
+    """Have the client read from the primary until the replicas caught up with its write."""
+    seconds = getattr(settings, "LISTS_REPLICA_STICKY_SECONDS", DEFAULT_STICKY_SECONDS)
+    response.set_cookie(STICKY_COOKIE, f"{time.time() + seconds:.3f}", max_age=seconds, httponly=True, samesite="Lax")
@@ -0,0 +1,135 @@
+from django.conf import settings
+from django.db import DatabaseError, connections, router
+from django.db.migrations.loader import MigrationLoader
+
+from .models import Item
+from .sharding import shard_aliases
+
+FTS_TABLE = "lists_item_fts"
+DEFAULT_RESULTS_PER_PAGE = 20
+
+# external content table over lists_item.text, kept current by triggers
+CREATE_FTS_SQL = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(text, content='lists_item', content_rowid='id')",
+    f"""CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON lists_item BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON lists_item BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF text ON lists_item BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+DROP_FTS_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+# whether the database behind each alias has the index, looked up once per alias
+_fts_index = {}
+
+
+def fts5_available(db_connection):
+    if db_connection.vendor != "sqlite":
+        return False
+    with db_connection.cursor() as cursor:
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.lists_fts5_probe USING fts5(text)")
+        except DatabaseError:
+            return False
+        cursor.execute("DROP TABLE temp.lists_fts5_probe")
+    return True
+
+
+def create_fts_index(schema_editor):
+    """Create the FTS5 index and its triggers, skipped on SQLite builds without FTS5.
+
+    SQLite drops triggers whenever Django rebuilds ``lists_item``, so
+    migrations altering Item must call this again afterwards.
+    """
+    _fts_index.pop(schema_editor.connection.alias, None)
+    if not fts5_available(schema_editor.connection):
+        return
+    for statement in DROP_FTS_SQL + CREATE_FTS_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_fts_index(schema_editor):
+    _fts_index.pop(schema_editor.connection.alias, None)
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in DROP_FTS_SQL:
+            schema_editor.execute(statement)
+
+
+def create_unmigrated_fts_index(app_config, using, **kwargs):
+    """``post_migrate`` handler adding the FTS5 index when ``lists`` is set up without migrations.
+
+    The test profile builds the schema from the models, which skips the
+    RunPython migration that normally creates the index.
+    """
+    if MigrationLoader.migrations_module(app_config.label)[0] is not None:
+        return
+    with connections[using].schema_editor() as schema_editor:
+        create_fts_index(schema_editor)
+
+
+def has_fts_index(using=None):
+    """Whether the database Items are read from, or ``using``, has the FTS5 index."""
+    using = using or router.db_for_read(Item)
+    if using not in _fts_index:
+        db_connection = connections[using]
+        if db_connection.vendor != "sqlite":
+            _fts_index[using] = False
+        else:
+            with db_connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+                _fts_index[using] = cursor.fetchone() is not None
+    return _fts_index[using]
+
+
+def match_expression(query):
+    """Turn free text into an FTS5 query matching every word, with operators disabled."""
+    terms = query.split()
+    return " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def matching_items(using, query, limit, offset=0):
+    """Items on ``using`` matching ``query``, ranked by the index when the
+    database has one and newest first otherwise."""
+    # the index is checked on the database the search then reads
+    if has_fts_index(using):
+        return list(Item.objects.using(using).raw(
+            f"SELECT lists_item.id, lists_item.list_id, lists_item.text, bm25({FTS_TABLE}) AS rank FROM {FTS_TABLE} "
+            f"JOIN lists_item ON lists_item.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s ORDER BY rank LIMIT %s OFFSET %s",
+            [match_expression(query), limit, offset],
+        ))
+    return list(Item.objects.using(using).filter(text__icontains=query.strip()).order_by("-id")[offset:offset + limit])
+
+
+def search_items(query, page=1, per_page=None):
+    """Return one page of items matching ``query``, best matches first, and
+    whether another page follows.
+
+    Falls back to a ``text__icontains`` scan, newest first, when the database
+    has no FTS5 index. Sharded lists are searched on every shard and the
+    matches merged, so each shard reads all pages up to the requested one.
+    """
+    per_page = per_page or getattr(settings, "LISTS_SEARCH_RESULTS_PER_PAGE", DEFAULT_RESULTS_PER_PAGE)
+    offset = (page - 1) * per_page
+    if not query.split():
+        return [], False
+    shards = shard_aliases()
+    if not shards:
+        items = matching_items(router.db_for_read(Item), query, per_page + 1, offset)
+        return items[:per_page], len(items) > per_page
+    items = [item for using in shards for item in matching_items(using, query, offset + per_page + 1)]
+    # bm25 scores are negative, unranked matches from shards without the index go last
+    items.sort(key=lambda item: (getattr(item, "rank", 0), -item.id))
+    items = items[offset:offset + per_page + 1]
+    return items[:per_page], len(items) > per_page
@@ -0,0 +1,274 @@
+import threading
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Max
+
+DEFAULT_DIRECTORY_ALIAS = "default"
+DEFAULT_ID_BLOCK_SIZE = 100
+DEFAULT_MOVE_BATCH_SIZE = 5000
+# items written on the n-th shard get ids from n * ITEM_ID_SPAN on
+ITEM_ID_SPAN = 1 << 48
+
+current_shard = ContextVar("lists_current_shard", default=None)
+
+
+def shard_aliases():
+    return getattr(settings, "LISTS_SHARDS", [])
+
+
+def previous_shard_aliases():
+    return getattr(settings, "LISTS_PREVIOUS_SHARDS", [])
+
+
+def directory_alias():
+    return getattr(settings, "LISTS_SHARD_DIRECTORY", DEFAULT_DIRECTORY_ALIAS)
+
+
+def placement(list_id, aliases):
+    """The alias of ``aliases`` a list belongs on, from a hash of its id."""
+    return aliases[zlib.crc32(str(list_id).encode()) % len(aliases)]
+
+
+def shard_for(list_id):
+    """The alias holding ``list_id``.
+
+    While lists are rebalanced, ``LISTS_PREVIOUS_SHARDS`` holds the layout
+    before the change and a list whose placement changed is looked for on
+    its new shard first, then read from its old one.
+    """
+    target = placement(list_id, shard_aliases())
+    previous = previous_shard_aliases()
+    if not previous:
+        return target
+    source = placement(list_id, previous)
+    if source == target:
+        return target
+    from .models import List
+    return target if List.objects.using(target).filter(id=list_id).exists() else source
+
+
+@contextmanager
+def use_shard(alias):
+    """Send list and item queries without a list of their own to ``alias`` within the block."""
+    token = current_shard.set(alias)
+    try:
+        yield
+    finally:
+        current_shard.reset(token)
+
+
+def on_list(list_id):
+    return use_shard(shard_for(list_id))
+
+
+class ListIdAllocator:
+    """Hands out list ids unique across shards.
+
+    Ids are reserved on the directory database ``LISTS_SHARD_ID_BLOCK_SIZE``
+    at a time, so they grow within a process but interleave by block across
+    processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next = self._end = 0
+
+    def allocate(self):
+        with self._lock:
+            if self._next >= self._end:
+                block_size = getattr(settings, "LISTS_SHARD_ID_BLOCK_SIZE", DEFAULT_ID_BLOCK_SIZE)
+                self._next, self._end = reserve_list_ids(block_size)
+            list_id = self._next
+            self._next += 1
+        return list_id
+
+    def reset(self):
+        with self._lock:
+            self._next = self._end = 0
+
+
+def reserve_list_ids(count):
+    """Return ``(first, end)`` of ``count`` ids no other process will hand out."""
+    from .models import List, ListIdSequence
+    using = directory_alias()
+    sequence = ListIdSequence.objects.using(using).filter(id=1)
+    # the UPDATE takes the write lock, so the first reservation is made once
+    with transaction.atomic(using=using):
+        if sequence.update(next_id=F("next_id") + count):
+            end = sequence.values_list("next_id", flat=True).get()
+            return end - count, end
+        aliases = dict.fromkeys([*previous_shard_aliases(), *shard_aliases()])
+        highest = [List.objects.using(alias).aggregate(Max("id"))["id__max"] or 0 for alias in aliases]
+        first = max(highest, default=0) + 1
+        ListIdSequence.objects.using(using).create(id=1, next_id=first + count)
+    return first, first + count
+
+
+list_ids = ListIdAllocator()
+
+
+def reserve_item_ids(using):
+    """Move the SQLite item id sequence of a shard to its own ``ITEM_ID_SPAN`` range."""
+    from .models import Item
+    aliases = shard_aliases()
+    if using not in aliases or connections[using].vendor != "sqlite":
+        return
+    floor = aliases.index(using) * ITEM_ID_SPAN
+    table = Item._meta.db_table
+    with connections[using].cursor() as cursor:
+        cursor.execute("UPDATE sqlite_sequence SET seq = %s WHERE name = %s AND seq < %s", [floor, table, floor])
+        cursor.execute(
+            "INSERT INTO sqlite_sequence (name, seq) SELECT %s, %s "
+            "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = %s)",
+            [table, floor, table],
+        )
+
+
+def reserve_migrated_item_ids(app_config, using, **kwargs):
+    """``post_migrate`` handler, ``migrate --database <shard>`` prepares a new shard."""
+    reserve_item_ids(using)
+
+
+class ShardRouter:
+    """Keeps every list and its items on the shard ``LISTS_SHARDS`` places its id on.
+
+    The shard comes from the list or item a query is about, a ``list_id``
+    hint, or ``current_shard``, which ``ShardMiddleware`` sets for
+    ``/lists/<list_id>/`` requests. Anything else about lists goes to the
+    directory database, which also holds the list id sequence. Returns
+    None while lists are not sharded, leaving them to the next router.
+    """
+
+    def db_for_read(self, model, **hints):
+        return self._db_for_model(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for_model(model, hints)
+
+    def _db_for_model(self, model, hints):
+        if model._meta.app_label != "lists" or not shard_aliases():
+            return None
+        if model._meta.model_name == "listidsequence":
+            return directory_alias()
+        list_id = hints.get("list_id")
+        instance = hints.get("instance")
+        if instance is not None:
+            if instance._state.db:
+                return instance._state.db
+            if model._meta.model_name == "list":
+                # a new list goes where its id places it, even mid-rebalance
+                if instance.id is not None and instance._state.adding:
+                    return placement(instance.id, shard_aliases())
+                list_id = instance.id
+            else:
+                list_id = getattr(instance, "list_id", None)
+        if list_id is not None:
+            return shard_for(list_id)
+        return current_shard.get() or directory_alias()
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not shard_aliases() or {obj1._meta.app_label, obj2._meta.app_label} != {"lists"}:
+            return None
+        return obj1._state.db == obj2._state.db
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if not shard_aliases():
+            return None
+        if model_name == "listidsequence":
+            return db == directory_alias()
+        # the other shards hold lists and items only
+        if db in shard_aliases() and db != directory_alias() and app_label != "lists":
+            return False
+        return None
+
+
+def move_list(list_id, source, target, batch_size=DEFAULT_MOVE_BATCH_SIZE):
+    """Move a list with its items from ``source`` to ``target``, return the number of items moved.
+
+    The source stays write-locked while the list is copied, so an item added
+    meanwhile waits and then goes to the target. Once the target committed
+    routing finds the list there, a copy left on the source by an
+    interrupted move is only deleted. Items keep their ids, like
+    ``rehydrate_list`` keeps them, so the ``since_id`` / ``after`` cursors
+    clients hold stay valid; the ``ITEM_ID_SPAN`` ranges are disjoint and
+    the target's id sequence is put back afterwards. SQLite still numbers
+    new rows past the highest id in the table, so while a list moved to a
+    shard with a lower range is there, that shard's new items follow its
+    ids. Returns None when ``source`` has no such list.
+    """
+    from .archive import rehydrate_list
+    from .models import Item, List
+    moved = 0
+    with transaction.atomic(using=source):
+        # a no-op UPDATE takes the write lock before anything is read
+        if not List.objects.using(source).filter(id=list_id).update(updated_at=F("updated_at")):
+            return None
+        # an archived list moves with its items back in place
+        rehydrate_list(list_id, source)
+        to_do_list = List.objects.using(source).get(id=list_id)
+        with transaction.atomic(using=target):
+            if not List.objects.using(target).filter(id=list_id).exists():
+                List.objects.using(target).bulk_create([
+                    List(
+                        id=list_id,
+                        updated_at=to_do_list.updated_at,
+                        rehydrated_at=to_do_list.rehydrated_at,
+                        last_read_at=to_do_list.last_read_at,
+                    )
+                ])
+                # read after the INSERT above took the target's write lock
+                sequence = _item_sequence(target)
+                items = Item.objects.using(source).filter(list_id=list_id).order_by("id")
+                last_item_id = None
+                batch = []
+                for item_id, text in items.values_list("id", "text").iterator(chunk_size=batch_size):
+                    batch.append(Item(id=item_id, list_id=list_id, text=text))
+                    last_item_id = item_id
+                    if len(batch) == batch_size:
+                        Item.objects.using(target).bulk_create(batch)
+                        moved += len(batch)
+                        batch = []
+                if batch:
+                    Item.objects.using(target).bulk_create(batch)
+                    moved += len(batch)
+                _restore_item_sequence(target, sequence)
+                List.objects.using(target).filter(id=list_id).update(item_count=moved, last_item_id=last_item_id)
+        connection = connections[source]
+        quote_name = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            # raw deletes, the Item delete signals would book them against the moved list
+            for table, column in [(Item._meta.db_table, "list_id"), (List._meta.db_table, "id")]:
+                cursor.execute(f"DELETE FROM {quote_name(table)} WHERE {quote_name(column)} = %s", [list_id])
+    return moved
+
+
+def _item_sequence(using):
+    """The SQLite item id sequence of ``using``, None when it has none yet or is not SQLite."""
+    from .models import Item
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = %s", [Item._meta.db_table])
+        row = cursor.fetchone()
+    return row and row[0]
+
+
+def _restore_item_sequence(using, sequence):
+    """Put back the sequence inserting ids from another shard's range moved forward."""
+    from .models import Item
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    table = Item._meta.db_table
+    with connection.cursor() as cursor:
+        if sequence is None:
+            cursor.execute("DELETE FROM sqlite_sequence WHERE name = %s", [table])
+        else:
+            cursor.execute("UPDATE sqlite_sequence SET seq = %s WHERE name = %s", [sequence, table])
+    if sequence is None:
+        reserve_item_ids(using)
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Item, List
+from .pubsub import publish_items
+
+
+@receiver(post_save, sender=Item)
+def record_saved_item(sender, instance, created, using, **kwargs):
+    if created:
+        List.record_added_items(instance.list_id, 1, instance.id)
+        publish_items(instance.list_id, [instance], using)
+    else:
+        List.touch(instance.list_id)
+
+
+@receiver(post_delete, sender=Item)
+def record_deleted_item(sender, instance, using, **kwargs):
+    List.record_removed_items(instance.list_id, 1)
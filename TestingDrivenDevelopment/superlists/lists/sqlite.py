@@ -0,0 +1,18 @@
+from django.conf import settings
+
+
+def apply_pragmas(cursor, pragmas):
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Apply ``LISTS_SQLITE_PRAGMAS`` to every new SQLite connection.
+
+    Connected to ``connection_created``; with persistent connections this runs
+    once per worker thread rather than once per request.
+    """
+    pragmas = getattr(settings, "LISTS_SQLITE_PRAGMAS", {})
+    if connection.vendor == "sqlite" and pragmas:
+        with connection.cursor() as cursor:
+            apply_pragmas(cursor, pragmas)
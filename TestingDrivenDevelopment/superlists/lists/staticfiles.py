@@ -0,0 +1,80 @@
+import gzip
+import mimetypes
+import posixpath
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404
+from django.utils.cache import patch_vary_headers
+
+from .compression import accepted_encodings, brotli
+
+COMPRESSIBLE = (".css", ".js", ".map", ".svg", ".json", ".txt", ".html")
+# a compressed sibling is only kept when it saves at least this fraction
+MIN_SAVING = 0.05
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def compressors():
+    yield "gzip", ".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield "br", ".br", lambda data: brotli.compress(data, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that also writes ``.gz`` and, with brotli installed, ``.br`` siblings.
+
+    Compression happens once at collectstatic time, ``serve`` only picks the
+    sibling the client accepts.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in {*paths, *self.hashed_files.values()}:
+            if name.endswith(COMPRESSIBLE) and self.exists(name):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as file:
+            data = file.read()
+        for _, suffix, compress in compressors():
+            compressed = compress(data)
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            if len(compressed) <= len(data) * (1 - MIN_SAVING):
+                self._save(name + suffix, ContentFile(compressed))
+
+
+def is_hashed(name):
+    return name in getattr(staticfiles_storage, "hashed_files", {}).values()
+
+
+def serve(request, path):
+    """Serve a collected static file, preferring a pre-compressed sibling.
+
+    Content-hashed names never change and are cached for a year without
+    revalidation, anything else has to be revalidated on every use.
+    """
+    name = posixpath.normpath(path).lstrip("/")
+    if name.startswith("..") or not staticfiles_storage.exists(name):
+        raise Http404(f"{path} not found")
+
+    content_type, _ = mimetypes.guess_type(name)
+    served_name, content_encoding = name, None
+    accepted = accepted_encodings(request)
+    for encoding, suffix, _ in reversed(list(compressors())):
+        if encoding in accepted and staticfiles_storage.exists(name + suffix):
+            served_name, content_encoding = name + suffix, encoding
+            break
+
+    response = FileResponse(
+        staticfiles_storage.open(served_name), content_type=content_type or "application/octet-stream"
+    )
+    if content_encoding:
+        response.headers["Content-Encoding"] = content_encoding
+    if name.endswith(COMPRESSIBLE):
+        patch_vary_headers(response, ["Accept-Encoding"])
+    response.headers["Cache-Control"] = IMMUTABLE if is_hashed(name) else "no-cache"
+    return response
@@ -0,0 +1,154 @@
+import json
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Item
+from .pubsub import server_sent_events
+
+DEFAULT_CHUNK_SIZE = 2000
+ROWS_MARKER = mark_safe("<!-- id_list_table rows -->")
+ROW_TEMPLATE = "        <tr><td>{}. {}</td></tr>\n"
+MINIFIED_ROW_TEMPLATE = "<tr><td>{}. {}</td></tr>\n"
+
+
+def render_rows(numbered_texts):
+    """Build ``id_list_table`` rows in one pass, without per-row template variable lookups."""
+    row = MINIFIED_ROW_TEMPLATE if getattr(settings, "LISTS_MINIFY_HTML", False) else ROW_TEMPLATE
+    return "".join([row.format(number, escape(text)) for number, text in numbered_texts])
+
+
+def get_chunk_size():
+    return getattr(settings, "LISTS_STREAM_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)
+
+
+def stream_list_page(request, to_do_list, chunk_size=None):
+    """Yield ``list.html`` for every item of ``to_do_list`` piece by piece.
+
+    The page around the table is rendered up front, so the CSRF token is
+    issued before the response starts; rows are then read with a server-side
+    cursor and sent ``chunk_size`` at a time.
+    """
+    chunk_size = chunk_size or get_chunk_size()
+    head, tail = _render_around_rows(request, to_do_list)
+    return _stream_rows(head, tail, to_do_list, chunk_size)
+
+
+def astream_list_page(request, to_do_list, chunk_size=None):
+    """Async variant of ``stream_list_page`` for ASGI views.
+
+    A sync iterator would be drained into memory before an ASGI response
+    starts sending, so rows come from ``aiterator()`` instead.
+    """
+    chunk_size = chunk_size or get_chunk_size()
+    head, tail = _render_around_rows(request, to_do_list)
+    return _astream_rows(head, tail, to_do_list, chunk_size)
+
+
+def _render_around_rows(request, to_do_list):
+    table = render_to_string("list_table.html", {"rows_marker": ROWS_MARKER})
+    context = {"to_do_list": to_do_list, "table": mark_safe(table), "server_sent_events": server_sent_events()}
+    return render_to_string("list.html", context, request).split(ROWS_MARKER)
+
+
+def _texts(to_do_list):
+    return Item.objects.filter(list=to_do_list).order_by("id").values_list("text", flat=True)
+
+
+def _stream_rows(head, tail, to_do_list, chunk_size):
+    yield head
+    rows = []
+    for row in enumerate(_texts(to_do_list).iterator(chunk_size=chunk_size), start=1):
+        rows.append(row)
+        if len(rows) == chunk_size:
+            yield render_rows(rows)
+            rows = []
+    if rows:
+        yield render_rows(rows)
+    yield tail
+
+
+async def _astream_rows(head, tail, to_do_list, chunk_size):
+    yield head
+    rows = []
+    number = 0
+    async for text in _texts(to_do_list).aiterator(chunk_size=chunk_size):
+        number += 1
+        rows.append((number, text))
+        if len(rows) == chunk_size:
+            yield render_rows(rows)
+            rows = []
+    if rows:
+        yield render_rows(rows)
+    yield tail
+
+
+def stream_items_json(list_id, since_id=None, chunk_size=None):
+    """Yield a ``{"list_id": ..., "items": [...]}`` document without building it in memory."""
+    yield f'{{"list_id": {json.dumps(list_id)}, "items": ['
+    separator = ""
+    for rows in _item_row_chunks(list_id, since_id, chunk_size):
+        yield separator + ", ".join(rows)
+        separator = ", "
+    yield "]}\n"
+
+
+def stream_items_ndjson(list_id, since_id=None, chunk_size=None):
+    """Yield one JSON object per item and line."""
+    for rows in _item_row_chunks(list_id, since_id, chunk_size):
+        yield "\n".join(rows) + "\n"
+
+
+async def astream_items_json(list_id, since_id=None, chunk_size=None):
+    """Async variant of ``stream_items_json``, reading items with ``aiterator()``."""
+    yield f'{{"list_id": {json.dumps(list_id)}, "items": ['
+    separator = ""
+    async for rows in _aitem_row_chunks(list_id, since_id, chunk_size):
+        yield separator + ", ".join(rows)
+        separator = ", "
+    yield "]}\n"
+
+
+async def astream_items_ndjson(list_id, since_id=None, chunk_size=None):
+    async for rows in _aitem_row_chunks(list_id, since_id, chunk_size):
+        yield "\n".join(rows) + "\n"
+
+
+def _item_rows(list_id, since_id):
+    items = Item.objects.filter(list_id=list_id).order_by("id")
+    if since_id is not None:
+        items = items.filter(id__gt=since_id)
+    return items
+
+
+def _item_row(item_id, text):
+    return f'{{"id": {item_id}, "text": {json.dumps(text)}}}'
+
+
+def _item_row_chunks(list_id, since_id, chunk_size):
+    chunk_size = chunk_size or get_chunk_size()
+    rows = []
+    # tuples from values_list skip model instantiation entirely
+    for item_id, text in _item_rows(list_id, since_id).values_list("id", "text").iterator(chunk_size=chunk_size):
+        rows.append(_item_row(item_id, text))
+        if len(rows) == chunk_size:
+            yield rows
+            rows = []
+    if rows:
+        yield rows
+
+
+async def _aitem_row_chunks(list_id, since_id, chunk_size):
+    chunk_size = chunk_size or get_chunk_size()
+    rows = []
+    # values() rather than values_list(), whose multi-field iterable runs its query
+    # as soon as it is built and so can't be read by aiterator() on Django 4.2
+    async for row in _item_rows(list_id, since_id).values("id", "text").aiterator(chunk_size=chunk_size):
+        rows.append(_item_row(row["id"], row["text"]))
+        if len(rows) == chunk_size:
+            yield rows
+            rows = []
+    if rows:
+        yield rows
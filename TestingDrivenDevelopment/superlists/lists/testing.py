@@ -0,0 +1,18 @@
+from django.test.runner import DiscoverRunner
+
+
+class TimedDiscoverRunner(DiscoverRunner):
+    """``--timing`` also reports the suite run on its own.
+
+    Django's own records cover database setup and teardown and the total,
+    i.e. the cold suite, the extra record is the warm suite: the tests
+    against a schema that is already in place.
+    """
+
+    def build_suite(self, *args, **kwargs):
+        with self.time_keeper.timed("Building the suite"):
+            return super().build_suite(*args, **kwargs)
+
+    def run_suite(self, suite, **kwargs):
+        with self.time_keeper.timed("Warm suite (tests only)"):
+            return super().run_suite(suite, **kwargs)
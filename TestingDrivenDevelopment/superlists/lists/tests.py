@@ -1,14 +1,52 @@
+import asyncio
+import io
+import glob
+import gzip
+import importlib
+import json
+import os
+import tempfile
+import threading
+import time
 import unittest
+import unittest.mock
+from datetime import timedelta
+from types import SimpleNamespace
 
-from django.http import HttpRequest
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpRequest
 from django.template.loader import render_to_string
-from django.test import TestCase
+from django.contrib.sessions.models import Session
+from django.db import OperationalError, connection, connections, router, transaction
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db.migrations.loader import MigrationLoader
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
 # Create your tests here.
 from django.urls import resolve
+from django.utils import timezone
 
-from .models import Item, List
-from .views import home_page, view_list, new_list, add_item
+from . import async_views
+from .archive import archive_lists
+from .baselines import find_regressions
+from .benchmarks import BENCHMARKS, _add_concurrently
+from .cache import get_cache
+from .datasets import DISTRIBUTIONS, list_sizes
+from .models import Item, List, ListArchive
+from .instrumentation import registry
+from .management.commands.benchmark import Command as BenchmarkCommand
+from .minify import minify_html
+from .pagination import get_item_page
+from .pubsub import LocalPubSub, PollingPubSub, get_pubsub
+from .search import has_fts_index, search_items
+from .sharding import ITEM_ID_SPAN, list_ids, move_list, placement, reserve_item_ids
+from .sqlite import configure_connection
+from .streaming import render_rows
+from .transfer import export_records
+from .writebehind import ItemWriter, stop_item_writer
+from .views import home_page, view_list, new_list, add_item, render_list_table
 import re
 
 
@@ -48,7 +86,7 @@ class SmokeTest(TestCase):
         request.POST["new_item"] = to_do_item_one
         new_list(request)
         request.method = "GET"
-        response = view_list(request, 1)
+        response = view_list(request, List.objects.get().id)
         self.assertIn(to_do_item_one, response.content.decode())
 
     def test_new_list_view_can_save_post_request_and_update_database(self):
@@ -89,7 +127,11 @@ class SmokeTest(TestCase):
         response = view_list(request, created_list.id)
         regex_pattern = '<input type="hidden".*>'
         response_no_hidden_input = re.sub(regex_pattern, repl="", string=response.content.decode())
-        context = {"items": Item.objects.all(), "to_do_list": created_list}
+        context = {
+            "table": render_list_table(created_list, {}),
+            "to_do_list": created_list,
+            "events_poll_seconds": settings.LISTS_EVENTS_POLL_SECONDS,
+        }
         expected_html = render_to_string("list.html", context)
         self.assertEqual(response_no_hidden_input, expected_html)
 
@@ -159,6 +201,1239 @@ class ListViewTest(TestCase):
         self.assertNotContains(response, other_item_2)
 
 
+class ListPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.to_do_list = List.objects.create()
+        cls.items = [Item.objects.create(text=f"Item {number}", list=cls.to_do_list) for number in range(1, 6)]
+
+    def test_numbering_continues_across_pages(self):
+        first_page = self.client.get(f"/lists/{self.to_do_list.id}/?page_size=2")
+        second_page = self.client.get(f"/lists/{self.to_do_list.id}/?page_size=2&after={self.items[1].id}&number=2")
+
+        self.assertContains(first_page, "1. Item 1")
+        self.assertContains(first_page, "2. Item 2")
+        self.assertNotContains(first_page, "Item 3")
+        self.assertContains(second_page, "3. Item 3")
+        self.assertContains(second_page, "4. Item 4")
+        self.assertNotContains(second_page, "Item 5")
+
+    def test_next_and_previous_cursors(self):
+        page = get_item_page(self.to_do_list, {"after": self.items[1].id, "number": 2}, page_size=2)
+        self.assertTrue(page.has_previous)
+        self.assertTrue(page.has_next)
+        self.assertEqual((page.first_id, page.last_id), (self.items[2].id, self.items[3].id))
+
+        previous_page = get_item_page(self.to_do_list, {"before": page.first_id, "number": page.start}, page_size=2)
+        self.assertEqual([number for number, item in previous_page.numbered_items], [1, 2])
+        self.assertFalse(previous_page.has_previous)
+
+        last_page = get_item_page(self.to_do_list, {"after": page.last_id, "number": page.end}, page_size=2)
+        self.assertEqual([number for number, item in last_page.numbered_items], [5])
+        self.assertFalse(last_page.has_next)
+
+    def test_counts_position_when_cursor_has_no_number(self):
+        page = get_item_page(self.to_do_list, {"after": self.items[2].id}, page_size=2)
+        self.assertEqual(page.start, 4)
+
+    def test_page_cost_does_not_depend_on_depth(self):
+        with self.assertNumQueries(1):
+            get_item_page(self.to_do_list, {"after": self.items[3].id, "number": 4}, page_size=2)
+
+    def test_small_list_has_no_page_links(self):
+        response = self.client.get(f"/lists/{self.to_do_list.id}/")
+        self.assertNotContains(response, "id_list_pages")
+
+    def test_rejects_malformed_cursor(self):
+        response = self.client.get(f"/lists/{self.to_do_list.id}/?after=abc")
+        self.assertEqual(response.status_code, 400)
+
+
+class StreamingListViewTest(TestCase):
+    def test_streams_every_item_with_continuous_numbering(self):
+        to_do_list = List.objects.create()
+        for number in range(1, 6):
+            Item.objects.create(text=f"Item {number}", list=to_do_list)
+
+        response = self.client.get(f"/lists/{to_do_list.id}/?stream=1&page_size=2")
+        content = b"".join(response.streaming_content).decode()
+
+        self.assertTrue(response.streaming)
+        for number in range(1, 6):
+            self.assertIn(f"<tr><td>{number}. Item {number}</td></tr>", content)
+        self.assertIn('id="id_new_item"', content)
+        self.assertTrue(content.rstrip().endswith("</html>"))
+
+    def test_streamed_page_matches_rendered_page(self):
+        to_do_list = List.objects.create()
+        for item in SmokeTest.items_list:
+            Item.objects.create(text=item, list=to_do_list)
+
+        rendered = self.client.get(f"/lists/{to_do_list.id}/").content.decode()
+        streamed = b"".join(self.client.get(f"/lists/{to_do_list.id}/?stream=1").streaming_content).decode()
+
+        def rows(html):
+            return re.findall("<tr>.*</tr>", html)
+        self.assertEqual(rows(streamed), rows(rendered))
+
+    def test_escapes_item_text(self):
+        to_do_list = List.objects.create()
+        Item.objects.create(text="<script>", list=to_do_list)
+        response = self.client.get(f"/lists/{to_do_list.id}/?stream=1")
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("1. &lt;script&gt;", content)
+        self.assertNotIn("1. <script>", content)
+
+
+class TemplateLoadingTest(TestCase):
+    cached_templates = [{
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [settings.BASE_DIR / "templates"],
+        "OPTIONS": {"loaders": [
+            ("django.template.loaders.cached.Loader", ["django.template.loaders.filesystem.Loader"]),
+        ]},
+    }]
+
+    def test_item_rows_escape_item_text(self):
+        to_do_list = List.objects.create()
+        Item.objects.create(text="<b>bold</b>", list=to_do_list)
+        response = self.client.get(f"/lists/{to_do_list.id}/")
+        self.assertContains(response, "<tr><td>1. &lt;b&gt;bold&lt;/b&gt;</td></tr>", html=True)
+
+    def test_precompiles_configured_templates(self):
+        from django.apps import apps
+        from django.template import engines
+
+        with override_settings(TEMPLATES=self.cached_templates, LISTS_PRECOMPILED_TEMPLATES=["home.html", "list.html"]):
+            apps.get_app_config("lists").precompile_templates()
+            loader = engines["django"].engine.template_loaders[0]
+            self.assertEqual(set(loader.get_template_cache), {"home.html", "list.html"})
+
+
+class StaticFilesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        storages = {**settings.STORAGES, "staticfiles": {"BACKEND": "lists.staticfiles.CompressedManifestStaticFilesStorage"}}
+        cls.enterClassContext(override_settings(STATIC_ROOT=directory.name, STORAGES=storages))
+        call_command("collectstatic", interactive=False, verbosity=0)
+        cls.root = directory.name
+
+    def asset_urls(self):
+        return re.findall(r'(?:href|src)="(/static/[^"]+)"', self.client.get("/").content.decode())
+
+    def test_base_links_hashed_bootstrap_as_stylesheet(self):
+        content = self.client.get("/").content.decode()
+        self.assertRegex(content, r'<link rel="stylesheet" href="/static/bootstrap/css/bootstrap\.min\.\w{12}\.css">')
+        self.assertRegex(content, r'<script src="/static/bootstrap/js/bootstrap\.min\.\w{12}\.js" defer>')
+
+    def test_skips_unused_bootstrap_builds(self):
+        collected = os.listdir(os.path.join(self.root, "bootstrap", "css"))
+        self.assertFalse([name for name in collected if "rtl" in name or name.startswith("bootstrap-")])
+
+    def test_serves_gzip_sibling_with_immutable_caching(self):
+        for url in self.asset_urls():
+            response = self.client.get(url, headers={"Accept-Encoding": "gzip, deflate"})
+            content = b"".join(response.streaming_content)
+            self.assertEqual(response.headers["Content-Encoding"], "gzip")
+            self.assertIn("immutable", response.headers["Cache-Control"])
+            self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+            self.assertLess(len(content), os.path.getsize(os.path.join(self.root, url.removeprefix("/static/"))))
+
+    def test_serves_identity_when_gzip_is_refused(self):
+        url = self.asset_urls()[0]
+        response = self.client.get(url, headers={"Accept-Encoding": "gzip;q=0"})
+        b"".join(response.streaming_content)
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(response.headers["Content-Type"], "text/css")
+
+    def test_unhashed_names_are_revalidated(self):
+        response = self.client.get("/static/bootstrap/css/bootstrap.min.css")
+        b"".join(response.streaming_content)
+        self.assertEqual(response.headers["Cache-Control"], "no-cache")
+
+    def test_missing_file_is_404(self):
+        self.assertEqual(self.client.get("/static/../manage.py").status_code, 404)
+        self.assertEqual(self.client.get("/static/missing.css").status_code, 404)
+
+
+class ListTableCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.to_do_list = List.objects.create()
+        Item.objects.create(text=SmokeTest.items_list[0], list=cls.to_do_list)
+
+    def test_repeated_view_skips_item_query(self):
+        self.client.get(f"/lists/{self.to_do_list.id}/")
+        # the validator lookup only, without the first page of items
+        with self.assertNumQueries(1) as captured:
+            response = self.client.get(f"/lists/{self.to_do_list.id}/")
+        self.assertNotIn(Item._meta.db_table, captured.captured_queries[0]["sql"])
+        self.assertContains(response, f"1. {SmokeTest.items_list[0]}")
+
+    def test_add_item_invalidates_cached_table(self):
+        self.client.get(f"/lists/{self.to_do_list.id}/")
+        self.client.post(
+            path=f"/lists/{self.to_do_list.id}/add_item",
+            data={"new_item": SmokeTest.items_list[1]}
+        )
+        response = self.client.get(f"/lists/{self.to_do_list.id}/")
+        self.assertContains(response, f"2. {SmokeTest.items_list[1]}")
+
+    def test_bulk_add_invalidates_cached_table(self):
+        self.client.get(f"/lists/{self.to_do_list.id}/")
+        self.client.post(
+            path=f"/lists/{self.to_do_list.id}/add_item/bulk",
+            data=SmokeTest.items_list[1],
+            content_type="text/plain"
+        )
+        response = self.client.get(f"/lists/{self.to_do_list.id}/")
+        self.assertContains(response, f"2. {SmokeTest.items_list[1]}")
+
+    def test_write_from_another_worker_invalidates_cached_table(self):
+        self.client.get(f"/lists/{self.to_do_list.id}/")
+        # another process leaves this one's cache alone, only the database changes
+        Item.objects.filter(list=self.to_do_list).update(text=SmokeTest.items_list[1])
+        List.touch(self.to_do_list.id)
+        response = self.client.get(f"/lists/{self.to_do_list.id}/")
+        self.assertContains(response, f"1. {SmokeTest.items_list[1]}")
+
+    def test_pages_are_cached_separately(self):
+        Item.objects.create(text=SmokeTest.items_list[1], list=self.to_do_list)
+        first_page = self.client.get(f"/lists/{self.to_do_list.id}/?page_size=1")
+        whole_list = self.client.get(f"/lists/{self.to_do_list.id}/")
+        self.assertNotContains(first_page, SmokeTest.items_list[1])
+        self.assertContains(whole_list, SmokeTest.items_list[1])
+
+    def test_csrf_token_is_fresh_on_cached_page(self):
+        self.client.get(f"/lists/{self.to_do_list.id}/")
+        other_client = self.client_class()
+        first = self.client.get(f"/lists/{self.to_do_list.id}/")
+        second = other_client.get(f"/lists/{self.to_do_list.id}/")
+        token_pattern = 'name="csrfmiddlewaretoken" value="(.*)"'
+        self.assertNotEqual(
+            re.search(token_pattern, first.content.decode()).group(1),
+            re.search(token_pattern, second.content.decode()).group(1)
+        )
+
+
+class ConditionalListViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.to_do_list = List.objects.create()
+        Item.objects.create(text=SmokeTest.items_list[0], list=cls.to_do_list)
+
+    def test_sends_validators(self):
+        response = self.client.get(f"/lists/{self.to_do_list.id}/")
+        self.assertTrue(response.has_header("ETag"))
+        self.assertTrue(response.has_header("Last-Modified"))
+
+    def test_unchanged_list_answers_304_with_one_query_and_no_render(self):
+        etag = self.client.get(f"/lists/{self.to_do_list.id}/")["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(f"/lists/{self.to_do_list.id}/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.templates, [])
+
+    def test_unchanged_list_answers_304_to_if_modified_since(self):
+        last_modified = self.client.get(f"/lists/{self.to_do_list.id}/")["Last-Modified"]
+        response = self.client.get(f"/lists/{self.to_do_list.id}/", HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_added_item_changes_etag(self):
+        etag = self.client.get(f"/lists/{self.to_do_list.id}/")["ETag"]
+        self.client.post(
+            path=f"/lists/{self.to_do_list.id}/add_item",
+            data={"new_item": SmokeTest.items_list[1]}
+        )
+        response = self.client.get(f"/lists/{self.to_do_list.id}/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, SmokeTest.items_list[1])
+
+
+class QueryCountTest(TestCase):
+    def setUp(self):
+        # list ids come back after each rollback, a page cached for an earlier test's list skips the join
+        get_cache().clear()
+
+    def test_home_page(self):
+        with self.assertNumQueries(0):
+            self.client.get("/")
+
+    def test_new_list(self):
+        # list INSERT, item INSERT and updated_at bump
+        with self.assertNumQueries(3):
+            self.client.post(path="/lists/new", data={"new_item": SmokeTest.items_list[0]})
+
+    def test_view_list(self):
+        # read earlier today, so this read is not recorded again
+        to_do_list = List.objects.create(last_read_at=timezone.now())
+        Item.objects.create(text=SmokeTest.items_list[0], list=to_do_list)
+        # the list validator joined to the first page of items
+        with self.assertNumQueries(1):
+            response = self.client.get(f"/lists/{to_do_list.id}/")
+        self.assertContains(response, f"1. {SmokeTest.items_list[0]}")
+
+    def test_view_list_records_first_read_of_the_day(self):
+        to_do_list = List.objects.create(last_read_at=timezone.now() - timedelta(days=2))
+        Item.objects.create(text=SmokeTest.items_list[0], list=to_do_list)
+        # the joined list validator and the last_read_at UPDATE
+        with self.assertNumQueries(2):
+            self.client.get(f"/lists/{to_do_list.id}/")
+        with self.assertNumQueries(1):
+            self.client.get(f"/lists/{to_do_list.id}/")
+
+    def test_view_list_later_page(self):
+        to_do_list = List.objects.create(last_read_at=timezone.now())
+        items = [Item.objects.create(text=f"Item {number}", list=to_do_list) for number in range(3)]
+        # list validator and the page seeking past the cursor
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/lists/{to_do_list.id}/?page_size=2&after={items[1].id}&number=2")
+        self.assertContains(response, "3. Item 2")
+
+    def test_add_item(self):
+        to_do_list = List.objects.create()
+        # savepoint, existence-checked item INSERT, updated_at bump, release
+        with self.assertNumQueries(4):
+            self.client.post(
+                path=f"/lists/{to_do_list.id}/add_item",
+                data={"new_item": SmokeTest.items_list[0]}
+            )
+
+    def test_unknown_list_returns_404(self):
+        self.assertEqual(self.client.get("/lists/999/").status_code, 404)
+        response = self.client.post(path="/lists/999/add_item", data={"new_item": SmokeTest.items_list[0]})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Item.objects.count(), 0)
+
+
+class AsyncViewsTest(TestCase):
+    request_factory = AsyncRequestFactory()
+
+    async def test_new_list_and_add_item(self):
+        request = self.request_factory.post("/lists/new", {"new_item": SmokeTest.items_list[0]})
+        response = await async_views.new_list(request)
+        to_do_list = await List.objects.afirst()
+        self.assertEqual(response["location"], f"/lists/{to_do_list.id}/")
+
+        request = self.request_factory.post(f"/lists/{to_do_list.id}/add_item", {"new_item": SmokeTest.items_list[1]})
+        response = await async_views.add_item(request, to_do_list.id)
+        self.assertEqual(response["location"], f"/lists/{to_do_list.id}/")
+        texts = [item.text async for item in Item.objects.filter(list=to_do_list)]
+        self.assertEqual(texts, SmokeTest.items_list)
+
+    async def test_view_list_renders_items_and_validators(self):
+        to_do_list = await List.objects.acreate()
+        for item in SmokeTest.items_list:
+            await Item.objects.acreate(text=item, list=to_do_list)
+
+        response = await async_views.view_list(self.request_factory.get(f"/lists/{to_do_list.id}/"), to_do_list.id)
+        self.assertContains(response, f"2. {SmokeTest.items_list[1]}")
+
+        request = self.request_factory.get(f"/lists/{to_do_list.id}/", headers={"If-None-Match": response["ETag"]})
+        response = await async_views.view_list(request, to_do_list.id)
+        self.assertEqual(response.status_code, 304)
+
+    async def test_view_list_streams_rows(self):
+        to_do_list = await List.objects.acreate()
+        for item in SmokeTest.items_list:
+            await Item.objects.acreate(text=item, list=to_do_list)
+
+        request = self.request_factory.get(f"/lists/{to_do_list.id}/?stream=1")
+        response = await async_views.view_list(request, to_do_list.id)
+        content = "".join([chunk.decode() async for chunk in response])
+        self.assertIn(f"2. {SmokeTest.items_list[1]}", content)
+
+    async def test_view_list_streams_rehydrated_rows(self):
+        to_do_list = await List.objects.acreate()
+        for item in SmokeTest.items_list:
+            await Item.objects.acreate(text=item, list=to_do_list)
+        await List.objects.aupdate(updated_at=timezone.now() - timedelta(days=100))
+        await sync_to_async(list)(archive_lists(timezone.now()))
+
+        request = self.request_factory.get(f"/lists/{to_do_list.id}/?stream=1")
+        response = await async_views.view_list(request, to_do_list.id)
+        content = "".join([chunk.decode() async for chunk in response])
+        self.assertIn(f"2. {SmokeTest.items_list[1]}", content)
+        self.assertFalse(await List.objects.filter(archived=True).aexists())
+
+    async def test_items_json_and_ndjson_stream_rows(self):
+        to_do_list = await List.objects.acreate()
+        for item in SmokeTest.items_list:
+            await Item.objects.acreate(text=item, list=to_do_list)
+
+        response = await async_views.list_items_json(
+            self.request_factory.get(f"/lists/{to_do_list.id}/items.json"), to_do_list.id
+        )
+        content = json.loads("".join([chunk.decode() async for chunk in response]))
+        self.assertEqual([item["text"] for item in content["items"]], SmokeTest.items_list)
+        self.assertIsNotNone((await List.objects.aget(id=to_do_list.id)).last_read_at)
+
+        first_id = content["items"][0]["id"]
+        request = self.request_factory.get(f"/lists/{to_do_list.id}/items.ndjson?since_id={first_id}")
+        response = await async_views.list_items_ndjson(request, to_do_list.id)
+        lines = "".join([chunk.decode() async for chunk in response]).splitlines()
+        self.assertEqual([json.loads(line)["text"] for line in lines], SmokeTest.items_list[1:])
+
+        request = self.request_factory.get(
+            f"/lists/{to_do_list.id}/items.json", headers={"If-None-Match": response["ETag"]}
+        )
+        response = await async_views.list_items_json(request, to_do_list.id)
+        self.assertEqual(response.status_code, 304)
+
+        request = self.request_factory.get(f"/lists/{to_do_list.id}/items.json?since_id=x")
+        response = await async_views.list_items_json(request, to_do_list.id)
+        self.assertEqual(response.status_code, 400)
+
+    async def test_unknown_list_raises_404(self):
+        with self.assertRaises(Http404):
+            await async_views.view_list(self.request_factory.get("/lists/999/"), 999)
+        with self.assertRaises(Http404):
+            await async_views.list_items_json(self.request_factory.get("/lists/999/items.json"), 999)
+        with self.assertRaises(Http404):
+            request = self.request_factory.post("/lists/999/add_item", {"new_item": SmokeTest.items_list[0]})
+            await async_views.add_item(request, 999)
+
+
+class WriteBehindTest(TransactionTestCase):
+    def tearDown(self):
+        stop_item_writer()
+
+    def test_concurrent_items_share_one_commit(self):
+        to_do_list = List.objects.create()
+        writer = ItemWriter(batch_size=5, max_delay_ms=500)
+        futures = [writer.submit(to_do_list.id, f"Item {number}") for number in range(5)]
+        items = [future.result(timeout=5) for future in futures]
+        writer.stop()
+
+        self.assertEqual(writer.commits, 1)
+        self.assertEqual([item.text for item in items], [f"Item {number}" for number in range(5)])
+        self.assertEqual(Item.objects.filter(list=to_do_list).count(), 5)
+
+    def test_unknown_list_fails_only_its_own_item(self):
+        to_do_list = List.objects.create()
+        writer = ItemWriter(batch_size=2, max_delay_ms=500)
+        missing = writer.submit(999, "Lost item")
+        kept = writer.submit(to_do_list.id, "Kept item")
+
+        with self.assertRaises(List.DoesNotExist):
+            missing.result(timeout=5)
+        self.assertEqual(kept.result(timeout=5).text, "Kept item")
+        writer.stop()
+
+    @override_settings(LISTS_WRITE_BEHIND=True)
+    def test_add_item_sees_its_own_write_after_redirect(self):
+        to_do_list = List.objects.create()
+        response = self.client.post(
+            path=f"/lists/{to_do_list.id}/add_item",
+            data={"new_item": SmokeTest.items_list[0]},
+            follow=True
+        )
+        self.assertContains(response, f"1. {SmokeTest.items_list[0]}")
+
+    @override_settings(LISTS_WRITE_BEHIND=True)
+    def test_add_item_to_unknown_list_returns_404(self):
+        response = self.client.post(path="/lists/999/add_item", data={"new_item": SmokeTest.items_list[0]})
+        self.assertEqual(response.status_code, 404)
+
+    def test_item_added_to_archived_list_rehydrates_it(self):
+        to_do_list = List.objects.create()
+        Item.objects.create(text=SmokeTest.items_list[0], list=to_do_list)
+        List.objects.update(updated_at=timezone.now() - timedelta(days=100))
+        list(archive_lists(timezone.now() - timedelta(days=90)))
+
+        writer = ItemWriter(batch_size=1)
+        writer.add(to_do_list.id, SmokeTest.items_list[1])
+        writer.stop()
+        self.assertEqual(
+            list(Item.objects.filter(list=to_do_list).values_list("text", flat=True)), SmokeTest.items_list
+        )
+        self.assertFalse(List.objects.get().archived)
+
+
+@unittest.skipUnless("replica" in settings.DATABASES, "needs the replica alias from superlists.test_settings")
+@override_settings(LISTS_REPLICA_ALIASES=["replica"])
+class ReplicaRoutingTest(TransactionTestCase):
+    # the runner collects the databases of skipped tests too
+    databases = {"default", "replica"} & set(settings.DATABASES)
+
+    def setUp(self):
+        # read earlier today, so reads do not record it on the primary again
+        self.to_do_list = List.objects.create(last_read_at=timezone.now())
+        Item.objects.create(text=SmokeTest.items_list[0], list=self.to_do_list)
+        self.queries = {"default": 0, "replica": 0}
+
+    def count_queries(self, alias):
+        def count(execute, sql, params, many, context):
+            self.queries[alias] += 1
+            return execute(sql, params, many, context)
+        return connections[alias].execute_wrapper(count)
+
+    def get(self, path, **kwargs):
+        with self.count_queries("default"), self.count_queries("replica"):
+            return self.client.get(path, **kwargs)
+
+    def test_reads_go_to_replica_and_writes_to_primary(self):
+        self.assertEqual(router.db_for_read(Item), "replica")
+        self.assertEqual(router.db_for_write(Item), "default")
+        self.assertEqual(router.db_for_read(Session), "default")
+
+        response = self.get(f"/lists/{self.to_do_list.id}/")
+        self.assertContains(response, f"1. {SmokeTest.items_list[0]}")
+        self.assertEqual(self.queries, {"default": 0, "replica": 1})
+
+    def test_client_reads_from_primary_after_writing(self):
+        response = self.client.post(path="/lists/new", data={"new_item": SmokeTest.items_list[1]})
+        self.assertIn("lists_primary_until", response.cookies)
+
+        response = self.get(response["Location"])
+        self.assertContains(response, f"1. {SmokeTest.items_list[1]}")
+        # the page and the first read of the new list being recorded
+        self.assertEqual(self.queries, {"default": 2, "replica": 0})
+
+    def test_streamed_page_stays_on_primary(self):
+        self.client.post(path=f"/lists/{self.to_do_list.id}/add_item", data={"new_item": SmokeTest.items_list[1]})
+        with self.count_queries("default"), self.count_queries("replica"):
+            response = self.client.get(f"/lists/{self.to_do_list.id}/?stream=1")
+            content = b"".join(response.streaming_content).decode()
+        self.assertIn(f"2. {SmokeTest.items_list[1]}", content)
+        self.assertEqual(self.queries["replica"], 0)
+
+    def test_expired_or_malformed_stickiness_is_ignored(self):
+        for value in [f"{time.time() - 1}", "soon"]:
+            self.client.cookies["lists_primary_until"] = value
+            self.get(f"/lists/{self.to_do_list.id}/")
+        self.assertEqual(self.queries["default"], 0)
+
+    def test_failed_write_does_not_pin_client(self):
+        response = self.client.post(path="/lists/999/add_item", data={"new_item": SmokeTest.items_list[0]})
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn("lists_primary_until", response.cookies)
+
+    def test_add_item_writes_to_primary_outside_requests(self):
+        item = Item.objects.add_to_list(self.to_do_list.id, SmokeTest.items_list[1])
+        self.assertEqual(item._state.db, "default")
+
+
+@unittest.skipUnless("shard" in settings.DATABASES, "needs the shard alias from superlists.test_settings")
+@override_settings(LISTS_SHARDS=["default", "shard"])
+class ShardingTest(TransactionTestCase):
+    databases = {"default", "shard"} & set(settings.DATABASES)
+
+    def setUp(self):
+        # ids start over with the flushed sequence, cached tables must not
+        list_ids.reset()
+        get_cache().clear()
+
+    def new_list(self, text):
+        response = self.client.post(path="/lists/new", data={"new_item": text})
+        return int(response["Location"].strip("/").split("/")[-1])
+
+    def test_lists_are_spread_over_shards_by_id(self):
+        ids = [self.new_list(f"{SmokeTest.items_list[0]} {number}") for number in range(8)]
+        self.assertEqual(len(set(ids)), len(ids))
+        for list_id in ids:
+            shard = placement(list_id, ["default", "shard"])
+            self.assertTrue(List.objects.using(shard).filter(id=list_id).exists())
+            self.assertEqual(Item.objects.using(shard).filter(list_id=list_id).count(), 1)
+        self.assertEqual({placement(list_id, ["default", "shard"]) for list_id in ids}, {"default", "shard"})
+
+    def test_view_and_add_item_on_either_shard(self):
+        ids = [self.new_list(SmokeTest.items_list[0]) for _ in range(4)]
+        for list_id in ids:
+            self.client.post(path=f"/lists/{list_id}/add_item", data={"new_item": SmokeTest.items_list[1]})
+            response = self.client.get(f"/lists/{list_id}/")
+            self.assertContains(response, f"2. {SmokeTest.items_list[1]}")
+            to_do_list = List.objects.using(placement(list_id, ["default", "shard"])).get(id=list_id)
+            self.assertEqual(to_do_list.item_count, 2)
+
+    def test_bulk_new_lists_go_to_their_shards(self):
+        for _ in range(4):
+            response = self.client.post(
+                path="/lists/new/bulk", data="\n".join(SmokeTest.items_list), content_type="text/plain"
+            )
+            list_id = response.json()["list_id"]
+            shard = placement(list_id, ["default", "shard"])
+            self.assertEqual(Item.objects.using(shard).filter(list_id=list_id).count(), len(SmokeTest.items_list))
+            self.assertEqual(List.objects.using(shard).get(id=list_id).item_count, len(SmokeTest.items_list))
+
+    def test_shards_hand_out_item_ids_from_own_range(self):
+        reserve_item_ids("shard")
+        list_id = next(list_id for list_id in range(1, 100) if placement(list_id, ["default", "shard"]) == "shard")
+        List.objects.using("shard").bulk_create([List(id=list_id)])
+        item = Item.objects.add_to_list(list_id, SmokeTest.items_list[0])
+        self.assertEqual(item._state.db, "shard")
+        self.assertGreater(item.id, ITEM_ID_SPAN)
+
+    def test_rebalance_moves_lists_with_their_items(self):
+        with override_settings(LISTS_SHARDS=[]):
+            ids = [List.objects.create().id for _ in range(6)]
+            for list_id in ids:
+                Item.objects.add_to_list(list_id, SmokeTest.items_list[0])
+            item_ids = dict(Item.objects.values_list("list_id", "id"))
+            # archived lists move too
+            List.objects.update(updated_at=timezone.now() - timedelta(days=100))
+            list(archive_lists(timezone.now()))
+        moving = [list_id for list_id in ids if placement(list_id, ["default", "shard"]) == "shard"]
+        self.assertTrue(moving)
+
+        with override_settings(LISTS_PREVIOUS_SHARDS=["default"]):
+            # still served from the old shard until moved
+            self.assertContains(self.client.get(f"/lists/{moving[0]}/"), f"1. {SmokeTest.items_list[0]}")
+            last_read_at = dict(List.objects.using("default").values_list("id", "last_read_at"))
+            self.assertIsNotNone(last_read_at[moving[0]])
+            call_command("rebalance_shards", stdout=io.StringIO())
+            self.client.post(path=f"/lists/{moving[0]}/add_item", data={"new_item": SmokeTest.items_list[1]})
+
+        for list_id in ids:
+            shard = placement(list_id, ["default", "shard"])
+            self.assertEqual(List.objects.using(shard).filter(id=list_id).count(), 1)
+        self.assertFalse(List.objects.using("default").filter(id__in=moving).exists())
+        self.assertFalse(Item.objects.using("default").filter(list_id__in=moving).exists())
+        self.assertEqual(Item.objects.using("shard").filter(list_id__in=moving).count(), len(moving) + 1)
+        # items keep the ids clients hold as cursors
+        for list_id in moving:
+            self.assertEqual(Item.objects.using("shard").filter(list_id=list_id).earliest("id").id, item_ids[list_id])
+            self.assertEqual(List.objects.using("shard").get(id=list_id).last_read_at, last_read_at[list_id])
+        to_do_list = List.objects.using("shard").get(id=moving[0])
+        self.assertEqual(to_do_list.item_count, 2)
+        self.assertEqual(to_do_list.last_item_id, Item.objects.using("shard").filter(list_id=moving[0]).latest("id").id)
+        self.assertContains(self.client.get(f"/lists/{moving[0]}/"), f"2. {SmokeTest.items_list[1]}")
+        # the id sequence starts above the lists created before sharding
+        self.assertGreater(self.new_list(SmokeTest.items_list[0]), max(ids))
+
+    def test_move_keeps_item_ids_and_target_sequence(self):
+        reserve_item_ids("default")
+        reserve_item_ids("shard")
+        # towards the lower range, where copying the ids would move the sequence up
+        List.objects.using("shard").bulk_create([List(id=1)])
+        moved_item = Item.objects.db_manager("shard").add_to_list(1, SmokeTest.items_list[0])
+        self.assertGreater(moved_item.id, ITEM_ID_SPAN)
+
+        def sequence():
+            with connections["default"].cursor() as cursor:
+                cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = %s", [Item._meta.db_table])
+                return cursor.fetchone()[0]
+
+        before = sequence()
+        self.assertEqual(move_list(1, "shard", "default"), 1)
+        self.assertEqual(Item.objects.using("default").get(list_id=1).id, moved_item.id)
+        self.assertEqual(sequence(), before)
+
+    def test_search_finds_items_on_every_shard(self):
+        ids = [self.new_list(f"Buy cheese {number}") for number in range(6)]
+        self.new_list("Buy bread")
+        self.assertEqual({placement(list_id, ["default", "shard"]) for list_id in ids}, {"default", "shard"})
+        first, has_next = search_items("cheese", per_page=4)
+        self.assertTrue(has_next)
+        second, has_next = search_items("cheese", page=2, per_page=4)
+        self.assertFalse(has_next)
+        self.assertEqual(sorted(item.list_id for item in first + second), ids)
+        self.assertContains(self.client.get("/search", {"q": "cheese"}), "Buy cheese 5")
+
+    def test_rebalance_needs_shards(self):
+        with override_settings(LISTS_SHARDS=[]), self.assertRaises(CommandError):
+            call_command("rebalance_shards")
+
+
+class ArchiveTest(TestCase):
+    def setUp(self):
+        self.cold_list = List.objects.create()
+        self.items = [Item.objects.create(text=text, list=self.cold_list) for text in SmokeTest.items_list]
+        self.hot_list = List.objects.create()
+        Item.objects.create(text=SmokeTest.items_list[0], list=self.hot_list)
+        List.objects.filter(id=self.cold_list.id).update(updated_at=timezone.now() - timedelta(days=100))
+        self.cold_list.refresh_from_db()
+        get_cache().clear()
+
+    def archive(self):
+        call_command("archive_lists", "--days", "90", stdout=io.StringIO())
+
+    def test_archives_cold_lists_into_stubs(self):
+        self.archive()
+        stub = List.objects.get(id=self.cold_list.id)
+        self.assertTrue(stub.archived)
+        self.assertEqual((stub.item_count, stub.last_item_id), (2, self.items[-1].id))
+        self.assertEqual(stub.updated_at, self.cold_list.updated_at)
+        self.assertFalse(Item.objects.filter(list=self.cold_list).exists())
+        self.assertEqual(ListArchive.objects.get().list_id, self.cold_list.id)
+        self.assertFalse(List.objects.get(id=self.hot_list.id).archived)
+        self.assertEqual(Item.objects.filter(list=self.hot_list).count(), 1)
+
+    def test_view_rehydrates_list_with_its_item_ids(self):
+        etag = self.client.get(f"/lists/{self.cold_list.id}/")["ETag"]
+        List.objects.filter(id=self.cold_list.id).update(last_read_at=timezone.now() - timedelta(days=100))
+        self.archive()
+        self.assertTrue(List.objects.get(id=self.cold_list.id).archived)
+        response = self.client.get(f"/lists/{self.cold_list.id}/")
+        self.assertContains(response, f"2. {SmokeTest.items_list[1]}")
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(list(Item.objects.filter(list=self.cold_list)), self.items)
+        self.assertFalse(List.objects.get(id=self.cold_list.id).archived)
+        self.assertFalse(ListArchive.objects.exists())
+
+    def test_recently_read_list_is_not_archived(self):
+        self.client.get(f"/lists/{self.cold_list.id}/items.json")
+        self.assertIsNotNone(List.objects.get(id=self.cold_list.id).last_read_at)
+        self.archive()
+        self.assertFalse(List.objects.get(id=self.cold_list.id).archived)
+        self.assertEqual(Item.objects.filter(list=self.cold_list).count(), 2)
+
+        List.objects.filter(id=self.cold_list.id).update(last_read_at=timezone.now() - timedelta(days=100))
+        self.archive()
+        self.assertTrue(List.objects.get(id=self.cold_list.id).archived)
+
+    def test_add_item_rehydrates_list(self):
+        self.archive()
+        self.client.post(path=f"/lists/{self.cold_list.id}/add_item", data={"new_item": "Third item"})
+        texts = list(Item.objects.filter(list=self.cold_list).values_list("text", flat=True))
+        self.assertEqual(texts, [*SmokeTest.items_list, "Third item"])
+        self.assertEqual(List.objects.get(id=self.cold_list.id).item_count, 3)
+
+    def test_items_api_rehydrates_list(self):
+        self.archive()
+        response = self.client.get(f"/lists/{self.cold_list.id}/items.json")
+        document = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([item["text"] for item in document["items"]], SmokeTest.items_list)
+
+    def test_rehydrated_list_is_not_archived_again_until_cold(self):
+        self.archive()
+        self.client.get(f"/lists/{self.cold_list.id}/")
+        self.archive()
+        self.assertFalse(List.objects.get(id=self.cold_list.id).archived)
+
+    def test_export_and_counter_check_see_archived_items(self):
+        self.archive()
+        records = [record for record in export_records() if record["list"] == self.cold_list.id]
+        self.assertEqual([record.get("text") for record in records[1:]], SmokeTest.items_list)
+        output = io.StringIO()
+        call_command("check_list_counters", "--dry-run", stdout=output)
+        self.assertIn("found 0 with drift", output.getvalue())
+
+
+class ItemsApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.to_do_list = List.objects.create()
+        cls.items = [Item.objects.create(text=text, list=cls.to_do_list) for text in SmokeTest.items_list]
+
+    def read(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_json_lists_items_in_order(self):
+        response = self.client.get(f"/lists/{self.to_do_list.id}/items.json")
+        document = json.loads(self.read(response))
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(document["list_id"], self.to_do_list.id)
+        self.assertEqual(
+            document["items"],
+            [{"id": item.id, "text": item.text} for item in self.items]
+        )
+
+    def test_ndjson_has_one_item_per_line(self):
+        response = self.client.get(f"/lists/{self.to_do_list.id}/items.ndjson")
+        lines = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([line["text"] for line in lines], SmokeTest.items_list)
+
+    def test_since_id_returns_only_newer_items(self):
+        response = self.client.get(f"/lists/{self.to_do_list.id}/items.json?since_id={self.items[0].id}")
+        document = json.loads(self.read(response))
+        self.assertEqual([item["text"] for item in document["items"]], SmokeTest.items_list[1:])
+
+    def test_empty_list_is_valid_json(self):
+        empty_list = List.objects.create()
+        document = json.loads(self.read(self.client.get(f"/lists/{empty_list.id}/items.json")))
+        self.assertEqual(document["items"], [])
+
+    def test_escapes_text(self):
+        Item.objects.create(text='quote " and\nnewline', list=self.to_do_list)
+        lines = self.read(self.client.get(f"/lists/{self.to_do_list.id}/items.ndjson")).splitlines()
+        self.assertEqual(json.loads(lines[-1])["text"], 'quote " and\nnewline')
+
+    def test_renders_no_template(self):
+        response = self.client.get(f"/lists/{self.to_do_list.id}/items.json")
+        self.read(response)
+        self.assertEqual(response.templates, [])
+
+    def test_rejects_bad_since_id_and_unknown_list(self):
+        self.assertEqual(self.client.get(f"/lists/{self.to_do_list.id}/items.json?since_id=x").status_code, 400)
+        self.assertEqual(self.client.get("/lists/999/items.ndjson").status_code, 404)
+
+
+class ListEventsTest(TestCase):
+    request_factory = AsyncRequestFactory()
+
+    async def read_event(self, events):
+        return json.loads((await anext(events)).decode().split("data: ")[1])
+
+    async def test_sends_missed_items_then_new_ones(self):
+        to_do_list = await List.objects.acreate()
+        first = await Item.objects.acreate(text=SmokeTest.items_list[0], list=to_do_list)
+        request = self.request_factory.get(f"/lists/{to_do_list.id}/events?after=0")
+        response = await async_views.list_events(request, to_do_list.id)
+        events = aiter(response)
+
+        self.assertEqual(await self.read_event(events), {"id": first.id, "text": SmokeTest.items_list[0]})
+        get_pubsub().publish(to_do_list.id, [(first.id, "duplicate"), (first.id + 1, SmokeTest.items_list[1])])
+        self.assertEqual(await self.read_event(events), {"id": first.id + 1, "text": SmokeTest.items_list[1]})
+        await events.aclose()
+
+    async def test_resumes_from_last_event_id(self):
+        to_do_list = await List.objects.acreate()
+        first = await Item.objects.acreate(text=SmokeTest.items_list[0], list=to_do_list)
+        second = await Item.objects.acreate(text=SmokeTest.items_list[1], list=to_do_list)
+        request = self.request_factory.get(
+            f"/lists/{to_do_list.id}/events", headers={"Last-Event-ID": str(first.id)}
+        )
+        events = aiter(await async_views.list_events(request, to_do_list.id))
+        self.assertEqual((await self.read_event(events))["id"], second.id)
+        await events.aclose()
+
+    def test_new_items_are_published_on_commit(self):
+        to_do_list = List.objects.create()
+        published = []
+        broker = get_pubsub()
+        with unittest.mock.patch.object(broker, "publish", lambda list_id, items: published.append(items)):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    path=f"/lists/{to_do_list.id}/add_item",
+                    data={"new_item": SmokeTest.items_list[0]}
+                )
+        self.assertEqual([text for items in published for _, text in items], [SmokeTest.items_list[0]])
+
+    def test_last_page_carries_live_update_cursor(self):
+        to_do_list = List.objects.create()
+        item = Item.objects.create(text=SmokeTest.items_list[0], list=to_do_list)
+        response = self.client.get(f"/lists/{to_do_list.id}/")
+        self.assertContains(response, f'data-last-id="{item.id}" data-next-number="2"')
+
+    def test_events_poll_returns_newer_items(self):
+        to_do_list = List.objects.create()
+        first = Item.objects.create(text=SmokeTest.items_list[0], list=to_do_list)
+        second = Item.objects.create(text=SmokeTest.items_list[1], list=to_do_list)
+        response = self.client.get(f"/lists/{to_do_list.id}/events?after={first.id}")
+        self.assertEqual(response.json(), {"items": [{"id": second.id, "text": SmokeTest.items_list[1]}]})
+
+    def test_events_poll_answers_empty_right_away(self):
+        to_do_list = List.objects.create()
+        item = Item.objects.create(text=SmokeTest.items_list[0], list=to_do_list)
+        response = self.client.get(f"/lists/{to_do_list.id}/events?after={item.id}")
+        self.assertEqual(response.json(), {"items": []})
+        self.assertEqual(self.client.get(f"/lists/{to_do_list.id}/events?after=x").status_code, 400)
+        self.assertEqual(self.client.get("/lists/999/events").status_code, 404)
+
+    @override_settings(LISTS_EVENTS_POLL_SECONDS=3)
+    def test_page_polls_on_the_configured_interval(self):
+        to_do_list = List.objects.create()
+        Item.objects.create(text=SmokeTest.items_list[0], list=to_do_list)
+        response = self.client.get(f"/lists/{to_do_list.id}/")
+        self.assertContains(response, "const interval = 3 * 1000;")
+
+    async def test_event_source_only_under_async_views(self):
+        to_do_list = await List.objects.acreate()
+        await Item.objects.acreate(text=SmokeTest.items_list[0], list=to_do_list)
+
+        response = await sync_to_async(self.client.get)(f"/lists/{to_do_list.id}/")
+        self.assertNotContains(response, "EventSource")
+        self.assertContains(response, "fetch(")
+
+        with override_settings(LISTS_ASYNC_VIEWS=True):
+            request = self.request_factory.get(f"/lists/{to_do_list.id}/")
+            response = await async_views.view_list(request, to_do_list.id)
+        self.assertContains(response, "new EventSource")
+
+    async def test_polling_backend_reads_new_items_from_database(self):
+        to_do_list = await List.objects.acreate()
+        first = await Item.objects.acreate(text=SmokeTest.items_list[0], list=to_do_list)
+        second = await Item.objects.acreate(text=SmokeTest.items_list[1], list=to_do_list)
+        async with PollingPubSub().subscribe(to_do_list.id, after=first.id) as subscription:
+            self.assertEqual(await subscription.get(), (second.id, SmokeTest.items_list[1]))
+
+    async def test_fans_out_to_a_thousand_subscribers(self):
+        broker = LocalPubSub()
+        subscriptions = [broker.subscribe(1, after=0) for _ in range(1000)]
+        for subscription in subscriptions:
+            await subscription.__aenter__()
+
+        start = time.perf_counter()
+        broker.publish(1, [(1, SmokeTest.items_list[0])])
+        received = await asyncio.gather(*(subscription.get() for subscription in subscriptions))
+        fan_out_seconds = time.perf_counter() - start
+
+        for subscription in subscriptions:
+            await subscription.__aexit__(None, None, None)
+        self.assertEqual(len(received), 1000)
+        self.assertTrue(all(item == (1, SmokeTest.items_list[0]) for item in received))
+        self.assertLess(fan_out_seconds, 1)
+
+
+class ListCountersTest(TestCase):
+    databases = {"default", "shard"} & set(settings.DATABASES)
+
+    def test_add_item_updates_counters(self):
+        self.client.post(path="/lists/new", data={"new_item": SmokeTest.items_list[0]})
+        to_do_list = List.objects.get()
+        self.client.post(path=f"/lists/{to_do_list.id}/add_item", data={"new_item": SmokeTest.items_list[1]})
+
+        to_do_list.refresh_from_db()
+        self.assertEqual(to_do_list.item_count, 2)
+        self.assertEqual(to_do_list.last_item_id, Item.objects.last().id)
+
+    def test_bulk_add_updates_counters(self):
+        to_do_list = List.objects.create()
+        self.client.post(
+            path=f"/lists/{to_do_list.id}/add_item/bulk?batch_size=1",
+            data=json.dumps(SmokeTest.items_list),
+            content_type="application/json"
+        )
+        to_do_list.refresh_from_db()
+        self.assertEqual(to_do_list.item_count, 2)
+        self.assertEqual(to_do_list.last_item_id, Item.objects.last().id)
+
+    def test_deleting_newest_item_moves_last_item_id_back(self):
+        to_do_list = List.objects.create()
+        first = Item.objects.create(text=SmokeTest.items_list[0], list=to_do_list)
+        Item.objects.create(text=SmokeTest.items_list[1], list=to_do_list).delete()
+
+        to_do_list.refresh_from_db()
+        self.assertEqual(to_do_list.item_count, 1)
+        self.assertEqual(to_do_list.last_item_id, first.id)
+
+    def test_command_repairs_drift(self):
+        to_do_list = List.objects.create()
+        item = Item.objects.create(text=SmokeTest.items_list[0], list=to_do_list)
+        empty_list = List.objects.create()
+        List.objects.filter(id=to_do_list.id).update(item_count=7, last_item_id=None)
+        List.objects.filter(id=empty_list.id).update(item_count=3)
+
+        output = io.StringIO()
+        call_command("check_list_counters", "--batch-size", "1", stdout=output)
+
+        self.assertIn("checked 2 lists, repaired 2 with drift", output.getvalue())
+        self.assertEqual(
+            list(List.objects.values_list("item_count", "last_item_id")),
+            [(1, item.id), (0, None)]
+        )
+
+    @unittest.skipUnless("shard" in settings.DATABASES, "needs the shard alias from superlists.test_settings")
+    def test_backfill_migration_uses_historical_models_on_its_database(self):
+        migration = importlib.import_module("lists.migrations.0005_backfill_list_counters")
+        state = MigrationLoader(connections["shard"]).project_state(("lists", "0005_backfill_list_counters"))
+        to_do_list = List.objects.using("shard").create()
+        items = [Item.objects.using("shard").create(text=text, list_id=to_do_list.id) for text in SmokeTest.items_list]
+        empty_list = List.objects.using("shard").create()
+        List.objects.using("shard").update(item_count=0, last_item_id=None)
+
+        migration.backfill_list_counters(state.apps, SimpleNamespace(connection=connections["shard"]))
+
+        self.assertEqual(
+            list(List.objects.using("shard").order_by("id").values_list("id", "item_count", "last_item_id")),
+            [(to_do_list.id, 2, items[-1].id), (empty_list.id, 0, None)]
+        )
+
+    def test_dry_run_leaves_drift_in_place(self):
+        to_do_list = List.objects.create()
+        List.objects.filter(id=to_do_list.id).update(item_count=7)
+        output = io.StringIO()
+        call_command("check_list_counters", "--dry-run", stdout=output)
+        self.assertIn("found 1 with drift", output.getvalue())
+        self.assertEqual(List.objects.get().item_count, 7)
+
+
+class ExportImportTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.first = List.objects.create()
+        for text in ["Buy milk", 'Say "hi", then\nleave', "Zażółć gęślą jaźń"]:
+            Item.objects.create(text=text, list=self.first)
+        self.empty = List.objects.create()
+        self.first.refresh_from_db()
+        self.empty.refresh_from_db()
+
+    def export_and_import(self, name, *export_args):
+        path = os.path.join(self.directory, name)
+        call_command("export_lists", path, *export_args, stdout=io.StringIO())
+        paths = sorted(glob.glob(os.path.join(self.directory, "*")))
+        output = io.StringIO()
+        call_command("import_lists", *paths, stdout=output)
+        return output.getvalue()
+
+    def assertCopied(self):
+        first_copy, empty_copy = List.objects.exclude(id__in=[self.first.id, self.empty.id]).order_by("id")
+        self.assertEqual(
+            list(first_copy.item_set.values_list("text", flat=True)),
+            list(self.first.item_set.values_list("text", flat=True)),
+        )
+        self.assertEqual(first_copy.updated_at, self.first.updated_at)
+        self.assertEqual(first_copy.item_count, 3)
+        self.assertEqual(first_copy.last_item_id, first_copy.item_set.last().id)
+        self.assertEqual(empty_copy.item_count, 0)
+        self.assertEqual(empty_copy.updated_at, self.empty.updated_at)
+
+    def test_round_trips_compressed_ndjson(self):
+        output = self.export_and_import("lists.ndjson.gz")
+        self.assertCopied()
+        self.assertIn("2 lists, 3 items", output)
+        self.assertIn("rows/s", output)
+
+    def test_round_trips_csv(self):
+        self.export_and_import("lists.csv")
+        self.assertCopied()
+
+    def test_splits_export_by_list_range(self):
+        output = self.export_and_import("lists.jsonl.xz", "--parts", "2")
+        self.assertEqual(sorted(os.listdir(self.directory)), ["lists-1.jsonl.xz", "lists-2.jsonl.xz"])
+        self.assertIn("imported 2 lists, 3 items", output)
+        self.assertCopied()
+
+    def test_small_batches_keep_items_with_their_list(self):
+        path = os.path.join(self.directory, "lists.ndjson")
+        call_command("export_lists", path, stdout=io.StringIO())
+        call_command("import_lists", path, "--batch-size", "2", stdout=io.StringIO())
+        self.assertCopied()
+
+    def test_rejects_unknown_format(self):
+        with self.assertRaises(CommandError):
+            call_command("export_lists", os.path.join(self.directory, "lists.txt"))
+
+
+class BenchmarkSuiteTest(TestCase):
+    def test_list_sizes_add_up_for_every_distribution(self):
+        for distribution in DISTRIBUTIONS:
+            sizes = list(list_sizes(10_000, distribution, mean_size=50))
+            self.assertEqual(sum(sizes), 10_000)
+            self.assertTrue(all(size > 0 for size in sizes))
+        self.assertEqual(list(list_sizes(120, "uniform", mean_size=50)), [50, 50, 20])
+        self.assertEqual(list(list_sizes(120, "single")), [120])
+
+    def test_long_tail_has_a_few_big_lists(self):
+        sizes = sorted(list_sizes(100_000, "long_tail", mean_size=100), reverse=True)
+        self.assertGreater(sum(sizes[:len(sizes) // 10]), 100_000 / 2)
+
+    def test_seed_lists_command_spreads_total_items(self):
+        output = io.StringIO()
+        call_command("seed_lists", "--total-items", "250", "--items", "100", stdout=output)
+        self.assertEqual(len(output.getvalue().split()), 3)
+        self.assertEqual(Item.objects.count(), 250)
+        self.assertEqual(sorted(List.objects.values_list("item_count", flat=True)), [50, 100, 100])
+
+    def test_finds_regressions_beyond_threshold_only(self):
+        baseline = {"run": {"p95_ms": 10.0, "requests_per_second": 100.0, "queries": 2, "items": 5}}
+        runs = {"run": {"p95_ms": 12.0, "requests_per_second": 70.0, "queries": 3, "items": 50}, "new": {"p95_ms": 1.0}}
+        regressions = list(find_regressions(runs, baseline, threshold=0.25))
+        self.assertEqual(
+            regressions, [("run", "requests_per_second", 100.0, 70.0), ("run", "queries", 2, 3)]
+        )
+
+    def test_commands_fail_on_regression_against_saved_baseline(self):
+        command = BenchmarkCommand(stdout=io.StringIO(), stderr=io.StringIO())
+        with tempfile.TemporaryDirectory() as directory:
+            options = {"baseline": os.path.join(directory, "baseline.json"), "threshold": 0.25, "save_baseline": True}
+            command.check_baseline({"routes[10] home_page": {"p99_ms": 1.0}}, options)
+            options["save_baseline"] = False
+            command.check_baseline({"routes[10] home_page": {"p99_ms": 1.2}}, options)
+            with self.assertRaisesRegex(CommandError, "1 metrics regressed by more than 25%"):
+                command.check_baseline({"routes[10] home_page": {"p99_ms": 1.3}}, options)
+
+    def test_missing_baseline_fails_unless_saving(self):
+        command = BenchmarkCommand(stdout=io.StringIO(), stderr=io.StringIO())
+        with tempfile.TemporaryDirectory() as directory:
+            options = {"baseline": os.path.join(directory, "baseline.json"), "threshold": 0.25, "save_baseline": False}
+            with self.assertRaisesRegex(CommandError, "no baseline at"):
+                command.validate_baseline_options(options)
+            with self.assertRaisesRegex(CommandError, "no baseline at"):
+                command.check_baseline({"routes[10] home_page": {"p99_ms": 1.0}}, options)
+            options["save_baseline"] = True
+            command.validate_baseline_options(options)
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.to_do_list = List.objects.create()
+        cls.other_list = List.objects.create()
+        Item.objects.create(text="Buy milk", list=cls.to_do_list)
+        Item.objects.create(text="Milk the cow, then drink milk", list=cls.other_list)
+        Item.objects.create(text="Buy bread", list=cls.other_list)
+
+    def test_finds_items_across_lists_with_links(self):
+        response = self.client.get("/search?q=milk")
+        self.assertTemplateUsed(response, "search.html")
+        self.assertContains(response, f'<a href="/lists/{self.to_do_list.id}/">Buy milk</a>')
+        self.assertContains(response, f'<a href="/lists/{self.other_list.id}/">Milk the cow, then drink milk</a>')
+        self.assertNotContains(response, "Buy bread")
+
+    def test_schema_has_fts_index_with_or_without_migrations(self):
+        self.assertTrue(has_fts_index())
+
+    def test_matches_every_word(self):
+        items, _ = search_items("buy milk")
+        self.assertEqual([item.text for item in items], ["Buy milk"])
+
+    def test_index_follows_updates_and_deletes(self):
+        item = Item.objects.get(text="Buy bread")
+        item.text = "Buy cheese"
+        item.save()
+        Item.objects.filter(text="Buy milk").delete()
+
+        self.assertEqual([item.text for item in search_items("cheese")[0]], ["Buy cheese"])
+        self.assertEqual(search_items("bread")[0], [])
+        self.assertEqual([item.text for item in search_items("buy")[0]], ["Buy cheese"])
+
+    def test_query_syntax_is_treated_as_text(self):
+        Item.objects.create(text="Milk or cream", list=self.other_list)
+        for query in ['milk OR', '"milk', "milk*", "NEAR(", ""]:
+            self.assertEqual(self.client.get("/search", {"q": query}).status_code, 200)
+
+        self.assertEqual([item.text for item in search_items("milk OR")[0]], ["Milk or cream"])
+        self.assertEqual(search_items("NEAR(")[0], [])
+
+    def test_index_lookup_is_cached_per_alias(self):
+        has_fts_index()
+        with self.assertNumQueries(1):
+            search_items("milk")
+
+    @override_settings(LISTS_SEARCH_RESULTS_PER_PAGE=1)
+    def test_paginates_results(self):
+        first_page = self.client.get("/search?q=buy")
+        second_page = self.client.get("/search?q=buy&page=2")
+        self.assertContains(first_page, 'id="id_next_page"')
+        self.assertNotContains(second_page, 'id="id_next_page"')
+        self.assertEqual(len(first_page.context["items"]) + len(second_page.context["items"]), 2)
+
+    def test_falls_back_to_icontains_without_fts5(self):
+        with unittest.mock.patch("lists.search.has_fts_index", return_value=False):
+            items, has_next = search_items("MILK")
+        self.assertEqual(
+            [item.text for item in items],
+            ["Milk the cow, then drink milk", "Buy milk"]
+        )
+        self.assertFalse(has_next)
+
+
+INSTRUMENTED_TEMPLATES = [{**settings.TEMPLATES[0], "BACKEND": "lists.instrumentation.InstrumentedDjangoTemplates"}]
+
+
+@override_settings(LISTS_INSTRUMENTATION=True, TEMPLATES=INSTRUMENTED_TEMPLATES)
+class InstrumentationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.to_do_list = List.objects.create(last_read_at=timezone.now())
+        Item.objects.create(text=SmokeTest.items_list[0], list=cls.to_do_list)
+
+    def setUp(self):
+        registry.clear()
+        # a table cached by an earlier test of the same fixture list would skip the item query
+        get_cache().clear()
+
+    def test_records_queries_render_time_and_size_per_view(self):
+        response = self.client.get(f"/lists/{self.to_do_list.id}/")
+
+        self.assertEqual(registry.get("lists_db_queries", "view_list").sum, 1)
+        self.assertEqual(registry.get("lists_request_duration_seconds", "view_list").count, 1)
+        self.assertEqual(registry.get("lists_response_bytes", "view_list").sum, len(response.content))
+        self.assertEqual(registry.get("lists_template_render_seconds", "list.html").count, 1)
+        self.assertEqual(registry.get("lists_template_render_seconds", "list_table.html").count, 1)
+
+    def test_streamed_body_is_measured_once_read(self):
+        response = self.client.get(f"/lists/{self.to_do_list.id}/?stream=1")
+        self.assertIsNone(registry.get("lists_request_duration_seconds", "view_list"))
+        content = b"".join(response.streaming_content)
+
+        self.assertIn(SmokeTest.items_list[0].encode(), content)
+        self.assertEqual(registry.get("lists_request_duration_seconds", "view_list").count, 1)
+        self.assertEqual(registry.get("lists_response_bytes", "view_list").sum, len(content))
+        # the items are read while the body streams
+        self.assertGreater(registry.get("lists_db_queries", "view_list").sum, 1)
+
+    def test_sends_server_timing_header(self):
+        response = self.client.get(f"/lists/{self.to_do_list.id}/")
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="1 queries", render;dur=[\d.]+, total;dur=[\d.]+$')
+
+    def test_exports_prometheus_text(self):
+        self.client.get("/")
+        response = self.client.get("/metrics")
+        content = response.content.decode()
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4")
+        self.assertIn("# TYPE lists_request_duration_seconds histogram", content)
+        self.assertIn('lists_request_duration_seconds_count{view="home_page"} 1', content)
+        self.assertIn('lists_db_queries_bucket{view="home_page",le="0"} 1', content)
+
+    @override_settings(LISTS_INSTRUMENTATION=False)
+    def test_disabled_instrumentation_is_removed(self):
+        response = self.client.get("/")
+        self.assertFalse(response.has_header("Server-Timing"))
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+
+@override_settings(LISTS_COMPRESSION=True)
+class CompressionTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.to_do_list = List.objects.create()
+        for number in range(1, 51):
+            Item.objects.create(text=f"Item {number}", list=cls.to_do_list)
+
+    def get(self, path, **headers):
+        return self.client.get(path, headers={"Accept-Encoding": "gzip, br;q=0", **headers})
+
+    def test_pages_with_csrf_token_get_random_length_gzip_header(self):
+        response = self.get(f"/lists/{self.to_do_list.id}/")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"].split(", ")[-1], "Accept-Encoding")
+        # FNAME flag set: the padding hiding the compressed length
+        self.assertTrue(response.content[3] & 0x08)
+        self.assertIn("<tr><td>50. Item 50</td></tr>", gzip.decompress(response.content).decode())
+
+    def test_responses_without_secrets_are_not_padded(self):
+        response = self.get(f"/lists/{self.to_do_list.id}/items.json")
+        content = b"".join(response.streaming_content)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(content[3] & 0x08)
+        self.assertEqual(len(json.loads(gzip.decompress(content))["items"]), 50)
+
+    def test_streamed_page_is_flushed_per_chunk(self):
+        with override_settings(LISTS_STREAM_CHUNK_SIZE=10):
+            response = self.get(f"/lists/{self.to_do_list.id}/?stream=1")
+            chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 5)
+        self.assertFalse(response.has_header("Content-Length"))
+        content = gzip.decompress(b"".join(chunks)).decode()
+        self.assertIn("<tr><td>50. Item 50</td></tr>", content)
+        self.assertTrue(content.rstrip().endswith("</html>"))
+
+    def test_weakens_etag_and_still_answers_not_modified(self):
+        etag = self.get(f"/lists/{self.to_do_list.id}/")["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+        response = self.get(f"/lists/{self.to_do_list.id}/", **{"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_leaves_identity_requests_alone(self):
+        response = self.client.get(f"/lists/{self.to_do_list.id}/")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response["Vary"].split(", ")[-1], "Accept-Encoding")
+
+
+class MinifyTest(unittest.TestCase):
+    def test_collapses_whitespace_around_line_breaks(self):
+        source = "<table>\n    <tr>\n\n        <td>a  b</td>\n    </tr>\n</table>\n"
+        self.assertEqual(minify_html(source), "<table>\n<tr>\n<td>a  b</td>\n</tr>\n</table>\n")
+
+    def test_keeps_scripts_and_preformatted_text(self):
+        source = "<div>\n    <script>\n    let a = 1;\n    </script>\n    <pre>\n  x\n</pre>\n</div>"
+        self.assertEqual(
+            minify_html(source), "<div>\n<script>\n    let a = 1;\n    </script>\n<pre>\n  x\n</pre>\n</div>"
+        )
+
+    @override_settings(LISTS_MINIFY_HTML=True)
+    def test_minified_rows_keep_their_markup(self):
+        self.assertEqual(render_rows([(1, "<b>")]), "<tr><td>1. &lt;b&gt;</td></tr>\n")
+
+
 class NewListTest(TestCase):
     def test_save_post_request(self):
         self.client.post(
@@ -174,9 +1449,158 @@ class NewListTest(TestCase):
             path="/lists/new",
             data={"new_item": SmokeTest.items_list[0]}
         )
+        list_url = f'/lists/{List.objects.get().id}/'
         self.assertEqual(response.status_code, 302)
-        self.assertEqual(response['location'], '/lists/1/')
-        self.assertRedirects(response, '/lists/1/')
+        self.assertEqual(response['location'], list_url)
+        self.assertRedirects(response, list_url)
+
+
+class ItemIndexTest(TestCase):
+    def item_query_plans(self, path):
+        """The query plans of the item queries the view behind ``path`` runs."""
+        get_cache().clear()
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(path)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in captured.captured_queries:
+                if Item._meta.db_table in query["sql"]:
+                    cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                    plans.append(" ".join(row[-1] for row in cursor.fetchall()))
+        return plans
+
+    def test_list_view_query_uses_list_id_index(self):
+        to_do_list = List.objects.create()
+        items = [Item.objects.create(text=text, list=to_do_list) for text in SmokeTest.items_list]
+
+        # the first page joined to the list lookup, and a later one seeking past its cursor
+        for path in [f"/lists/{to_do_list.id}/", f"/lists/{to_do_list.id}/?page_size=1&after={items[0].id}&number=1"]:
+            plans = self.item_query_plans(path)
+            self.assertEqual(len(plans), 1, path)
+            self.assertIn("lists_item_list_id_idx", plans[0])
+            self.assertNotIn("TEMP B-TREE", plans[0])
+
+    def test_items_are_ordered_by_insertion(self):
+        to_do_list = List.objects.create()
+        for item in reversed(SmokeTest.items_list):
+            Item.objects.create(text=item, list=to_do_list)
+
+        self.assertEqual(
+            list(Item.objects.filter(list=to_do_list).values_list("text", flat=True)),
+            list(reversed(SmokeTest.items_list))
+        )
+
+
+class SqliteProfileTest(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_applies_configured_pragmas_to_new_connections(self):
+        cache_size = self.pragma("cache_size")
+        with override_settings(LISTS_SQLITE_PRAGMAS={"cache_size": -1234}):
+            configure_connection(sender=None, connection=connection)
+        try:
+            self.assertEqual(self.pragma("cache_size"), -1234)
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f"PRAGMA cache_size = {cache_size}")
+
+    def test_default_profile_leaves_connection_untouched(self):
+        cache_size = self.pragma("cache_size")
+        configure_connection(sender=None, connection=connection)
+        self.assertEqual(self.pragma("cache_size"), cache_size)
+
+
+class SqliteProfileBenchmarkTest(TransactionTestCase):
+    # the schema editor collecting the benchmark's DDL refuses to run inside a transaction
+    def test_runs_on_the_current_schema(self):
+        results = BENCHMARKS["sqlite_profile"](16)
+        self.assertEqual((results["default_errors"], results["production_errors"]), (0, 0))
+
+
+class WriteBehindBenchmarkTest(SimpleTestCase):
+    def test_failed_adds_are_counted_not_timed(self):
+        def add(list_id, text):
+            if text.endswith(("1", "3")):
+                raise OperationalError("database is locked")
+
+        _, added, failed = _add_concurrently(add, 1, clients=4, items_per_client=5)
+        self.assertEqual((added, failed), (12, 8))
+
+
+class ConcurrentWritesTest(SimpleTestCase):
+    """Writers racing on a WAL file database, as the production profile runs."""
+
+    engine = "lists.backends.sqlite3"
+    alias = "concurrent_writes"
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        connections.settings[self.alias] = {
+            **connections.settings["default"],
+            "ENGINE": self.engine,
+            "NAME": os.path.join(directory.name, "db.sqlite3"),
+            "OPTIONS": {"timeout": 20},
+        }
+        self.addCleanup(connections.settings.pop, self.alias)
+        self.addCleanup(connections.__delitem__, self.alias)
+        self.addCleanup(connections[self.alias].close)
+        override = override_settings(
+            LISTS_PRIMARY_ALIAS=self.alias, LISTS_SQLITE_PRAGMAS=settings.LISTS_SQLITE_PRODUCTION_PRAGMAS
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        with connections[self.alias].schema_editor() as schema_editor:
+            schema_editor.create_model(List)
+            schema_editor.create_model(Item)
+
+    def run_clients(self, write, clients=16, writes=30):
+        """Run ``write(client, number)`` from ``clients`` threads, return the errors raised."""
+        failures = []
+
+        def run(client):
+            # a connection per request, every write is a new connection's first
+            for number in range(writes):
+                try:
+                    write(client, number)
+                except Exception as error:
+                    failures.append(error)
+                finally:
+                    connections[self.alias].close()
+
+        threads = [threading.Thread(target=run, args=(client,)) for client in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return failures
+
+    def test_concurrent_add_item_never_fails(self):
+        to_do_list = List.objects.using(self.alias).create()
+        failures = self.run_clients(
+            lambda client, number: Item.objects.add_to_list(to_do_list.id, f"Item {client}.{number}")
+        )
+        self.assertEqual(failures, [])
+        to_do_list.refresh_from_db(using=self.alias)
+        self.assertEqual(to_do_list.item_count, 16 * 30)
+        self.assertEqual(Item.objects.using(self.alias).count(), 16 * 30)
+
+    def test_transaction_reading_before_writing_never_fails(self):
+        # the lock upgrade a deferred BEGIN fails on without waiting
+        to_do_list = List.objects.using(self.alias).create()
+
+        def count_item(client, number):
+            with transaction.atomic(using=self.alias):
+                item_count = List.objects.using(self.alias).get(id=to_do_list.id).item_count
+                time.sleep(0.001)
+                List.objects.using(self.alias).filter(id=to_do_list.id).update(item_count=item_count + 1)
+
+        self.assertEqual(self.run_clients(count_item), [])
+        to_do_list.refresh_from_db(using=self.alias)
+        self.assertEqual(to_do_list.item_count, 16 * 30)
 
 
 class ListAndItemModelsTest(TestCase):
@@ -233,5 +1657,73 @@ class NewItemTest(TestCase):
         self.assertRedirects(response, f"/lists/{to_do_list.id}/")
 
 
+class BulkAddItemsTest(TestCase):
+    def test_new_list_bulk_saves_newline_delimited_items(self):
+        response = self.client.post(
+            path="/lists/new/bulk",
+            data="\n".join(SmokeTest.items_list),
+            content_type="text/plain"
+        )
+        created_list = List.objects.first()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["list_id"], created_list.id)
+        self.assertEqual([item.text for item in Item.objects.filter(list=created_list)], SmokeTest.items_list)
+
+    def test_add_items_saves_json_array_in_batches(self):
+        to_do_list = List.objects.create()
+        items = [f"Item {number}" for number in range(5)]
+        response = self.client.post(
+            path=f"/lists/{to_do_list.id}/add_item/bulk?batch_size=2",
+            data=json.dumps(items),
+            content_type="application/json"
+        )
+        self.assertEqual(response.json()["batches"], [2, 2, 1])
+        self.assertEqual(response.json()["created"], len(items))
+        self.assertEqual(Item.objects.filter(list=to_do_list).count(), len(items))
+
+    def test_add_items_uses_one_insert_per_batch(self):
+        to_do_list = List.objects.create()
+        items = [f"Item {number}" for number in range(10)]
+        # list lookup, savepoint around the transaction, one INSERT per batch of five
+        # and the updated_at bump
+        with self.assertNumQueries(1 + 2 + 2 + 1):
+            self.client.post(
+                path=f"/lists/{to_do_list.id}/add_item/bulk?batch_size=5",
+                data=json.dumps(items),
+                content_type="application/json"
+            )
+
+    def test_streams_progress_per_batch(self):
+        to_do_list = List.objects.create()
+        response = self.client.post(
+            path=f"/lists/{to_do_list.id}/add_item/bulk?batch_size=1&stream=1",
+            data="\n".join(SmokeTest.items_list),
+            content_type="text/plain"
+        )
+        lines = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([line["total"] for line in lines[:-1]], [1, 2])
+        self.assertEqual(lines[-1]["created"], 2)
+        self.assertEqual(Item.objects.filter(list=to_do_list).count(), 2)
+
+    def test_rejects_invalid_payloads(self):
+        to_do_list = List.objects.create()
+        for payload in ["not json", json.dumps({"text": "item"}), json.dumps([1, 2]), json.dumps([])]:
+            response = self.client.post(
+                path=f"/lists/{to_do_list.id}/add_item/bulk",
+                data=payload,
+                content_type="application/json"
+            )
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(Item.objects.count(), 0)
+
+    def test_returns_404_for_unknown_list(self):
+        response = self.client.post(
+            path="/lists/999/add_item/bulk",
+            data="item",
+            content_type="text/plain"
+        )
+        self.assertEqual(response.status_code, 404)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,191 @@
+import bz2
+import csv
+import gzip
+import json
+import lzma
+import time
+from datetime import datetime
+from pathlib import Path
+
+from django.db import transaction
+from django.db.models import F
+
+from .archive import unpack_items
+from .models import Item, List, ListArchive
+from .sharding import shard_aliases
+
+DEFAULT_BATCH_SIZE = 5000
+FORMATS = (".ndjson", ".jsonl", ".csv")
+COMPRESSORS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+CSV_FIELDS = ["list", "updated_at", "item", "text"]
+
+
+class TransferError(ValueError):
+    pass
+
+
+def check_unsharded():
+    # dumps cover a single database and imported lists get ids from its own sequence
+    if shard_aliases():
+        raise TransferError("lists are sharded, export and import with SUPERLISTS_DB_SHARDS unset")
+
+
+def open_dump(path, mode):
+    """Open ``path`` for reading (``"r"``) or writing (``"w"``) as text.
+
+    The format comes from the extension, e.g. ``lists.ndjson``,
+    ``lists.csv.gz`` or ``lists.jsonl.xz``. Returns ``(format, file)``.
+    """
+    suffixes = Path(path).suffixes
+    opener = open
+    if suffixes and suffixes[-1] in COMPRESSORS:
+        opener = COMPRESSORS[suffixes.pop()]
+    dump_format = suffixes[-1] if suffixes else ""
+    if dump_format not in FORMATS:
+        raise TransferError(f"{path}: expected one of {', '.join(FORMATS)}, optionally followed by .gz, .bz2 or .xz")
+    return dump_format, opener(path, mode + "t", encoding="utf-8", newline="")
+
+
+def part_path(path, part):
+    """``lists.ndjson.gz`` becomes ``lists-<part>.ndjson.gz``."""
+    path = Path(path)
+    suffixes = "".join(path.suffixes)
+    return path.with_name(f"{path.name[:len(path.name) - len(suffixes)]}-{part}{suffixes}")
+
+
+def write_records(file, dump_format, records):
+    if dump_format == ".csv":
+        writer = csv.DictWriter(file, CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(records)
+    else:
+        for record in records:
+            file.write(json.dumps(record) + "\n")
+
+
+def read_records(file, dump_format):
+    if dump_format == ".csv":
+        yield from csv.DictReader(file)
+    else:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def list_id_ranges(parts):
+    """Split the lists into ``parts`` ``(first_id, end_id)`` ranges holding about as many lists each."""
+    count = List.objects.count()
+    ids = List.objects.order_by("id").values_list("id", flat=True)
+    bounds = [ids[count * part // parts] for part in range(1, parts)] if count else []
+    edges = [None, *bounds, None]
+    return list(zip(edges, edges[1:]))
+
+
+def export_records(first_id=None, end_id=None, chunk_size=DEFAULT_BATCH_SIZE):
+    """Yield every list with ``first_id <= id < end_id``, each followed by its items.
+
+    Lists and items are read by two cursors walking in id order and merged,
+    so memory does not grow with the number of rows. The items of an
+    archived list are read from its archive.
+    """
+    lists = List.objects.order_by("id")
+    items = Item.objects.order_by("list_id", "id")
+    if first_id is not None:
+        lists = lists.filter(id__gte=first_id)
+        items = items.filter(list_id__gte=first_id)
+    if end_id is not None:
+        lists = lists.filter(id__lt=end_id)
+        items = items.filter(list_id__lt=end_id)
+
+    items = items.values_list("list_id", "id", "text").iterator(chunk_size=chunk_size)
+    item = next(items, None)
+    lists = lists.values_list("id", "updated_at", "archived").iterator(chunk_size=chunk_size)
+    for list_id, updated_at, archived in lists:
+        yield {"list": list_id, "updated_at": updated_at.isoformat()}
+        if archived:
+            for item_id, text in unpack_items(ListArchive.objects.get(list_id=list_id).items):
+                yield {"list": list_id, "item": item_id, "text": text}
+        while item is not None and item[0] == list_id:
+            yield {"list": list_id, "item": item[1], "text": item[2]}
+            item = next(items, None)
+
+
+def import_records(records, batch_size=DEFAULT_BATCH_SIZE):
+    """Create the lists and items in ``records`` under new ids.
+
+    Records are written ``batch_size`` at a time, one transaction per batch,
+    and ``(lists, items)`` created by every batch is yielded. Items must follow
+    the list they belong to, as ``export_records`` writes them; only the id of
+    the latest list is remembered across batches.
+    """
+    lists, items = [], []
+    current = {}
+    for record in records:
+        if record.get("item") in (None, ""):
+            updated_at = datetime.fromisoformat(record["updated_at"])
+            lists.append((int(record["list"]), List(updated_at=updated_at)))
+        else:
+            items.append((int(record["list"]), record["text"]))
+        if len(lists) + len(items) >= batch_size:
+            current = _write_batch(lists, items, current)
+            yield len(lists), len(items)
+            lists, items = [], []
+    if lists or items:
+        _write_batch(lists, items, current)
+        yield len(lists), len(items)
+
+
+def _write_batch(lists, items, current):
+    with transaction.atomic():
+        List.objects.bulk_create([to_do_list for _, to_do_list in lists])
+        new_ids = {**current, **{old_id: to_do_list.id for old_id, to_do_list in lists}}
+        try:
+            rows = [Item(list_id=new_ids[old_id], text=text) for old_id, text in items]
+        except KeyError as error:
+            raise TransferError(f"item of list {error.args[0]} does not follow its list")
+        Item.objects.bulk_create(rows)
+
+        # bulk_create sends no post_save; imported lists keep their own updated_at
+        added = {}
+        for item in rows:
+            count, _ = added.get(item.list_id, (0, None))
+            added[item.list_id] = (count + 1, item.id)
+        for list_id, (count, last_item_id) in added.items():
+            List.objects.filter(id=list_id).update(item_count=F("item_count") + count, last_item_id=last_item_id)
+
+    if lists:
+        old_id, to_do_list = lists[-1]
+        return {old_id: to_do_list.id}
+    return current
+
+
+def export_file(path, first_id=None, end_id=None, chunk_size=DEFAULT_BATCH_SIZE):
+    """Write one dump and return ``(lists, items, seconds)``."""
+    counts = {"lists": 0, "items": 0}
+
+    def counted(records):
+        for record in records:
+            counts["lists" if record.get("item") is None else "items"] += 1
+            yield record
+
+    start = time.perf_counter()
+    dump_format, file = open_dump(path, "w")
+    with file:
+        write_records(file, dump_format, counted(export_records(first_id, end_id, chunk_size)))
+    return counts["lists"], counts["items"], time.perf_counter() - start
+
+
+def import_file(path, batch_size=DEFAULT_BATCH_SIZE):
+    """Load one dump and return ``(lists, items, seconds)``."""
+    lists = items = 0
+    start = time.perf_counter()
+    dump_format, file = open_dump(path, "r")
+    with file:
+        for batch_lists, batch_items in import_records(read_records(file, dump_format), batch_size):
+            lists += batch_lists
+            items += batch_items
+    return lists, items, time.perf_counter() - start
+
+
+def rate(lists, items, seconds):
+    return f"{lists} lists, {items} items in {seconds:.2f}s ({(lists + items) / max(seconds, 1e-9):.0f} rows/s)"
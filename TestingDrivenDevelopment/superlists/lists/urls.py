@@ -1,9 +1,21 @@
+from django.conf import settings
 from django.urls import path
-from. import views
+from. import async_views, views
+
+# pages are served by their async counterparts when LISTS_ASYNC_VIEWS is on,
+# /events streams under them and is polled otherwise
+page_views = async_views if getattr(settings, "LISTS_ASYNC_VIEWS", False) else views
 
 urlpatterns = [
-    path("", views.home_page, name="home_page"),
-    path("lists/new", views.new_list, name="new_list"),
-    path("lists/<int:list_id>/", views.view_list, name="view_list"),
-    path("lists/<int:list_id>/add_item", views.add_item, name="add_item"),
+    path("", page_views.home_page, name="home_page"),
+    path("lists/new", page_views.new_list, name="new_list"),
+    path("lists/<int:list_id>/", page_views.view_list, name="view_list"),
+    path("lists/<int:list_id>/add_item", page_views.add_item, name="add_item"),
+    path("lists/<int:list_id>/items.json", page_views.list_items_json, name="list_items_json"),
+    path("lists/<int:list_id>/items.ndjson", page_views.list_items_ndjson, name="list_items_ndjson"),
+    path("lists/<int:list_id>/events", page_views.list_events, name="list_events"),
+    path("metrics", views.metrics, name="metrics"),
+    path("search", views.search, name="search"),
+    path("lists/new/bulk", views.new_list_bulk, name="new_list_bulk"),
+    path("lists/<int:list_id>/add_item/bulk", views.add_items, name="add_items"),
 ]
@@ -1,5 +1,28 @@
-from django.shortcuts import render, redirect
+import json
+
+from django.db import transaction
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.views.decorators.http import condition, require_POST
+
+from . import writebehind
+from .archive import rehydrate_list
+from .bulk import BulkItemsError, parse_items, get_batch_size, create_items
+from .cache import get_or_render_table
+from .conditional import get_list_state, list_etag, list_last_modified, prefetch_first_page, records_reads
+from .instrumentation import registry
 from .models import Item, List
+from .pagination import get_item_page, page_cache_key
+from .pubsub import server_sent_events
+from .routers import stream_within, use_primary
+from .search import search_items
+from .streaming import stream_list_page, stream_items_json, stream_items_ndjson
+
+DEFAULT_EVENTS_POLL_SECONDS = 2
+EVENTS_MAX_ITEMS = 100
 
 
 # Create your views here.
@@ -15,14 +38,178 @@ def new_list(request):
     return redirect(f"/lists/{to_do_list.id}/")
 
 
+@records_reads
+@prefetch_first_page
+@condition(etag_func=list_etag, last_modified_func=list_last_modified)
 def view_list(request, list_id):
-    to_do_list = List.objects.get(id=list_id)
-    items = Item.objects.filter(list=to_do_list)
-    context = {"items": items, "to_do_list": to_do_list}
+    # the validator lookup doubles as the list lookup, and reads the first page when it can
+    state = get_list_state(request, list_id)
+    if state is None:
+        raise Http404("No List matches the given query.")
+    updated_at, archived, _ = state
+    to_do_list = List(id=list_id, updated_at=updated_at)
+    if archived:
+        return _rehydrated(list_id, archived, lambda: _list_page(request, to_do_list))
+    return _list_page(request, to_do_list, getattr(request, "_first_page_items", None))
+
+
+def _list_page(request, to_do_list, first_page_items=None):
+    if request.GET.get("stream"):
+        return StreamingHttpResponse(stream_list_page(request, to_do_list))
+    context = {
+        "table": render_list_table(to_do_list, request.GET, first_page_items),
+        "to_do_list": to_do_list,
+        "server_sent_events": server_sent_events(),
+        "events_poll_seconds": getattr(settings, "LISTS_EVENTS_POLL_SECONDS", DEFAULT_EVENTS_POLL_SECONDS),
+    }
     return render(request, "list.html", context)
 
 
+def _rehydrated(list_id, archived, respond):
+    """Return ``respond()``, putting the items of an archived list back first."""
+    if not archived:
+        return respond()
+    rehydrate_list(list_id)
+    # replicas may not have the items back yet
+    with use_primary():
+        return stream_within(respond(), use_primary)
+
+
+@records_reads
+@condition(etag_func=list_etag, last_modified_func=list_last_modified)
+def list_items_json(request, list_id):
+    return _stream_items(request, list_id, stream_items_json, "application/json")
+
+
+@records_reads
+@condition(etag_func=list_etag, last_modified_func=list_last_modified)
+def list_items_ndjson(request, list_id):
+    return _stream_items(request, list_id, stream_items_ndjson, "application/x-ndjson")
+
+
+def _stream_items(request, list_id, serialize, content_type):
+    state = get_list_state(request, list_id)
+    if state is None:
+        raise Http404("No List matches the given query.")
+    since_id = request.GET.get("since_id")
+    if since_id is not None and not since_id.isdigit():
+        return JsonResponse({"error": "since_id must be an integer"}, status=400)
+    since_id = int(since_id) if since_id is not None else None
+    return _rehydrated(
+        list_id, state[1], lambda: StreamingHttpResponse(serialize(list_id, since_id), content_type=content_type)
+    )
+
+
+def list_events(request, list_id):
+    """Items added to the list after ``after``, possibly none.
+
+    Answers right away so no WSGI worker waits on a list; the page polls
+    every LISTS_EVENTS_POLL_SECONDS instead. ``lists.async_views.list_events``
+    streams them.
+    """
+    if not List.objects.filter(id=list_id).exists():
+        raise Http404("No List matches the given query.")
+    after = request.GET.get("after", "0")
+    if not after.isdigit():
+        return JsonResponse({"error": "after must be an integer"}, status=400)
+    newer = Item.objects.filter(list_id=list_id, id__gt=int(after)).order_by("id").values_list("id", "text")
+    items = [{"id": item_id, "text": text} for item_id, text in newer[:EVENTS_MAX_ITEMS]]
+    response = JsonResponse({"items": items})
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+def search(request):
+    query = request.GET.get("q", "")
+    page = request.GET.get("page", "1")
+    page = int(page) if page.isdigit() and int(page) > 0 else 1
+    items, has_next = search_items(query, page)
+    context = {"query": query, "items": items, "page": page, "has_next": has_next}
+    return render(request, "search.html", context)
+
+
+def metrics(request):
+    if not getattr(settings, "LISTS_INSTRUMENTATION", False):
+        raise Http404("Instrumentation is disabled.")
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4")
+
+
+def render_list_table(to_do_list, params, first_page_items=None):
+    """Render the ``id_list_table`` block of a list page, served from cache when possible.
+
+    Only the table is cached: the rest of the page holds the per-request CSRF token.
+    ``first_page_items`` are the items read with the list, see ``prefetch_first_page``.
+    """
+    def render_table():
+        page = get_item_page(to_do_list, params, rows=first_page_items)
+        return render_to_string("list_table.html", {"page": page})
+
+    return mark_safe(get_or_render_table(to_do_list, page_cache_key(params), render_table))
+
+
 def add_item(request, list_id):
-    to_do_list = List.objects.get(id=list_id)
-    Item.objects.create(text=request.POST["new_item"], list=to_do_list)
-    return redirect(f"/lists/{to_do_list.id}/")
+    try:
+        writebehind.add_item(list_id, request.POST["new_item"])
+    except List.DoesNotExist:
+        raise Http404("No List matches the given query.")
+    return redirect(f"/lists/{list_id}/")
+
+
+@require_POST
+def new_list_bulk(request):
+    return _add_items_in_bulk(request, to_do_list=None)
+
+
+@require_POST
+def add_items(request, list_id):
+    to_do_list = get_object_or_404(List, id=list_id)
+    if to_do_list.archived:
+        rehydrate_list(list_id)
+    return _add_items_in_bulk(request, to_do_list)
+
+
+def _add_items_in_bulk(request, to_do_list):
+    try:
+        texts = parse_items(request)
+        batch_size = get_batch_size(request)
+    except BulkItemsError as error:
+        return JsonResponse({"error": str(error)}, status=400)
+
+    if request.GET.get("stream"):
+        response = StreamingHttpResponse(
+            _stream_bulk_progress(to_do_list, texts, batch_size),
+            content_type="application/x-ndjson",
+        )
+        response.status_code = 201
+        return response
+
+    to_do_list = to_do_list or List()
+    with transaction.atomic(using=to_do_list.db_for_write()):
+        if to_do_list._state.adding:
+            to_do_list.save(force_insert=True)
+        batches = list(create_items(to_do_list, texts, batch_size))
+    return JsonResponse(_bulk_summary(to_do_list, batches), status=201)
+
+
+def _stream_bulk_progress(to_do_list, texts, batch_size):
+    # the transaction stays open across yields, so a client disconnecting
+    # mid-upload rolls back every batch written so far
+    to_do_list = to_do_list or List()
+    with transaction.atomic(using=to_do_list.db_for_write()):
+        if to_do_list._state.adding:
+            to_do_list.save(force_insert=True)
+        batches = []
+        for created in create_items(to_do_list, texts, batch_size):
+            batches.append(created)
+            progress = {"batch": len(batches), "created": created, "total": sum(batches)}
+            yield json.dumps(progress) + "\n"
+    yield json.dumps(_bulk_summary(to_do_list, batches)) + "\n"
+
+
+def _bulk_summary(to_do_list, batches):
+    return {
+        "list_id": to_do_list.id,
+        "url": f"/lists/{to_do_list.id}/",
+        "created": sum(batches),
+        "batches": batches,
+    }
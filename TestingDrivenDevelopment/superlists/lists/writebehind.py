@@ -0,0 +1,150 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import connections, router, transaction
+
+from .archive import rehydrate_list
+from .models import Item, List
+from .pubsub import publish_items
+from .sharding import use_shard
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_DELAY_MS = 5
+
+
+class ItemWriter:
+    """Coalesces items added by concurrent requests into group commits.
+
+    A background thread takes queued items and writes them in one transaction
+    once ``batch_size`` items are waiting or the oldest has waited
+    ``max_delay_ms``. Every caller gets a future resolved after that commit,
+    so the page it redirects to already shows its item.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, max_delay_ms=DEFAULT_MAX_DELAY_MS):
+        self.batch_size = batch_size
+        self.max_delay = max_delay_ms / 1000
+        self.commits = 0
+        self.items_written = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="lists-item-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, list_id, text):
+        future = Future()
+        self._queue.put((list_id, text, future))
+        return future
+
+    def add(self, list_id, text):
+        return self.submit(list_id, text).result()
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while True:
+                batch = self._next_batch()
+                self._write(batch)
+                # None is queued by stop()
+                if batch[-1] is None:
+                    return
+        finally:
+            connections.close_all()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+        while batch[-1] is not None and len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        entries = [entry for entry in batch if entry is not None]
+        if not entries:
+            return
+        # one group commit per database, lists may be sharded
+        groups = {}
+        for entry in entries:
+            groups.setdefault(router.db_for_write(Item, list_id=entry[0]), []).append(entry)
+        for using, group in groups.items():
+            self._write_group(using, group)
+
+    def _write_group(self, using, entries):
+        try:
+            with transaction.atomic(using=using), use_shard(using):
+                list_ids = {list_id for list_id, _, _ in entries}
+                lists = dict(List.objects.using(using).filter(id__in=list_ids).values_list("id", "archived"))
+                for list_id in [list_id for list_id, archived in lists.items() if archived]:
+                    rehydrate_list(list_id, using)
+                existing = set(lists)
+                items = [Item(list_id=list_id, text=text) for list_id, text, _ in entries if list_id in existing]
+                Item.objects.using(using).bulk_create(items)
+                for list_id in existing:
+                    list_items = [item for item in items if item.list_id == list_id]
+                    List.record_added_items(list_id, len(list_items), list_items[-1].id)
+                    publish_items(list_id, list_items, using)
+        except Exception as error:
+            for _, _, future in entries:
+                future.set_exception(error)
+            return
+
+        self.commits += 1
+        self.items_written += len(items)
+        written = iter(items)
+        for list_id, _, future in entries:
+            if list_id in existing:
+                future.set_result(next(written))
+            else:
+                future.set_exception(List.DoesNotExist(f"List matching id {list_id} does not exist."))
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def is_enabled():
+    return getattr(settings, "LISTS_WRITE_BEHIND", False)
+
+
+def get_item_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ItemWriter(
+                batch_size=getattr(settings, "LISTS_WRITE_BEHIND_BATCH_SIZE", DEFAULT_BATCH_SIZE),
+                max_delay_ms=getattr(settings, "LISTS_WRITE_BEHIND_MAX_DELAY_MS", DEFAULT_MAX_DELAY_MS),
+            )
+        return _writer
+
+
+def stop_item_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _writer.stop()
+            _writer = None
+
+
+def add_item(list_id, text):
+    """Add an item through the shared writer when write-behind is on, directly otherwise."""
+    if is_enabled():
+        return get_item_writer().add(list_id, text)
+    return Item.objects.add_to_list(list_id, text)
+
+
+async def aadd_item(list_id, text):
+    if is_enabled():
+        return await asyncio.wrap_future(get_item_writer().submit(list_id, text))
+    return await Item.objects.aadd_to_list(list_id, text)
@@ -0,0 +1,16 @@
+from django.contrib.staticfiles.apps import StaticFilesConfig
+
+
+class SuperlistsStaticFilesConfig(StaticFilesConfig):
+    # base.html only links bootstrap.min.css and bootstrap.min.js, the other
+    # bootstrap builds stay out of collectstatic; source maps are kept because
+    # the minified files reference them
+    ignore_patterns = [
+        *StaticFilesConfig.ignore_patterns,
+        "*.rtl.*",
+        "bootstrap-*",
+        "bootstrap.bundle*",
+        "bootstrap.esm*",
+        "bootstrap.css*",
+        "bootstrap.js*",
+    ]
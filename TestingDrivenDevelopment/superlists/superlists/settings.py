@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -36,11 +37,15 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
-    'django.contrib.staticfiles',
+    'superlists.apps.SuperlistsStaticFilesConfig',
     'lists',
 ]
 
 MIDDLEWARE = [
+    'lists.middleware.InstrumentationMiddleware',
+    'lists.middleware.CompressionMiddleware',
+    'lists.middleware.ReplicaStickinessMiddleware',
+    'lists.middleware.ShardMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,7 +60,7 @@ ROOT_URLCONF = 'superlists.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [BASE_DIR, "templates"],
+        'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -68,6 +73,41 @@ TEMPLATES = [
     },
 ]
 
+# SUPERLISTS_TEMPLATE_PROFILE=production always serves templates from the
+# cached loader, even with DEBUG on, and compiles the page templates at startup
+TEMPLATE_PROFILE = os.environ.get('SUPERLISTS_TEMPLATE_PROFILE', 'default')
+
+# LISTS_MINIFY_HTML=1 strips indentation and blank lines from templates as
+# they are compiled and from list rows, see lists.minify
+LISTS_MINIFY_HTML = os.environ.get('LISTS_MINIFY_HTML') == '1'
+
+TEMPLATE_SOURCE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+if LISTS_MINIFY_HTML:
+    TEMPLATE_SOURCE_LOADERS = [('lists.minify.MinifyingLoader', TEMPLATE_SOURCE_LOADERS)]
+
+if TEMPLATE_PROFILE == 'production':
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [('django.template.loaders.cached.Loader', TEMPLATE_SOURCE_LOADERS)]
+    LISTS_PRECOMPILED_TEMPLATES = ['home.html', 'list.html', 'list_table.html', 'search.html']
+else:
+    LISTS_PRECOMPILED_TEMPLATES = []
+    if LISTS_MINIFY_HTML:
+        TEMPLATES[0]['APP_DIRS'] = False
+        TEMPLATES[0]['OPTIONS']['loaders'] = TEMPLATE_SOURCE_LOADERS
+
+# LISTS_COMPRESSION=1 compresses text responses, see lists.middleware.CompressionMiddleware
+LISTS_COMPRESSION = os.environ.get('LISTS_COMPRESSION') == '1'
+
+# Per-view timings in Server-Timing headers and on /metrics, see lists.instrumentation
+LISTS_INSTRUMENTATION = os.environ.get('LISTS_INSTRUMENTATION') == '1'
+
+if LISTS_INSTRUMENTATION:
+    TEMPLATES[0]['BACKEND'] = 'lists.instrumentation.InstrumentedDjangoTemplates'
+
 WSGI_APPLICATION = 'superlists.wsgi.application'
 
 
@@ -77,10 +117,88 @@ WSGI_APPLICATION = 'superlists.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('SUPERLISTS_DB_NAME', BASE_DIR / 'db.sqlite3'),
     }
 }
 
+# SUPERLISTS_DB_PROFILE=production keeps connections open between requests and
+# tunes SQLite for concurrent readers and writers, see lists.sqlite
+DATABASE_PROFILE = os.environ.get('SUPERLISTS_DB_PROFILE', 'default')
+
+LISTS_SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # negative values are KiB
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+if DATABASE_PROFILE == 'production':
+    DATABASES['default'].update({
+        # BEGIN IMMEDIATE, so concurrent writers wait for the timeout instead of failing
+        'ENGINE': 'lists.backends.sqlite3',
+        'CONN_MAX_AGE': None,
+        'CONN_HEALTH_CHECKS': True,
+        # seconds a writer waits on a locked database before giving up
+        'OPTIONS': {'timeout': 20},
+    })
+    LISTS_SQLITE_PRAGMAS = LISTS_SQLITE_PRODUCTION_PRAGMAS
+else:
+    LISTS_SQLITE_PRAGMAS = {}
+
+# SUPERLISTS_DB_REPLICAS=/path/one.sqlite3,/path/two.sqlite3 adds read replicas
+# of the default database, kept current by whatever replicates it. Reads of
+# lists and items go to a replica unless the client wrote in the last
+# LISTS_REPLICA_STICKY_SECONDS, see lists.routers
+LISTS_REPLICA_ALIASES = []
+for number, replica_name in enumerate(filter(None, os.environ.get('SUPERLISTS_DB_REPLICAS', '').split(',')), start=1):
+    DATABASES[f'replica{number}'] = {**DATABASES['default'], 'NAME': replica_name, 'TEST': {'MIRROR': 'default'}}
+    LISTS_REPLICA_ALIASES.append(f'replica{number}')
+
+LISTS_REPLICA_STICKY_SECONDS = 5
+
+# SUPERLISTS_DB_SHARDS=/path/one.sqlite3,/path/two.sqlite3 spreads lists, each
+# with its items, over the default database and these by a hash of the list
+# id, replicas are then not used for lists. Only ever append shards: set
+# SUPERLISTS_DB_PREVIOUS_SHARDS to the number of databases before the change
+# until `manage.py rebalance_shards` has moved the lists, see lists.sharding
+LISTS_SHARDS = []
+for number, shard_name in enumerate(filter(None, os.environ.get('SUPERLISTS_DB_SHARDS', '').split(',')), start=1):
+    DATABASES[f'shard{number}'] = {**DATABASES['default'], 'NAME': shard_name}
+    LISTS_SHARDS.append(f'shard{number}')
+if LISTS_SHARDS:
+    LISTS_SHARDS.insert(0, 'default')
+LISTS_PREVIOUS_SHARDS = LISTS_SHARDS[:int(os.environ.get('SUPERLISTS_DB_PREVIOUS_SHARDS', '0'))]
+# holds the list id sequence
+LISTS_SHARD_DIRECTORY = 'default'
+LISTS_SHARD_ID_BLOCK_SIZE = 100
+
+DATABASE_ROUTERS = ['lists.sharding.ShardRouter', 'lists.routers.ReplicaRouter']
+
+# `manage.py archive_lists` compresses the items of lists neither written nor
+# read for this long into one row each, the next view or write puts them back,
+# see lists.archive
+LISTS_ARCHIVE_AFTER_DAYS = 90
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # rendered list tables, keyed by List.updated_at so each worker may keep its own
+    'lists': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lists-tables',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -117,8 +235,56 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'static'
+
+# SUPERLISTS_STATIC_PROFILE=production expects `manage.py collectstatic` to have
+# run: it links content-hashed names and serves pre-compressed siblings, see
+# lists.staticfiles
+STATIC_PROFILE = os.environ.get('SUPERLISTS_STATIC_PROFILE', 'default')
+
+if STATIC_PROFILE == 'production':
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'lists.staticfiles.CompressedManifestStaticFilesStorage'},
+    }
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Lists app
+
+# Number of items written by a single INSERT in the bulk endpoints
+LISTS_BULK_BATCH_SIZE = 500
+
+# Items shown per list page, clients may ask for up to LISTS_MAX_PAGE_SIZE
+LISTS_PAGE_SIZE = 100
+LISTS_MAX_PAGE_SIZE = 1000
+
+# Rows fetched per server-side cursor round trip by /lists/<id>/?stream=1
+LISTS_STREAM_CHUNK_SIZE = 2000
+
+# Cache alias holding rendered list tables
+LISTS_CACHE_ALIAS = 'lists'
+
+# Serve the list pages from lists.async_views, for ASGI deployments
+LISTS_ASYNC_VIEWS = os.environ.get('LISTS_ASYNC_VIEWS') == '1'
+
+# Queue add_item writes and commit them in groups of up to
+# LISTS_WRITE_BEHIND_BATCH_SIZE, waiting at most LISTS_WRITE_BEHIND_MAX_DELAY_MS
+LISTS_WRITE_BEHIND = os.environ.get('LISTS_WRITE_BEHIND') == '1'
+LISTS_WRITE_BEHIND_BATCH_SIZE = 100
+LISTS_WRITE_BEHIND_MAX_DELAY_MS = 5
+
+# Where /lists/<id>/events learns about new items: LocalPubSub within one
+# process, PollingPubSub reads the database and so works across workers
+LISTS_PUBSUB_BACKEND = 'lists.pubsub.LocalPubSub'
+LISTS_EVENTS_KEEPALIVE_SECONDS = 15
+# Without LISTS_ASYNC_VIEWS pages poll /events this often, backing off
+# while nothing comes
+LISTS_EVENTS_POLL_SECONDS = 2
+
+# Items per page of /search results
+LISTS_SEARCH_RESULTS_PER_PAGE = 20
@@ -0,0 +1,41 @@
+"""
+Settings for running the unit tests, picked by ``manage.py test``.
+
+Everything not set here comes from superlists.settings, pass
+``--settings superlists.settings`` to test against those unchanged.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+# every test process, parallel workers included, gets a private in-memory
+# database whose schema is created from the models instead of replaying the
+# migrations, see lists.search.create_unmigrated_fts_index
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'TEST': {'MIGRATE': False},
+    },
+    # shares the test database, tests opt in with LISTS_REPLICA_ALIASES
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'TEST': {'MIRROR': 'default'},
+    },
+    # a database of its own for the sharding tests, which opt in with LISTS_SHARDS
+    'shard': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+}
+
+LISTS_REPLICA_ALIASES = []
+LISTS_SHARDS = []
+LISTS_PREVIOUS_SHARDS = []
+
+LISTS_SQLITE_PRAGMAS = {}
+
+# the default PBKDF2 hasher is slow on purpose
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+TEST_RUNNER = 'lists.testing.TimedDiscoverRunner'